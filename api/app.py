@@ -1,42 +1,82 @@
+import time
+
+# Measured from the top of this module so the startup breakdown includes the imports
+_import_start = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 from fastapi import FastAPI
+from api import runtime
 from api.v1 import endpoints as v1
-from api.utils.logging import setup_logger
+from api.v2 import endpoints as v2
 import uvicorn
 import os
-import time
 import logging
 
-# Setup logger
-config_path = os.getenv('CONFIG_PATH', 'config/dev/config.yml')
-setup_logger('ml_classifier', config_path)
 logger = logging.getLogger('ml_classifier')
+_imports_seconds = time.perf_counter() - _import_start
+
+
+def create_app(config_path: Optional[str] = None) -> FastAPI:
+    """
+    Create the API application.
+
+    Configuration, logging and the model are loaded once per worker process by the
+    lifespan startup, not at import time, and released again on shutdown.
+
+    Args:
+        config_path (Optional[str]): Configuration file. Defaults to ``$CONFIG_PATH``
+            or the development configuration.
+
+    Returns:
+        FastAPI: The application
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        timings = runtime.startup(config_path)
+        timings["imports"] = _imports_seconds
+        timings["total"] = _imports_seconds + time.perf_counter() - start
+        logger.info("Startup completed: " + ", ".join(f"{step} {seconds * 1000:.1f}ms" for step, seconds in timings.items()),
+                    extra={"startup_seconds": dict(timings)})
+        try:
+            yield
+        finally:
+            await runtime.shutdown()
+
+    app = FastAPI(
+        title="Image Classifier API",
+        description="API for classifying images using a logistic regression model.",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    app.include_router(v1.router, prefix="/api/v1")
+    app.include_router(v2.router, prefix="/api/v2")
+
+    @app.middleware("http")
+    async def log_requests(request, call_next):
+        start_time = time.time()
+        logger.info("Request received", extra={
+            "method": request.method,
+            "url": str(request.url),
+            "client_ip": request.client.host,
+        })
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        logger.info("Request completed", extra={
+            "method": request.method,
+            "url": str(request.url),
+            "status_code": response.status_code,
+            "duration": process_time,
+        })
+        return response
+
+    return app
+
 
-app = FastAPI(
-    title="Image Classifier API",
-    description="API for classifying images using a logistic regression model.",
-    version="1.0.0",
-)
-
-app.include_router(v1.router, prefix="/api/v1")
-
-@app.middleware("http")
-async def log_requests(request, call_next):
-    start_time = time.time()
-    logger.info("Request received", extra={
-        "method": request.method,
-        "url": str(request.url),
-        "client_ip": request.client.host,
-    })
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    logger.info("Request completed", extra={
-        "method": request.method,
-        "url": str(request.url),
-        "status_code": response.status_code,
-        "duration": process_time,
-    })
-    return response
+app = create_app()
 
 if __name__ == "__main__":
     logger.info("Starting application")
-    uvicorn.run("api.app:app", host="0.0.0.0", port=int(os.getenv('PORT', 8000)), reload=True)
\ No newline at end of file
+    uvicorn.run("api.app:app", host="0.0.0.0", port=int(os.getenv('PORT', 8000)), reload=True)
@@ -0,0 +1,144 @@
+"""
+Serving state shared by the API versions: configuration, logger, model, worker pools and caches.
+
+Nothing is loaded at import time. ``startup`` builds the state once per worker process
+(from the application's lifespan handler, see ``api.app.create_app``) and ``shutdown``
+releases it. Endpoints read the state through this module at request time, e.g.
+``runtime.registry``.
+"""
+from api.utils.batching import MicroBatcher
+from api.utils.config import AppConfig, ConfigLoader
+from api.utils.logging import setup_logger
+from api.utils.metrics import metrics
+from api.utils.metrics_exporter import MetricsExporter
+from api.utils.model_registry import ModelRegistry
+from api.utils.prediction_cache import PredictionCache
+from api.utils.workers import WorkerPool
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import os
+import logging
+import time
+
+logger = logging.getLogger('ml_classifier')
+
+config_path: Optional[str] = None
+settings: Optional[AppConfig] = None
+# Raw configuration mapping, for sections without a typed view (read-only)
+config: Dict[str, Any] = {}
+registry: Optional[ModelRegistry] = None
+preprocess_pool: Optional[WorkerPool] = None
+batcher: Optional[MicroBatcher] = None
+prediction_cache: Optional[PredictionCache] = None
+metrics_exporter: Optional[MetricsExporter] = None
+# Seconds spent in each startup step, in order
+startup_timings: Dict[str, float] = {}
+
+
+@contextmanager
+def _timed(step: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[step] = time.perf_counter() - start
+
+
+def startup(path: Optional[str] = None) -> Dict[str, float]:
+    """
+    Load the configuration, set up logging, load the model and create the worker
+    pools and caches. Does nothing if the runtime is already started.
+
+    Args:
+        path (Optional[str]): Configuration file. Defaults to ``$CONFIG_PATH`` or the
+            development configuration.
+
+    Returns:
+        Dict[str, float]: Seconds spent in each startup step
+
+    Raises:
+        Exception: If the configuration or the model cannot be loaded
+    """
+    global config_path, settings, config, registry, preprocess_pool, batcher, prediction_cache, metrics_exporter
+    if registry is not None:
+        return startup_timings
+
+    config_path = path or os.getenv('CONFIG_PATH', 'config/dev/config.yml')
+    with _timed('config'):
+        settings = ConfigLoader(config_path).load()
+        config = settings.raw
+
+    with _timed('logging'):
+        setup_logger(config_path, 'ml_classifier', logs=settings.logs)
+
+    # Load model and watch its path for new versions
+    with _timed('model'):
+        from src.models.logistic_regression_nn import LogisticRegression
+
+        registry = ModelRegistry(
+            os.getenv('MODEL_PATH', settings.model.path),
+            loader=LogisticRegression.load,
+            poll_interval=settings.model.poll_interval_s,
+        )
+        try:
+            registry.start()
+        except Exception as e:
+            logger.error(f"Failed to load model: {str(e)}")
+            registry = None
+            raise
+
+    with _timed('pools'):
+        # Decode and preprocess uploads off the event loop
+        preprocess_config = settings.pools.preprocess
+        preprocess_pool = WorkerPool(
+            kind=preprocess_config.kind,
+            max_workers=preprocess_config.max_workers,
+            max_pending=preprocess_config.max_pending,
+        )
+
+        # Micro-batch concurrent requests into one vectorized forward pass
+        batching_config = settings.batching
+        batcher = MicroBatcher(
+            lambda X, model: model.predict_uint8(X),
+            max_batch_size=batching_config.max_batch_size,
+            max_wait_ms=batching_config.max_wait_ms,
+            max_queue_size=batching_config.max_queue_size,
+        )
+
+        # Answer duplicate uploads without decoding or predicting
+        cache_config = config.get('prediction_cache', {})
+        prediction_cache = PredictionCache(
+            max_entries=cache_config.get('max_entries', 10000),
+            ttl_s=cache_config.get('ttl_s'),
+        )
+
+    with _timed('metrics'):
+        # Share this worker's metrics with the others through snapshot files
+        metrics_config = config.get('metrics', {})
+        metrics_exporter = MetricsExporter(
+            metrics,
+            collectors={
+                "batching": batcher.stats,
+                "preprocess_pool": preprocess_pool.stats,
+                "prediction_cache": prediction_cache.stats,
+                "model": registry.status,
+                "startup": lambda: dict(startup_timings),
+            },
+            directory=os.getenv('METRICS_DIR', metrics_config.get('dir')),
+            interval=metrics_config.get('snapshot_interval_s', 5.0),
+        )
+        metrics_exporter.start()
+    return startup_timings
+
+
+async def shutdown() -> None:
+    global registry, preprocess_pool, batcher, prediction_cache, metrics_exporter
+    if registry is None:
+        return
+    # Stop the writer first so it cannot recreate this worker's snapshot after it is retired
+    metrics_exporter.stop()
+    metrics_exporter.retire()
+    registry.stop()
+    await batcher.stop()
+    preprocess_pool.shutdown(wait=False)
+    registry = preprocess_pool = batcher = prediction_cache = metrics_exporter = None
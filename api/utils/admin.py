@@ -0,0 +1,23 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+# Token that admin requests must send in the X-Admin-Token header. Unset disables admin endpoints.
+ADMIN_TOKEN_ENV = 'ADMIN_TOKEN'
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency that only lets requests carrying the admin token through.
+
+    Raises:
+        HTTPException: 403 if no admin token is configured, 401 if the request's token
+            is missing or wrong
+    """
+    expected = os.getenv(ADMIN_TOKEN_ENV)
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
@@ -0,0 +1,209 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a request is submitted while the batching queue is at capacity."""
+
+
+class MicroBatcher:
+    """
+    Collect concurrent prediction requests into a single vectorized forward pass.
+
+    Each request submits a column block of shape (features, k) together with a
+    context, such as the model that must make the prediction. The worker waits for
+    up to ``max_wait_ms`` after the first request arrives (or until ``max_batch_size``
+    columns are queued), stacks the blocks of requests sharing a context into one
+    (features, N) array, calls ``predict_fn(X, context)`` once per context and
+    resolves every request's future with its own slice of the (1, N) output.
+
+    Args:
+        predict_fn (Callable[[np.ndarray, Any], np.ndarray]): Vectorized predict function
+        max_batch_size (int): Maximum number of columns in one forward pass
+        max_wait_ms (float): Maximum time to wait for a batch to fill
+        max_queue_size (int): Maximum number of requests waiting to be batched
+        executor (Optional[Executor]): Executor for the forward pass. Defaults to the
+            event loop's default thread pool.
+    """
+
+    def __init__(
+            self,
+            predict_fn: Callable[[np.ndarray, Any], np.ndarray],
+            max_batch_size: int = 32,
+            max_wait_ms: float = 5.0,
+            max_queue_size: int = 1024,
+            executor: Optional[Executor] = None,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be at least 1")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._columns = 0
+        self._largest_batch = 0
+        self._batch_size_buckets: Dict[int, int] = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._rejected = 0
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker = loop.create_task(self._run())
+
+    async def submit(self, x: np.ndarray, context: Any = None) -> np.ndarray:
+        """
+        Queue a column block for prediction and wait for its result.
+
+        Args:
+            x (np.ndarray): Input of shape (features, k)
+            context (Any): Passed to ``predict_fn``. Only requests with the same context
+                (by identity) share a forward pass.
+
+        Returns:
+            np.ndarray: Predictions of shape (1, k)
+
+        Raises:
+            QueueFullError: If the queue already holds ``max_queue_size`` requests
+        """
+        self._ensure_started()
+        if x.ndim == 1:
+            x = x.reshape(-1, 1)
+
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((x, context, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            with self._stats_lock:
+                self._rejected += 1
+            raise QueueFullError(f"Prediction queue is full ({self.max_queue_size} pending requests)")
+        return await future
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            columns = batch[0][0].shape[1]
+            deadline = self._loop.time() + self.max_wait
+
+            while columns < self.max_batch_size:
+                if queue.empty():
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                batch.append(item)
+                columns += item[0].shape[1]
+
+            await self._process(batch)
+
+    async def _process(self, batch: List[Tuple[np.ndarray, Any, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        waits = [started - enqueued for _, _, _, enqueued in batch]
+        self._record_batch(sum(x.shape[1] for x, _, _, _ in batch), len(batch), waits)
+
+        # Almost always a single group: contexts only differ across a model swap
+        groups: Dict[int, List[Tuple[np.ndarray, Any, asyncio.Future, float]]] = {}
+        for item in batch:
+            groups.setdefault(id(item[1]), []).append(item)
+        for group in groups.values():
+            await self._predict_group(group)
+
+    async def _predict_group(self, group: List[Tuple[np.ndarray, Any, asyncio.Future, float]]) -> None:
+        try:
+            X = group[0][0] if len(group) == 1 else np.hstack([x for x, _, _, _ in group])
+            predictions = await self._loop.run_in_executor(self.executor, self.predict_fn, X, group[0][1])
+        except Exception as e:
+            for _, _, future, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for x, _, future, _ in group:
+            width = x.shape[1]
+            if not future.done():
+                future.set_result(predictions[:, offset:offset + width])
+            offset += width
+
+    def _record_batch(self, columns: int, requests: int, waits: List[float]) -> None:
+        bucket = 1 << (columns - 1).bit_length()
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += requests
+            self._columns += columns
+            self._largest_batch = max(self._largest_batch, columns)
+            self._batch_size_buckets[bucket] = self._batch_size_buckets.get(bucket, 0) + 1
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return batching statistics for tuning batch size and wait window.
+
+        Returns:
+            Dict[str, Any]: Batch counts, batch-size distribution (by power-of-two
+                upper bound), queue wait times in milliseconds and current queue depth
+        """
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self._batches,
+                "requests": self._requests,
+                "rejected": self._rejected,
+                "average_batch_size": self._columns / self._batches if self._batches else 0,
+                "largest_batch_size": self._largest_batch,
+                "batch_size_distribution": dict(sorted(self._batch_size_buckets.items())),
+                "average_queue_wait_ms": self._wait_total / self._requests * 1000.0 if self._requests else 0,
+                "max_queue_wait_ms": self._wait_max * 1000.0,
+            }
+
+    async def stop(self) -> None:
+        """
+        Stop the batching worker and fail any requests still waiting in the queue.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+        self._worker = None
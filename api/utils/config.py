@@ -1,22 +1,246 @@
 # config_loader.py
 
+import copy
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
 import yaml
 
+logger = logging.getLogger(__name__)
+
+# Overlay files merged over the main configuration, separated by os.pathsep
+OVERLAYS_ENV = 'CONFIG_OVERLAYS'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+class _ConfigYamlLoader(getattr(yaml, 'CSafeLoader', yaml.SafeLoader)):
+    """Safe YAML loader (libyaml-backed when available) with the project's custom tags."""
+
+
+def _join_constructor(loader: yaml.Loader, node: yaml.Node) -> str:
+    seq = loader.construct_sequence(node)
+    return ''.join(str(item) for item in seq)
+
+
+# Registered once, on this loader only, instead of globally on PyYAML
+_ConfigYamlLoader.add_constructor('!join', _join_constructor)
+
+
+def _require(condition: bool, message: str) -> None:
+    if not condition:
+        raise ValueError(f"Invalid configuration: {message}")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@dataclass(frozen=True)
+class LogsConfig:
+    dir: str
+    fname: str
+    # None leaves the level to the caller (setup_logger's log_level)
+    level: Optional[str] = None
+    when: str = 'midnight'
+    interval: int = 1
+    backup_count: int = 15
+    format: str = 'text'
+    async_logging: Dict[str, Any] = field(default_factory=dict)
+    elasticsearch: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        _require(isinstance(self.dir, str) and bool(self.dir), "logs.dir must be a non-empty string")
+        _require(isinstance(self.fname, str) and bool(self.fname), "logs.fname must be a non-empty string")
+        _require(self.level is None or str(self.level).upper() in LOG_LEVELS, f"logs.level must be one of {LOG_LEVELS}")
+        _require(isinstance(self.interval, int) and self.interval >= 1, "logs.interval must be an integer >= 1")
+        _require(isinstance(self.backup_count, int) and self.backup_count >= 0,
+                 "logs.backup_count must be an integer >= 0")
+        _require(self.format in ('text', 'json'), "logs.format must be 'text' or 'json'")
+        _require(isinstance(self.async_logging, dict), "logs.async must be a mapping")
+        _require(isinstance(self.elasticsearch, dict), "logs.elasticsearch must be a mapping")
+        _require(self.async_logging.get('policy', 'drop') in ('drop', 'sample', 'block'),
+                 "logs.async.policy must be 'drop', 'sample' or 'block'")
+
+
+@dataclass(frozen=True)
+class ModelConfig:
+    path: str = 'trained_model.pkl'
+    poll_interval_s: float = 5.0
+
+    def __post_init__(self) -> None:
+        _require(isinstance(self.path, str) and bool(self.path), "model.path must be a non-empty string")
+        _require(_is_number(self.poll_interval_s) and self.poll_interval_s >= 0, "model.poll_interval_s must be >= 0")
+
+
+@dataclass(frozen=True)
+class BatchingConfig:
+    max_batch_size: int = 32
+    max_wait_ms: float = 5.0
+    max_queue_size: int = 1024
+
+    def __post_init__(self) -> None:
+        _require(isinstance(self.max_batch_size, int) and self.max_batch_size >= 1,
+                 "batching.max_batch_size must be an integer >= 1")
+        _require(_is_number(self.max_wait_ms) and self.max_wait_ms >= 0, "batching.max_wait_ms must be >= 0")
+        _require(isinstance(self.max_queue_size, int) and self.max_queue_size >= 1,
+                 "batching.max_queue_size must be an integer >= 1")
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    kind: str = 'thread'
+    max_workers: Optional[int] = None
+    max_pending: int = 64
+
+    def __post_init__(self) -> None:
+        _require(self.kind in ('thread', 'process'), "pools.*.kind must be 'thread' or 'process'")
+        _require(self.max_workers is None or (isinstance(self.max_workers, int) and self.max_workers >= 1),
+                 "pools.*.max_workers must be an integer >= 1")
+        _require(isinstance(self.max_pending, int) and self.max_pending >= 1,
+                 "pools.*.max_pending must be an integer >= 1")
+
+
+@dataclass(frozen=True)
+class PoolsConfig:
+    preprocess: PoolConfig = field(default_factory=PoolConfig)
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """
+    Parsed configuration: the raw mapping plus typed, validated sections.
+
+    ``raw`` is shared by every user of the cached configuration and must not be modified.
+    """
+    raw: Dict[str, Any]
+    logs: LogsConfig
+    model: ModelConfig
+    batching: BatchingConfig
+    pools: PoolsConfig
+
+
+def _section(cls: type, data: Any, name: str, renames: Optional[Dict[str, str]] = None) -> Any:
+    data = data or {}
+    _require(isinstance(data, dict), f"{name} must be a mapping")
+    renames = renames or {}
+    known = set(cls.__dataclass_fields__)
+    kwargs = {}
+    for key, value in data.items():
+        attribute = renames.get(key, key)
+        _require(attribute in known, f"unknown key {name}.{key}")
+        kwargs[attribute] = value
+    try:
+        return cls(**kwargs)
+    except TypeError as e:
+        raise ValueError(f"Invalid configuration: {name}: {str(e)}")
+
+
+def _build(raw: Dict[str, Any]) -> AppConfig:
+    _require(isinstance(raw, dict), "the top level must be a mapping")
+    _require('logs' in raw, "missing section logs")
+    pools = raw.get('pools') or {}
+    _require(isinstance(pools, dict), "pools must be a mapping")
+    return AppConfig(
+        raw=raw,
+        logs=_section(LogsConfig, raw['logs'], 'logs', renames={'async': 'async_logging'}),
+        model=_section(ModelConfig, raw.get('model'), 'model'),
+        batching=_section(BatchingConfig, raw.get('batching'), 'batching'),
+        pools=PoolsConfig(preprocess=_section(PoolConfig, pools.get('preprocess'), 'pools.preprocess')),
+    )
+
+
+def merge_config(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deep-merge an overlay into a copy of a configuration: mappings are merged key by
+    key, any other value (including lists and null) replaces the base value.
+    """
+    merged = copy.deepcopy(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _read_yaml(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as file:
+        return yaml.load(file, Loader=_ConfigYamlLoader) or {}
+
+
+def _fingerprint(paths: Sequence[str]) -> Tuple:
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+_cache: Dict[Tuple[str, ...], Tuple[Tuple, AppConfig]] = {}
+_cache_lock = threading.Lock()
+
+
+def clear_cache() -> None:
+    """Forget every parsed configuration, e.g. after editing a file within the same mtime tick."""
+    with _cache_lock:
+        _cache.clear()
+
+
 class ConfigLoader:
-    def __init__(self, config_path):
+    """
+    Load a YAML configuration with optional environment overlays.
+
+    Files are parsed with the safe loader (the libyaml C loader when PyYAML has it)
+    and the result is cached per process, keyed by the files' paths, modification
+    times and sizes: loading an unchanged configuration again costs one ``stat`` per
+    file. Overlays (e.g. ``config/prod/overrides.yml``) are deep-merged over the main
+    file in order; they default to the files listed in ``$CONFIG_OVERLAYS``.
+
+    Args:
+        config_path (str): Main configuration file
+        overlays (Optional[Sequence[str]]): Overlay files, merged in order
+    """
+
+    def __init__(self, config_path: str, overlays: Optional[Sequence[str]] = None) -> None:
         self.config_path = config_path
-        self._add_custom_constructors()
+        if overlays is None:
+            overlays = [path for path in os.getenv(OVERLAYS_ENV, '').split(os.pathsep) if path]
+        self.overlays: List[str] = list(overlays)
+
+    def load(self) -> AppConfig:
+        """
+        Load, merge and validate the configuration, reusing the cached result when no
+        file changed.
 
-    def _add_custom_constructors(self):
-        # Define the custom constructor for !join
-        def join_constructor(loader, node):
-            seq = loader.construct_sequence(node)
-            return ''.join(seq)
+        Returns:
+            AppConfig: The configuration with typed sections
 
-        # Add the custom constructor to the PyYAML loader
-        yaml.add_constructor('!join', join_constructor)
+        Raises:
+            FileNotFoundError: If a configuration file is not found
+            ValueError: If a section is invalid
+        """
+        paths = tuple(os.path.realpath(path) for path in [self.config_path, *self.overlays])
+        fingerprint = _fingerprint(paths)
+        with _cache_lock:
+            cached = _cache.get(paths)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
 
-    def load_config(self):
-        with open(self.config_path, 'r') as file:
-            config = yaml.load(file, Loader=yaml.FullLoader)
+        raw = _read_yaml(paths[0])
+        for path in paths[1:]:
+            raw = merge_config(raw, _read_yaml(path))
+        config = _build(raw)
+        with _cache_lock:
+            _cache[paths] = (fingerprint, config)
+        logger.debug(f"Loaded configuration from {', '.join(paths)}")
         return config
+
+    def load_config(self) -> Dict[str, Any]:
+        """
+        Load the configuration as a plain mapping (see ``load``). The mapping is shared
+        with every other caller and must not be modified.
+        """
+        return self.load().raw
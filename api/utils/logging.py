@@ -1,17 +1,249 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import time
 from datetime import datetime
 from logging.config import dictConfig
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from api.utils.config import ConfigLoader, LogsConfig
+
+# Listener of the active asynchronous logging setup, if any
+_listener: Optional["BatchingQueueListener"] = None
+
+# Only used to render tracebacks on the logging thread's behalf
+_exception_formatter = logging.Formatter()
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'correlation_id'}
+
+
+class SingleLineFormatter(logging.Formatter):
+    """
+    Formatter that escapes newlines in the message as ``<N>`` so that every record
+    stays on one line of the log file.
+    """
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = record.message.replace("\n", "<N>")
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter that renders each record as one JSON object, including the correlation
+    ID and every field passed with ``extra``, so they can be indexed and queried.
+    """
+
+    converter = time.gmtime
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            '@timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'correlation_id': getattr(record, 'correlation_id', None),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno,
+            'process': record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                document[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document['exception'] = record.exc_text
+        if record.stack_info:
+            document['stack_info'] = record.stack_info
+        return json.dumps(document, default=str)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler for a bounded queue that never blocks the caller (unless the
+    policy is 'block').
+
+    Under overload the policy decides what happens to records that do not fit:
+    'drop' discards them; 'sample' additionally keeps only one in ``sample_every``
+    records below WARNING once the queue is half full, so bursts degrade gradually
+    and warnings and errors keep their room; 'block' waits for space.
+
+    Args:
+        queue_ (queue.Queue): Bounded queue read by the listener
+        policy (str): One of 'drop', 'sample' or 'block'
+        sample_every (int): Keep one record in this many when sampling
+    """
+
+    POLICIES = ('drop', 'sample', 'block')
+
+    def __init__(self, queue_: queue.Queue, policy: str = 'drop', sample_every: int = 10) -> None:
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown logging overload policy: {policy}. Expected one of {self.POLICIES}")
+        super().__init__(queue_)
+        self.policy = policy
+        self.sample_every = max(1, sample_every)
+        self.sample_above = queue_.maxsize // 2 if queue_.maxsize > 0 else None
+        self.dropped = 0
+        self._seen = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the message and render any traceback here, where the arguments and
+        # exception are still alive, but leave formatting to the listener thread
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        # Shallow copy, so other handlers still see the original record
+        copied = object.__new__(type(record))
+        copied.__dict__.update(record.__dict__)
+        record = copied
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        if (self.policy == 'sample' and record.levelno < logging.WARNING
+                and self.sample_above is not None and self.queue.qsize() >= self.sample_above):
+            self._seen += 1
+            if self._seen % self.sample_every:
+                self.dropped += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    Queue listener that drains up to ``batch_size`` records at a time and writes
+    them to each stream handler with one lock acquisition and one flush per batch,
+    instead of a write and a flush per record.
+
+    Args:
+        queue_ (queue.Queue): Queue filled by a ``BoundedQueueHandler``
+        queue_handler (BoundedQueueHandler): Handler whose dropped records are reported
+        handlers (logging.Handler): Handlers the records are written to
+        batch_size (int): Maximum number of records written per batch
+    """
+
+    def __init__(self, queue_: queue.Queue, queue_handler: BoundedQueueHandler,
+                 *handlers: logging.Handler, batch_size: int = 256) -> None:
+        super().__init__(queue_, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self.batch_size = batch_size
+        self._reported_drops = 0
+
+    def _monitor(self) -> None:
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            if self._sentinel in batch:
+                stop = True
+                batch = [record for record in batch if record is not self._sentinel]
+            self._report_drops(batch)
+            for handler in self.handlers:
+                self._emit_batch(handler, batch)
+            for _ in range(len(batch) + stop):
+                q.task_done()
+            if stop:
+                break
+
+    def _report_drops(self, batch: List[logging.LogRecord]) -> None:
+        dropped = self.queue_handler.dropped
+        if dropped > self._reported_drops:
+            batch.append(logging.makeLogRecord({
+                'name': 'api.utils.logging',
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': f"Dropped {dropped - self._reported_drops} log records under load",
+                'correlation_id': '-',
+            }))
+            self._reported_drops = dropped
+
+    def _emit_batch(self, handler: logging.Handler, batch: List[logging.LogRecord]) -> None:
+        records = [record for record in batch if record.levelno >= handler.level and handler.filter(record)]
+        if not records:
+            return
+        if not isinstance(handler, logging.StreamHandler):
+            for record in records:
+                handler.handle(record)
+            return
+
+        with handler.lock:
+            for record in records:
+                try:
+                    if isinstance(handler, logging.handlers.BaseRotatingHandler) and handler.shouldRollover(record):
+                        handler.doRollover()
+                    if handler.stream is None:
+                        handler.stream = handler._open()
+                    handler.stream.write(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            try:
+                handler.flush()
+            except Exception:
+                handler.handleError(records[-1])
+
+
+def stop_logging() -> None:
+    """
+    Flush and stop the asynchronous logging thread, if one is running.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _enable_async_logging(logger: logging.Logger, async_config: Dict[str, Any]) -> None:
+    global _listener
+    handlers = list(logger.handlers)
+    log_queue = queue.Queue(maxsize=async_config.get('queue_size', 10000))
+    queue_handler = BoundedQueueHandler(
+        log_queue,
+        policy=async_config.get('policy', 'drop'),
+        sample_every=async_config.get('sample_every', 10),
+    )
+
+    # Filters such as the correlation ID read request context, so they must run in
+    # the caller's thread, at enqueue time
+    for handler in handlers:
+        for log_filter in list(handler.filters):
+            handler.removeFilter(log_filter)
+            if log_filter not in queue_handler.filters:
+                queue_handler.addFilter(log_filter)
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+
+    _listener = BatchingQueueListener(log_queue, queue_handler, *handlers,
+                                      batch_size=async_config.get('batch_size', 256))
+    _listener.start()
 
-from api.utils.config import ConfigLoader
 
 def setup_logger(
         config_path: str,
         logger_name: str,
         log_level: str = 'INFO',
         custom_formatters: Optional[Dict[str, Dict[str, Any]]] = None,
-        custom_filters: Optional[Dict[str, Dict[str, Any]]] = None
+        custom_filters: Optional[Dict[str, Dict[str, Any]]] = None,
+        logs: Optional[LogsConfig] = None,
 ) -> None:
     """
     Set up logging using a structured configuration from a YAML file, including correlation ID support and log rotation.
@@ -19,31 +251,45 @@ def setup_logger(
     Args:
         config_path (str): Path to the configuration YAML file.
         logger_name (str): Name of the logger. Defaults to 'app_logger'.
-        log_level (str): Log level to set for the logger. Defaults to 'INFO'.
+        log_level (str): Log level used when ``logs.level`` is not set. Defaults to 'INFO'.
         custom_formatters (Optional[Dict[str, Dict[str, Any]]]): Custom formatters to add or override.
         custom_filters (Optional[Dict[str, Dict[str, Any]]]): Custom filters to add or override.
+        logs (Optional[LogsConfig]): The ``logs`` section already loaded from ``config_path``,
+            so it is not parsed a second time.
+
+    ``logs.format: json`` writes the log file as JSON lines (see ``JsonFormatter``), and
+    ``logs.elasticsearch.enabled`` adds a handler that ships JSON records to
+    Elasticsearch in bulk (see ``monitoring.elk.shipper``).
+
+    When ``logs.async.enabled`` is set in the configuration, the handlers are moved
+    behind a bounded queue and written by a background thread in batches, so logging
+    on the request path costs a queue insertion. See ``BoundedQueueHandler`` for the
+    overload policies.
 
     Raises:
         FileNotFoundError: If the config file is not found.
-        KeyError: If required configuration keys are missing.
+        ValueError: If the logs section is missing or invalid.
         OSError: If there's an error creating the log directory.
 
     Usage:
-        setup_logger(logger_name='my_project')
+        setup_logger('config/dev/config.yml', 'my_project')
         logger = logging.getLogger('my_project')
         logger.info("Application started with enhanced logging.")
     """
     try:
+        # Stop the previous asynchronous setup so its records are flushed first
+        stop_logging()
+
         # Load configuration
-        config_loader = ConfigLoader(config_path)
-        config = config_loader.load_config()
+        if logs is None:
+            logs = ConfigLoader(config_path).load().logs
+        level = (logs.level or log_level).upper()
 
-        log_dir = config['logs']['dir']
-        os.makedirs(log_dir, exist_ok=True)
+        os.makedirs(logs.dir, exist_ok=True)
 
         # Set log file name with a timestamp for uniqueness
         timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        log_file_name = os.path.join(log_dir, f"{config['logs']['fname']}-{timestamp}.log")
+        log_file_name = os.path.join(logs.dir, f"{logs.fname}-{timestamp}.log")
 
         # Base logging configuration
         log_config = {
@@ -58,10 +304,13 @@ def setup_logger(
             },
             'formatters': {
                 'console': {
-                    'class': 'logging.Formatter',
+                    'class': 'api.utils.logging.SingleLineFormatter',
                     'format': '%(levelname)s:\t%(asctime)s %(name)s:%(lineno)d [%(correlation_id)s] [%(filename)s:%(lineno)s - %(funcName)s() ] %(message)s',
                     "datefmt": "%Y-%m-%d %H:%M:%S"
                 },
+                'json': {
+                    '()': 'api.utils.logging.JsonFormatter',
+                },
             },
             'handlers': {
                 'console': {
@@ -71,24 +320,34 @@ def setup_logger(
                 },
                 'file': {
                     'class': 'logging.handlers.TimedRotatingFileHandler',
-                    'level': config['logs'].get('level', log_level).upper(),
-                    'formatter': 'console',
+                    'level': level,
+                    'formatter': 'json' if logs.format == 'json' else 'console',
                     'filename': log_file_name,
-                    'when': config['logs'].get('when', 'midnight'),
-                    'interval': config['logs'].get('interval', 1),
-                    'backupCount': config['logs'].get('backup_count', 15),
+                    'when': logs.when,
+                    'interval': logs.interval,
+                    'backupCount': logs.backup_count,
                     'filters': ['correlation_id'],
                 },
             },
             'loggers': {
                 logger_name: {
                     'handlers': ['file', 'console'],
-                    'level': config['logs'].get('level', log_level).upper(),
+                    'level': level,
                     'propagate': False
                 },
             },
         }
 
+        if logs.elasticsearch.get('enabled', False):
+            log_config['handlers']['elasticsearch'] = {
+                'class': 'monitoring.elk.shipper.ElasticsearchHandler',
+                'level': level,
+                'formatter': 'json',
+                'filters': ['correlation_id'],
+                **{key: value for key, value in logs.elasticsearch.items() if key != 'enabled'},
+            }
+            log_config['loggers'][logger_name]['handlers'].append('elasticsearch')
+
         # Add custom formatters and filters if provided
         if custom_formatters:
             log_config['formatters'].update(custom_formatters)
@@ -97,27 +356,21 @@ def setup_logger(
 
         dictConfig(log_config)
 
-        # Override the log record factory for customized log processing
-        old_factory = logging.getLogRecordFactory()
-
-        def record_factory(*args, **kwargs):
-            record = old_factory(*args, **kwargs)
-            record.msg = str(record.msg).replace("\n", "<N>")
-            return record
-
-        logging.setLogRecordFactory(record_factory)
+        if logs.async_logging.get('enabled', False):
+            _enable_async_logging(logging.getLogger(logger_name), logs.async_logging)
 
     except FileNotFoundError:
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
-    except KeyError as e:
-        raise KeyError(f"Missing required configuration key: {str(e)}")
     except OSError as e:
         raise OSError(f"Error creating log directory: {str(e)}")
 
 
+atexit.register(stop_logging)
+
+
 # Example usage
 if __name__ == "__main__":
-    setup_logger('py-log-fname', 'config/dev/config.yml', level='DEBUG')
+    setup_logger('config/dev/config.yml', 'example_logger', log_level='DEBUG')
     logger = logging.getLogger('example_logger')
     logger.info("Logging setup complete.")
     logger.debug("This is a debug message.")
@@ -1,26 +1,171 @@
-import time
+import itertools
+import math
 from collections import defaultdict
 import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Latency histogram buckets: log-spaced upper bounds from 10us to 100s, 20 per decade
+# (each bucket spans about 12%, so interpolated quantiles are within a few percent)
+MIN_LATENCY = 1e-5
+BUCKETS_PER_DECADE = 20
+NUM_BUCKETS = 7 * BUCKETS_PER_DECADE + 1
+BUCKET_BOUNDS = [MIN_LATENCY * 10 ** (i / BUCKETS_PER_DECADE) for i in range(NUM_BUCKETS)]
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99, "p999": 0.999}
+
+_LOG_MIN = math.log10(MIN_LATENCY)
+NUM_SHARDS = 16
+
+
+def bucket_index(latency: float) -> int:
+    """
+    Index of the histogram bucket holding ``latency``: the first bucket whose upper
+    bound is at least ``latency``, computed with a logarithm instead of a search.
+    """
+    if latency <= MIN_LATENCY:
+        return 0
+    index = math.ceil((math.log10(latency) - _LOG_MIN) * BUCKETS_PER_DECADE - 1e-9)
+    return min(index, NUM_BUCKETS)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram. Recording is O(1) and memory is constant; the
+    last bucket counts latencies above the largest bound.
+    """
+
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (NUM_BUCKETS + 1)
+
+    def record(self, latency: float) -> None:
+        self.count += 1
+        self.total += latency
+        self.buckets[bucket_index(latency)] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "total": self.total, "buckets": self.buckets}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        histogram = cls()
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.buckets = list(data["buckets"])
+        return histogram
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile, interpolating geometrically within the bucket it falls in.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.buckets):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if i == 0:
+                    return BUCKET_BOUNDS[0]
+                if i == NUM_BUCKETS:
+                    return BUCKET_BOUNDS[-1]
+                fraction = (rank - cumulative) / bucket_count
+                lower, upper = BUCKET_BOUNDS[i - 1], BUCKET_BOUNDS[i]
+                return lower * (upper / lower) ** fraction
+            cumulative += bucket_count
+        return BUCKET_BOUNDS[-1]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "average": self.total / self.count if self.count else 0,
+            **{name: self.quantile(q) for name, q in QUANTILES.items()},
+        }
+
+
+class _Shard:
+    __slots__ = ("lock", "series")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.series: Dict[Tuple[str, object], Histogram] = defaultdict(Histogram)
+
 
 class Metrics:
+    """
+    Prediction counts and latency histograms, broken down by endpoint and class.
+
+    Each recording thread is given one of ``NUM_SHARDS`` independently locked shards
+    round-robin on its first recording, so up to ``NUM_SHARDS`` concurrent recorders
+    never contend; ``get_metrics`` merges the shards. Memory is bounded by the number
+    of (endpoint, class) pairs seen.
+    """
+
     def __init__(self):
-        self.predictions = defaultdict(int)
-        self.latencies = []
-        self.lock = threading.Lock()
+        self.shards: List[_Shard] = [_Shard() for _ in range(NUM_SHARDS)]
+        # Not thread ids: those are aligned addresses and would all map to one shard
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = self.shards[next(self._next_shard) % NUM_SHARDS]
+        return shard
+
+    def record_prediction(self, class_name, latency, endpoint="predict"):
+        shard = self._shard()
+        with shard.lock:
+            shard.series[(endpoint, class_name)].record(latency)
+
+    def _collect(self) -> Dict[Tuple[str, object], Histogram]:
+        merged: Dict[Tuple[str, object], Histogram] = defaultdict(Histogram)
+        for shard in self.shards:
+            with shard.lock:
+                for key, histogram in shard.series.items():
+                    merged[key].merge(histogram)
+        return merged
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        JSON-serializable copy of every series, for aggregation across worker processes.
+        """
+        return [{"endpoint": endpoint, "class": class_name, **histogram.to_dict()}
+                for (endpoint, class_name), histogram in self._collect().items()]
+
+    @staticmethod
+    def merge_snapshots(snapshots: List[List[Dict[str, Any]]]) -> Dict[Tuple[str, object], Histogram]:
+        merged: Dict[Tuple[str, object], Histogram] = defaultdict(Histogram)
+        for snapshot in snapshots:
+            for series in snapshot:
+                merged[(series["endpoint"], series["class"])].merge(Histogram.from_dict(series))
+        return merged
+
+    def get_metrics(self, snapshots: Optional[List[List[Dict[str, Any]]]] = None):
+        series = self.merge_snapshots(snapshots) if snapshots is not None else self._collect()
+        overall = Histogram()
+        by_endpoint: Dict[str, Histogram] = defaultdict(Histogram)
+        by_class: Dict[object, Histogram] = defaultdict(Histogram)
+        for (endpoint, class_name), histogram in series.items():
+            overall.merge(histogram)
+            by_endpoint[endpoint].merge(histogram)
+            by_class[class_name].merge(histogram)
+
+        return {
+            "total_predictions": overall.count,
+            "predictions_by_class": {class_name: histogram.count for class_name, histogram in by_class.items()},
+            "average_prediction_latency": overall.total / overall.count if overall.count else 0,
+            "prediction_latency": overall.summary(),
+            "prediction_latency_by_endpoint": {endpoint: histogram.summary()
+                                               for endpoint, histogram in by_endpoint.items()},
+            "prediction_latency_by_class": {class_name: histogram.summary()
+                                            for class_name, histogram in by_class.items()},
+        }
 
-    def record_prediction(self, class_name, latency):
-        with self.lock:
-            self.predictions[class_name] += 1
-            self.latencies.append(latency)
-
-    def get_metrics(self):
-        with self.lock:
-            total_predictions = sum(self.predictions.values())
-            avg_latency = sum(self.latencies) / len(self.latencies) if self.latencies else 0
-            return {
-                "total_predictions": total_predictions,
-                "predictions_by_class": dict(self.predictions),
-                "average_prediction_latency": avg_latency,
-            }
-
-metrics = Metrics()
\ No newline at end of file
+metrics = Metrics()
@@ -0,0 +1,354 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.utils.metrics import BUCKET_BOUNDS, Metrics
+
+logger = logging.getLogger('ml_classifier')
+
+# Every fifth latency bucket bound (4 per decade) is exposed to Prometheus
+PROMETHEUS_BUCKET_STEP = 5
+# Counters of exited workers, merged into one snapshot
+RETIRED_FILE = "retired.json"
+# A snapshot not rewritten for this many intervals belongs to a worker that is gone
+STALE_INTERVALS = 3
+
+
+class MetricsExporter:
+    """
+    Aggregate serving metrics across worker processes and render them for Prometheus.
+
+    Each worker writes a JSON snapshot of its metrics and gauges to
+    ``<directory>/<pid>.json`` every ``interval`` seconds (and right before it serves
+    a scrape), with an atomic rename. A scrape, whichever worker it lands on, merges
+    every snapshot in the directory, so it costs a few small file reads regardless of
+    load and never touches the other workers' locks.
+
+    Only live workers report gauges (queue depth, pending tasks, model version). A
+    worker has exited when its snapshot was not rewritten for ``STALE_INTERVALS``
+    intervals, or when its process is gone on this host. Its counters are then folded
+    into ``retired.json`` and its snapshot is removed, so counters do not go backwards
+    when a worker is recycled. A worker shutting down cleanly retires itself with
+    ``retire``. Without a directory only the local process is reported.
+
+    Args:
+        metrics (Metrics): This process's prediction metrics
+        collectors (Dict[str, Callable[[], Dict[str, Any]]]): Named functions returning
+            this process's gauges, e.g. batcher, worker pool and model registry stats
+        directory (Optional[str]): Directory shared by all workers of one server
+        interval (float): Seconds between snapshot writes
+    """
+
+    def __init__(
+            self,
+            metrics: Metrics,
+            collectors: Dict[str, Callable[[], Dict[str, Any]]],
+            directory: Optional[str] = None,
+            interval: float = 5.0,
+    ) -> None:
+        self.metrics = metrics
+        self.collectors = collectors
+        self.directory = directory
+        self.interval = interval
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "time": time.time(),
+            "metrics": self.metrics.snapshot(),
+            **{name: collect() for name, collect in self.collectors.items()},
+        }
+
+    def write_snapshot(self) -> Dict[str, Any]:
+        snapshot = self.snapshot()
+        if self.directory:
+            path = os.path.join(self.directory, f"{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        return snapshot
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """
+        Return the latest snapshot of every live worker, this one freshly taken, plus
+        the retired counters of exited workers (marked ``"retired": True``), if any.
+
+        Returns:
+            List[Dict[str, Any]]: One snapshot per worker process
+        """
+        own = self.write_snapshot()
+        if not self.directory:
+            return [own]
+
+        snapshots = [own]
+        dead: List[Tuple[str, Dict[str, Any]]] = []
+        now = time.time()
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            name = os.path.basename(path)
+            if name == f"{own['pid']}.json" or not name[:-len(".json")].isdigit():
+                continue
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {path}: {str(e)}")
+                continue
+            if self._is_live(snapshot, now):
+                snapshots.append(snapshot)
+            else:
+                dead.append((path, snapshot))
+
+        retired = self._retire(dead) if dead else self._read_retired()
+        if retired is not None:
+            snapshots.append(retired)
+        return snapshots
+
+    def retire(self) -> None:
+        """
+        Fold this worker's final counters into the retired totals and remove its
+        snapshot, e.g. on shutdown.
+        """
+        if not self.directory:
+            return
+        snapshot = self.write_snapshot()
+        self._retire([(os.path.join(self.directory, f"{os.getpid()}.json"), snapshot)])
+
+    def _is_live(self, snapshot: Dict[str, Any], now: float) -> bool:
+        if now - snapshot.get("time", 0) > STALE_INTERVALS * self.interval:
+            return False
+        if snapshot.get("host") != socket.gethostname():
+            # Process ids of other hosts cannot be checked from here
+            return True
+        try:
+            os.kill(snapshot["pid"], 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _read_retired(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, RETIRED_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable retired metrics: {str(e)}")
+            return None
+
+    def _retire(self, dead: List[Tuple[str, Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        # Workers retire under one file lock, so a snapshot is never folded in twice
+        with open(os.path.join(self.directory, f".{RETIRED_FILE}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            retired = self._read_retired()
+            paths = []
+            for path, snapshot in dead:
+                if os.path.exists(path):
+                    retired = merge_retired(retired, snapshot)
+                    paths.append(path)
+            if paths:
+                path = os.path.join(self.directory, RETIRED_FILE)
+                with open(f"{path}.tmp", "w") as f:
+                    json.dump(retired, f)
+                os.replace(f"{path}.tmp", path)
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                logger.info(f"Retired metrics of {len(paths)} exited worker(s)")
+        return retired
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.error(f"Failed to write metrics snapshot: {str(e)}")
+
+    def start(self) -> None:
+        if self.directory and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        JSON metrics summed over all workers, with per-worker gauges listed by pid.
+        """
+        snapshots = self.collect()
+        result = self.metrics.get_metrics([snapshot["metrics"] for snapshot in snapshots])
+        live = [snapshot for snapshot in snapshots if not snapshot.get("retired")]
+        result["workers"] = len(live)
+        for name in self.collectors:
+            result[name] = {snapshot["pid"]: snapshot.get(name) for snapshot in live} \
+                if len(live) > 1 else live[0].get(name)
+        return result
+
+    def render_prometheus(self) -> str:
+        """
+        Render the aggregated metrics in the Prometheus text exposition format.
+        """
+        return render_prometheus(self.collect())
+
+
+def merge_retired(retired: Optional[Dict[str, Any]], snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add the counters of an exited worker's snapshot to the retired totals. Gauges
+    (queue depths, pending tasks, model version, startup times) are dropped.
+
+    Args:
+        retired (Optional[Dict[str, Any]]): Current retired totals, if any
+        snapshot (Dict[str, Any]): Last snapshot of the exited worker
+
+    Returns:
+        Dict[str, Any]: New retired totals, shaped like a snapshot with ``"retired": True``
+    """
+    retired = retired or {"pid": "retired", "retired": True, "workers": 0, "metrics": []}
+    merged = {"pid": "retired", "retired": True, "workers": retired["workers"] + 1, "time": time.time()}
+
+    series = Metrics.merge_snapshots([retired["metrics"], snapshot.get("metrics", [])])
+    merged["metrics"] = [{"endpoint": endpoint, "class": class_name, **histogram.to_dict()}
+                         for (endpoint, class_name), histogram in series.items()]
+
+    batching = [stats for stats in (retired.get("batching"), snapshot.get("batching")) if stats]
+    if batching:
+        distribution: Dict[str, int] = {}
+        for stats in batching:
+            for size, count in stats["batch_size_distribution"].items():
+                distribution[str(size)] = distribution.get(str(size), 0) + count
+        batches = sum(stats["batches"] for stats in batching)
+        columns = sum(stats["average_batch_size"] * stats["batches"] for stats in batching)
+        merged["batching"] = {
+            "batches": batches,
+            "requests": sum(stats["requests"] for stats in batching),
+            "rejected": sum(stats["rejected"] for stats in batching),
+            "average_batch_size": columns / batches if batches else 0,
+            "batch_size_distribution": distribution,
+        }
+
+    for name, fields in (("preprocess_pool", ("rejected",)), ("prediction_cache", ("hits", "misses", "evictions"))):
+        parts = [stats for stats in (retired.get(name), snapshot.get(name)) if stats]
+        if parts:
+            merged[name] = {field: sum(stats.get(field, 0) for stats in parts) for field in fields}
+    return merged
+
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ""
+    # "class" is a Python keyword, so it is passed as class_
+    labels = {name.rstrip("_"): value for name, value in labels.items()}
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def render_prometheus(snapshots: List[Dict[str, Any]], namespace: str = "ml_classifier") -> str:
+    """
+    Render worker snapshots in the Prometheus text exposition format.
+
+    Counters and histograms are summed over workers (including retired ones); gauges
+    are reported per live worker with a ``worker`` label.
+
+    Args:
+        snapshots (List[Dict[str, Any]]): Snapshots from ``MetricsExporter.collect``
+        namespace (str): Metric name prefix
+
+    Returns:
+        str: Exposition text
+    """
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, help_text: str) -> str:
+        full_name = f"{namespace}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        return full_name
+
+    live = [snapshot for snapshot in snapshots if not snapshot.get("retired")]
+    series = Metrics.merge_snapshots([snapshot["metrics"] for snapshot in snapshots])
+
+    name = metric("predictions_total", "counter", "Predictions served.")
+    for (endpoint, class_name), histogram in sorted(series.items(), key=lambda item: str(item[0])):
+        lines.append(f"{name}{_labels(endpoint=endpoint, class_=class_name)} {histogram.count}")
+
+    name = metric("prediction_latency_seconds", "histogram", "Prediction latency.")
+    for (endpoint, class_name), histogram in sorted(series.items(), key=lambda item: str(item[0])):
+        cumulative = 0
+        for i, bucket_count in enumerate(histogram.buckets[:len(BUCKET_BOUNDS)]):
+            cumulative += bucket_count
+            if i % PROMETHEUS_BUCKET_STEP == 0 or i == len(BUCKET_BOUNDS) - 1:
+                labels = _labels(endpoint=endpoint, class_=class_name, le=f"{BUCKET_BOUNDS[i]:.6g}")
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(endpoint=endpoint, class_=class_name, le='+Inf')} {histogram.count}")
+        labels = _labels(endpoint=endpoint, class_=class_name)
+        lines.append(f"{name}_sum{labels} {histogram.total}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
+
+    batching = [snapshot["batching"] for snapshot in snapshots if snapshot.get("batching")]
+    if batching:
+        buckets: Dict[int, int] = {}
+        for stats in batching:
+            for size, count in stats["batch_size_distribution"].items():
+                buckets[int(size)] = buckets.get(int(size), 0) + count
+        name = metric("batch_size", "histogram", "Columns per micro-batched forward pass.")
+        cumulative = 0
+        for size in sorted(buckets):
+            cumulative += buckets[size]
+            lines.append(f"{name}_bucket{_labels(le=size)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(le='+Inf')} {cumulative}")
+        lines.append(f"{name}_sum {sum(stats['average_batch_size'] * stats['batches'] for stats in batching)}")
+        lines.append(f"{name}_count {sum(stats['batches'] for stats in batching)}")
+
+        name = metric("batch_requests_rejected_total", "counter", "Requests rejected by a full batching queue.")
+        lines.append(f"{name} {sum(stats['rejected'] for stats in batching)}")
+
+        name = metric("batch_queue_depth", "gauge", "Requests waiting to be batched.")
+        for snapshot in live:
+            if snapshot.get("batching"):
+                lines.append(f"{name}{_labels(worker=snapshot['pid'])} {snapshot['batching']['queue_depth']}")
+
+    pools = [snapshot for snapshot in snapshots if snapshot.get("preprocess_pool")]
+    if pools:
+        name = metric("preprocess_pending", "gauge", "Preprocessing tasks queued or running.")
+        for snapshot in pools:
+            if snapshot.get("retired"):
+                continue
+            lines.append(f"{name}{_labels(worker=snapshot['pid'])} {snapshot['preprocess_pool']['pending']}")
+        name = metric("preprocess_rejected_total", "counter", "Preprocessing tasks rejected by a full pool.")
+        lines.append(f"{name} {sum(snapshot['preprocess_pool']['rejected'] for snapshot in pools)}")
+
+    caches = [snapshot["prediction_cache"] for snapshot in snapshots if snapshot.get("prediction_cache")]
+    if caches:
+        for field in ("hits", "misses", "evictions"):
+            name = metric(f"prediction_cache_{field}_total", "counter", f"Prediction cache {field}.")
+            lines.append(f"{name} {sum(stats[field] for stats in caches)}")
+
+    models = [snapshot for snapshot in live if snapshot.get("model")]
+    if models:
+        name = metric("model_info", "gauge", "Active model version.")
+        for snapshot in models:
+            lines.append(f"{name}{_labels(worker=snapshot['pid'], version=snapshot['model']['active_version'])} 1")
+
+    return "\n".join(lines) + "\n"
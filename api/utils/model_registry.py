@@ -0,0 +1,208 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.models.artifact import HEADER_FILE, link_artifact
+
+logger = logging.getLogger('ml_classifier')
+
+
+class ModelRegistry:
+    """
+    Holds the active model and hot-swaps it when the model path changes on disk.
+
+    A background thread polls the model path (following symlinks, so repointing
+    ``model/latest`` at a new artifact directory is picked up). A changed model is
+    loaded and validated on that thread, then swapped in with a single reference
+    assignment: requests already running keep the model object they started with, and
+    new requests see the new one, so nothing blocks and no request is dropped.
+
+    Rollback is done on disk: the model path symlink is pointed back at the previously
+    active artifact directory (see ``src.models.artifact.publish_artifact``), so every
+    worker watching the same path converges on the same version.
+
+    Args:
+        path (str): Model artifact directory or pickle file
+        loader (Callable[[str], Any]): Loads a model from a path
+        poll_interval (float): Seconds between checks of the model path
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Any], poll_interval: float = 5.0) -> None:
+        self.path = path
+        self.loader = loader
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        # Serializes loads from the watcher thread and rollbacks
+        self._load_lock = threading.Lock()
+        self._active: Optional[Tuple[Any, str]] = None
+        self._previous: Optional[Tuple[Any, str]] = None
+        self._fingerprint: Optional[Tuple] = None
+        # Resolved paths the active and previous models were loaded from
+        self._active_path: Optional[str] = None
+        self._previous_path: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._reloads = 0
+        self._rollbacks = 0
+        self._last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> Any:
+        """The active model. Read once per request or batch and use that reference."""
+        return self._active[0]
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._active[1] if self._active else None
+
+    def snapshot(self) -> Tuple[Any, Optional[str]]:
+        """
+        The active model and its version, read together.
+
+        Use the model of one snapshot for a prediction and its version for anything
+        keyed on that prediction: reading ``current`` and ``version`` separately can
+        straddle a swap.
+        """
+        active = self._active
+        return active if active is not None else (None, None)
+
+    def _get_fingerprint(self) -> Tuple:
+        real_path = os.path.realpath(self.path)
+        target = os.path.join(real_path, HEADER_FILE) if os.path.isdir(real_path) else real_path
+        stat = os.stat(target)
+        return real_path, stat.st_mtime_ns, stat.st_size
+
+    def _validate(self, model: Any) -> None:
+        if model.w is None or model.w.ndim != 2 or model.w.shape[1] != 1:
+            raise ValueError("Model has no weight vector")
+        if self._active is not None and model.w.shape != self.current.w.shape:
+            raise ValueError(f"Model weight shape {model.w.shape} does not match active {self.current.w.shape}")
+        # Probe the uint8 serving path, which also folds the weights before the swap
+        probe = model.predict_uint8(np.zeros((model.w.shape[0], 1), dtype=np.uint8))
+        if probe.shape != (1, 1) or not np.isfinite(probe).all():
+            raise ValueError("Model produced an invalid prediction on a probe input")
+
+    def _version_of(self, model: Any, fingerprint: Tuple) -> str:
+        artifact = getattr(model, 'artifact', None)
+        if artifact:
+            return artifact['version']
+        return f"{os.path.basename(fingerprint[0])}@{fingerprint[1] // 1_000_000_000}"
+
+    def load(self) -> bool:
+        """
+        Load the model at ``path`` if it changed since the last load, and swap it in.
+
+        Returns:
+            bool: True if a new model was swapped in
+
+        Raises:
+            Exception: If the initial load fails. Later failures are logged and the
+                active model keeps serving.
+        """
+        with self._load_lock:
+            return self._load()
+
+    def _load(self, rollback: bool = False) -> bool:
+        fingerprint = None
+        try:
+            fingerprint = self._get_fingerprint()
+            if fingerprint == self._fingerprint:
+                return False
+            model = self.loader(self.path)
+            self._validate(model)
+        except Exception as e:
+            if self._active is None:
+                raise
+            self._last_error = str(e)
+            logger.error(f"Model reload failed, keeping version {self.version}: {str(e)}")
+            if fingerprint is not None:
+                # Do not retry the same broken files on every poll
+                self._fingerprint = fingerprint
+            return False
+
+        with self._lock:
+            self._previous, self._previous_path = self._active, self._active_path
+            self._active, self._active_path = (model, self._version_of(model, fingerprint)), fingerprint[0]
+            self._fingerprint = fingerprint
+            self._loaded_at = time.time()
+            self._last_error = None
+            if rollback:
+                self._rollbacks += 1
+            elif self._previous is not None:
+                self._reloads += 1
+        logger.info(f"Model version {self.version} active")
+        return True
+
+    def rollback(self) -> str:
+        """
+        Point the model path back at the previously active artifact and load it.
+
+        The model path must be a symlink to versioned artifact directories. The other
+        workers watching it load the same version on their next poll.
+
+        Returns:
+            str: The version that is now active
+
+        Raises:
+            RuntimeError: If there is no previous version, the model path is not a
+                symlink, or the previous artifact cannot be loaded
+        """
+        with self._load_lock:
+            previous_path, active_path = self._previous_path, self._active_path
+            if previous_path is None or previous_path == active_path:
+                raise RuntimeError("No previous model version to roll back to")
+            if not os.path.islink(self.path):
+                raise RuntimeError(f"Rollback needs {self.path} to be a symlink to versioned artifact directories")
+
+            fingerprint = self._fingerprint
+            link_artifact(self.path, previous_path)
+            if not self._load(rollback=True):
+                error = self._last_error
+                # Point the link back at the model that keeps serving
+                link_artifact(self.path, active_path)
+                self._fingerprint = fingerprint
+                raise RuntimeError(f"Rollback to {previous_path} failed: {error}")
+        logger.warning(f"Rolled back to model version {self.version}")
+        return self.version
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Error while checking for a new model: {str(e)}")
+
+    def start(self) -> None:
+        """Load the model if needed and start watching the model path."""
+        if self._active is None:
+            self.load()
+        if self.poll_interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active_version": self.version,
+                "threshold": getattr(self.current, 'threshold', 0.5) if self._active else None,
+                "weights_dtype": str(self.current.w.dtype) if self._active else None,
+                "previous_version": self._previous[1] if self._previous else None,
+                "path": self.path,
+                "loaded_at": self._loaded_at,
+                "reloads": self._reloads,
+                "rollbacks": self._rollbacks,
+                "last_error": self._last_error,
+            }
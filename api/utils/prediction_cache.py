@@ -0,0 +1,117 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class PredictionCache:
+    """
+    Content-addressed LRU cache of predictions, with an optional time-to-live.
+
+    Entries are keyed by a BLAKE2b digest of the raw upload bytes together with the
+    model version and decision threshold, so a duplicate upload is answered without
+    decoding, preprocessing or predicting, and neither a model reload nor a threshold
+    change (which keeps the version) serves decisions from the old model. Memory is
+    bounded by ``max_entries``: each entry holds a 16-byte digest, the model key and
+    the prediction.
+
+    Args:
+        max_entries (int): Maximum number of cached predictions. 0 disables the cache.
+        ttl_s (Optional[float]): Seconds an entry stays valid. None keeps entries until evicted.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_s: Optional[float] = None) -> None:
+        if max_entries < 0:
+            raise ValueError("max_entries must not be negative")
+
+        self.max_entries = max_entries
+        self.ttl = ttl_s
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[bytes, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(data: bytes, model_key: Hashable) -> Tuple[bytes, Hashable]:
+        """
+        Build the cache key for an upload.
+
+        Args:
+            data (bytes): Raw upload bytes
+            model_key (Hashable): Everything the decision depends on besides the
+                upload, e.g. ``(version, threshold)`` of the model that makes it
+
+        Returns:
+            Tuple[bytes, Hashable]: The cache key
+        """
+        return hashlib.blake2b(data, digest_size=16).digest(), model_key
+
+    def get(self, key: Tuple[bytes, Hashable]) -> Optional[Any]:
+        """
+        Look up a prediction and mark it as recently used.
+
+        Args:
+            key (Tuple[bytes, Hashable]): Key from ``make_key``
+
+        Returns:
+            Optional[Any]: The cached prediction, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Tuple[bytes, Hashable], value: Any) -> None:
+        """
+        Store a prediction, evicting the least recently used entries when full.
+
+        Args:
+            key (Tuple[bytes, Hashable]): Key from ``make_key``
+            value (Any): Prediction to cache
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
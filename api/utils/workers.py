@@ -0,0 +1,84 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from api.utils.batching import QueueFullError
+
+
+class WorkerPool:
+    """
+    Bounded thread or process pool for running CPU-bound request work off the event loop.
+
+    At most ``max_pending`` calls may be running or queued at once; further calls are
+    rejected immediately with ``QueueFullError`` so the API can answer 503 instead of
+    building an unbounded backlog.
+
+    Args:
+        kind (str): 'thread' or 'process'
+        max_workers (Optional[int]): Number of workers. Defaults to the CPU count.
+        max_pending (int): Maximum number of in-flight calls
+    """
+
+    def __init__(self, kind: str = 'thread', max_workers: Optional[int] = None, max_pending: int = 64) -> None:
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='worker-pool')
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` in the pool and await its result.
+
+        Raises:
+            QueueFullError: If ``max_pending`` calls are already in flight
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise QueueFullError(f"Worker pool is saturated ({self.max_pending} pending tasks)")
+            self._pending += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -1,29 +1,16 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from api.models.schemas import PredictRequest, PredictResponse, ErrorResponse
-from src.models.logistic_regression_nn import LogisticRegression
-from src.data.data_processing import preprocess_data
-from api.utils.logging import setup_logger
+from src.data.data_processing import preprocess_image_bytes
+from api import runtime
+from api.utils.admin import require_admin
+from api.runtime import logger
+from api.utils.batching import QueueFullError
 from api.utils.metrics import metrics
-import numpy as np
-import os
 import time
-import logging
 
 router = APIRouter()
 
-# Setup logger
-config_path = os.getenv('CONFIG_PATH', 'config/dev/config.yml')
-setup_logger('ml_classifier', config_path)
-logger = logging.getLogger('ml_classifier')
-
-# Load model
-try:
-    model = LogisticRegression.load(os.getenv('MODEL_PATH', 'trained_model.pkl'))
-except Exception as e:
-    logger.error(f"Failed to load model: {str(e)}")
-    raise
-
 @router.get("/docs")
 async def get_docs():
     """
@@ -31,17 +18,24 @@ async def get_docs():
     """
     return RedirectResponse(url="http://localhost:8080")
 
-@router.post("/predict", response_model=PredictResponse, responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
+@router.post("/predict", response_model=PredictResponse, responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
 async def predict(image: UploadFile = File(...)):
     try:
         start_time = time.time()
         contents = await image.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = preprocess_data(nparr)
-        prediction = model.predict(img)
+        # Predict with the model the cache key names, even if a new one is swapped in meanwhile.
+        # The threshold is part of the key: changing it rewrites the header but keeps the version
+        model, version = runtime.registry.snapshot()
+        cache_key = runtime.prediction_cache.make_key(contents, (version, model.threshold))
+        prediction_class = runtime.prediction_cache.get(cache_key)
+        cached = prediction_class is not None
+        if not cached:
+            img = await runtime.preprocess_pool.run(preprocess_image_bytes, contents, normalize=False)
+            prediction = await runtime.batcher.submit(img, model)
+            prediction_class = int(prediction[0, 0])
+            runtime.prediction_cache.put(cache_key, prediction_class)
 
         latency = time.time() - start_time
-        prediction_class = int(prediction[0, 0])
 
         metrics.record_prediction(prediction_class, latency)
 
@@ -49,9 +43,13 @@ async def predict(image: UploadFile = File(...)):
             "prediction_class": prediction_class,
             "prediction_latency": latency,
             "image_filename": image.filename,
+            "cached": cached,
         })
 
         return PredictResponse(prediction=prediction_class)
+    except QueueFullError as qe:
+        logger.warning(f"Request rejected: {str(qe)}", extra={"image_filename": image.filename})
+        raise HTTPException(status_code=503, detail="Server is busy, please retry")
     except ValueError as ve:
         logger.error(f"Invalid input: {str(ve)}", extra={"image_filename": image.filename})
         raise HTTPException(status_code=400, detail=str(ve))
@@ -61,7 +59,11 @@ async def predict(image: UploadFile = File(...)):
 
 @router.get("/metrics")
 async def get_metrics():
-    return metrics.get_metrics()
+    return runtime.metrics_exporter.get_metrics()
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    return PlainTextResponse(runtime.metrics_exporter.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 @router.get("/healthz")
 async def health_check():
@@ -70,4 +72,17 @@ async def health_check():
 @router.get("/readyz")
 async def readiness_check():
     # Add any necessary checks (e.g., database connection)
-    return {"status": "ready"}
\ No newline at end of file
+    registry = runtime.registry
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Model is not loaded yet")
+    model, version = registry.snapshot()
+    return {"status": "ready", "model_version": version, "threshold": model.threshold}
+
+@router.post("/model/rollback", dependencies=[Depends(require_admin)])
+def rollback_model():
+    # Repoints the shared model link, so every worker switches on its next poll. Runs in the
+    # threadpool: it loads the previous model from disk
+    try:
+        return {"model_version": runtime.registry.rollback()}
+    except RuntimeError as re:
+        raise HTTPException(status_code=409, detail=str(re))
\ No newline at end of file
@@ -0,0 +1,136 @@
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from src.data.data_processing import IMAGE_EXTENSIONS, iter_image_archive, preprocess_image_batch
+from api import runtime
+from api.runtime import logger
+from api.utils.batching import QueueFullError
+from api.utils.metrics import metrics
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import json
+import time
+
+router = APIRouter()
+
+# Used when batch_predict is missing from the configuration
+DEFAULT_CHUNK_SIZE = 256
+MAX_CHUNK_SIZE = 1024
+
+
+async def iter_uploaded_images(upload: UploadFile) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Yield (name, bytes) for an uploaded image, or for every image in an uploaded
+    zip/tar archive, reading archive members lazily.
+    """
+    filename = upload.filename or ""
+    if filename.lower().endswith(IMAGE_EXTENSIONS):
+        yield filename, await upload.read()
+    else:
+        async for name, data in iterate_in_threadpool(iter_image_archive(upload.file, filename)):
+            yield f"{filename}/{name}", data
+
+
+async def predict_chunk(chunk: List[Tuple[str, bytes]]) -> AsyncIterator[str]:
+    """
+    Decode one chunk of images into a stacked array, run a single forward pass and
+    yield one NDJSON line per image. Images already in the prediction cache skip
+    decoding and the forward pass.
+    """
+    names = [name for name, _ in chunk]
+    start_time = time.time()
+    prediction_cache = runtime.prediction_cache
+    # One snapshot for keying and predicting the whole chunk
+    model, version = runtime.registry.snapshot()
+    model_key = (version, model.threshold)
+    keys = [prediction_cache.make_key(data, model_key) for _, data in chunk]
+    results: Dict[int, int] = {}
+    for i, key in enumerate(keys):
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            results[i] = cached
+    misses = [i for i in range(len(chunk)) if i not in results]
+
+    errors = {}
+    if misses:
+        try:
+            X, miss_errors = await runtime.preprocess_pool.run(preprocess_image_batch, [chunk[i][1] for i in misses],
+                                                               normalize=False)
+            predictions = await run_in_threadpool(model.predict_uint8, X) if X.shape[1] else None
+        except QueueFullError as qe:
+            logger.warning(f"Batch chunk rejected: {str(qe)}")
+            for name in names:
+                yield json.dumps({"filename": name, "error": "Server is busy, please retry"}) + "\n"
+            return
+        except Exception as e:
+            # Every image of the chunk still gets its line, and the stream goes on with the next chunk
+            logger.error(f"An error occurred during batch prediction: {str(e)}", extra={"image_count": len(chunk)})
+            for name in names:
+                yield json.dumps({"filename": name, "error": "Internal server error"}) + "\n"
+            return
+
+        column = 0
+        for j, i in enumerate(misses):
+            if j in miss_errors:
+                errors[i] = miss_errors[j]
+                continue
+            results[i] = int(predictions[0, column])
+            prediction_cache.put(keys[i], results[i])
+            column += 1
+
+    latency = (time.time() - start_time) / len(chunk)
+    for i, name in enumerate(names):
+        if i in errors:
+            yield json.dumps({"filename": name, "error": errors[i]}) + "\n"
+            continue
+        metrics.record_prediction(results[i], latency, endpoint="predict_batch")
+        yield json.dumps({"filename": name, "prediction": results[i]}) + "\n"
+
+
+async def stream_predictions(files: List[UploadFile], chunk_size: int) -> AsyncIterator[str]:
+    total = 0
+    chunk = []
+    for upload in files:
+        images = iter_uploaded_images(upload)
+        while True:
+            # Only errors reading the upload itself are blamed on it; predict_chunk reports its own
+            try:
+                item = await images.__anext__()
+            except StopAsyncIteration:
+                break
+            except ValueError as ve:
+                logger.error(f"Invalid upload: {str(ve)}", extra={"image_filename": upload.filename})
+                yield json.dumps({"filename": upload.filename, "error": str(ve)}) + "\n"
+                break
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                async for line in predict_chunk(chunk):
+                    yield line
+                total += len(chunk)
+                chunk = []
+
+    if chunk:
+        async for line in predict_chunk(chunk):
+            yield line
+        total += len(chunk)
+
+    logger.info("Batch prediction completed", extra={"image_count": total})
+
+
+@router.post("/predict/batch")
+async def predict_batch(
+        files: List[UploadFile] = File(...),
+        chunk_size: Optional[int] = Query(None, ge=1, description="Images per forward pass. Defaults to batch_predict.chunk_size."),
+):
+    """
+    Classify many images in one request.
+
+    Accepts any number of image files and/or zip/tar archives of images as a multipart
+    upload. Images are decoded and classified in chunks of ``chunk_size``, and results
+    are streamed back as NDJSON, one line per image, as each chunk finishes.
+    """
+    batch_config = runtime.config.get('batch_predict', {})
+    chunk_size = chunk_size or batch_config.get('chunk_size', DEFAULT_CHUNK_SIZE)
+    max_chunk_size = batch_config.get('max_chunk_size', MAX_CHUNK_SIZE)
+    if chunk_size > max_chunk_size:
+        raise HTTPException(status_code=422, detail=f"chunk_size must be at most {max_chunk_size}")
+    return StreamingResponse(stream_predictions(files, chunk_size), media_type="application/x-ndjson")
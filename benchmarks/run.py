@@ -0,0 +1,412 @@
+"""
+Performance benchmarks for the data, training and serving hot paths.
+
+Every benchmark runs in a fresh process on synthetic data, so timings do not depend
+on local datasets and the reported peak RSS belongs to that benchmark alone.
+
+Usage:
+    python -m benchmarks.run --size small --output bench_results.json
+    python -m benchmarks.run --size small --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --size small --baseline benchmarks/baseline.json
+"""
+import numpy as np
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.synthetic import SIZES, encode_images, make_images, write_h5, write_image_folder
+
+logger = logging.getLogger(__name__)
+
+BENCHMARKS: Dict[str, Callable[[int, Path, int], Dict[str, float]]] = {}
+
+# Folder ingestion writes every image to disk first, so it is capped for large presets
+MAX_FOLDER_IMAGES = 4096
+MAX_SERVING_REQUESTS = 2048
+HTTP_CONCURRENCY = 16
+
+
+def benchmark(name: str) -> Callable:
+    def register(fn: Callable[[int, Path, int], Dict[str, float]]) -> Callable:
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _best_time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _latency_summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        "predictions_per_second": len(latencies) / elapsed,
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+def _make_model(n_features: int, seed: int = 0):
+    from src.models.logistic_regression_nn import LogisticRegression
+
+    rng = np.random.default_rng(seed)
+    model = LogisticRegression()
+    model.w = (rng.standard_normal((n_features, 1)) * 0.01).astype(np.float32)
+    model.b = 0.0
+    return model
+
+
+@benchmark("preprocess_data")
+def bench_preprocess_data(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    from src.data.data_processing import preprocess_data
+
+    X, _ = make_images(n)
+    seconds = _best_time(lambda: preprocess_data(X), repeat)
+    return {"images_per_second": n / seconds}
+
+
+@benchmark("process_images")
+def bench_process_images(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    from src.data.data_processing import process_images
+
+    n = min(n, MAX_FOLDER_IMAGES)
+    X, _ = make_images(n)
+    folder = workdir / "images"
+    write_image_folder(folder, X)
+    serial = _best_time(lambda: process_images(folder), repeat)
+    parallel = _best_time(lambda: process_images(folder, parallel=True), repeat)
+    return {"images_per_second": n / serial, "parallel_images_per_second": n / parallel}
+
+
+@benchmark("h5_stream")
+def bench_h5_stream(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    from src.data.h5_dataset import H5Dataset
+
+    X, y = make_images(n)
+    path = workdir / "test.h5"
+    write_h5(path, X, y)
+    dataset = H5Dataset(path, "test_set_x", "test_set_y", batch_size=256)
+
+    def consume() -> None:
+        for _ in dataset:
+            pass
+
+    return {"images_per_second": n / _best_time(consume, repeat)}
+
+
+@benchmark("train")
+def bench_train(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    from src.data.data_processing import preprocess_data
+    from src.models.logistic_regression_nn import LogisticRegression
+
+    X, y = make_images(n)
+    X = preprocess_data(X)
+    iterations = 50
+    gd = _best_time(lambda: LogisticRegression().fit(X, y, num_iterations=iterations, learning_rate=0.005), repeat)
+    adam = _best_time(lambda: LogisticRegression().fit(X, y, num_iterations=5, learning_rate=0.001,
+                                                       optimizer="adam", batch_size=64, seed=0), repeat)
+    return {
+        "gd_iterations_per_second": iterations / gd,
+        "adam_epochs_per_second": 5 / adam,
+        "gd_examples_per_second": iterations * n / gd,
+    }
+
+
+def check_uint8_equivalence(model, images: np.ndarray, margin: float = 1e-5) -> float:
+    """
+    Check that ``predict_uint8`` on raw pixels makes the same decisions as ``predict``
+    on preprocessed input.
+
+    Decisions may only differ for probabilities within ``margin`` of the threshold,
+    where float32 rounding of the two summation orders can land on either side.
+
+    Args:
+        model (LogisticRegression): Trained model
+        images (np.ndarray): uint8 images of shape (m, height, width, 3)
+        margin (float): Probability distance from the threshold treated as a tie
+
+    Returns:
+        float: Largest absolute difference between the two probabilities
+
+    Raises:
+        ValueError: If a decision outside the margin differs
+    """
+    from src.data.data_processing import preprocess_data
+
+    raw = images.reshape(images.shape[0], -1).T
+    expected = model.predict_proba(preprocess_data(images))
+    actual = model.predict_proba_uint8(raw)
+    differ = (expected > model.threshold) != (model.predict_uint8(raw) > 0.5)
+    differ &= np.abs(expected - model.threshold) > margin
+    if differ.any():
+        raise ValueError(f"uint8 path changed {int(differ.sum())} decisions")
+    return float(np.max(np.abs(expected - actual)))
+
+
+@benchmark("predict")
+def bench_predict(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    from src.data.data_processing import preprocess_data
+    from src.models.logistic_regression_nn import QUANTIZED_DTYPES
+
+    images, _ = make_images(n)
+    model = _make_model(images[0].size)
+    check_uint8_equivalence(model, images)
+
+    X = preprocess_data(images)
+    raw = images.reshape(n, -1).T
+    results = {
+        "predictions_per_second": n / _best_time(lambda: model.predict(X), repeat),
+        "preprocess_predict_per_second": n / _best_time(lambda: model.predict(preprocess_data(images)), repeat),
+        "uint8_predict_per_second": n / _best_time(lambda: model.predict_uint8(raw), repeat),
+    }
+    for dtype in QUANTIZED_DTYPES:
+        quantized = model.quantize(dtype)
+        results[f"{dtype}_predict_per_second"] = n / _best_time(lambda: quantized.predict_uint8(raw), repeat)
+    return results
+
+
+@benchmark("metrics")
+def bench_metrics(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    from src.utils.metrics import calculate_metrics
+
+    m = n * 1000
+    rng = np.random.default_rng(0)
+    predictions = rng.integers(0, 2, size=(1, m)).astype(np.float32)
+    labels = rng.integers(0, 2, size=(1, m)).astype(np.float32)
+    return {"examples_per_second": m / _best_time(lambda: calculate_metrics(predictions, labels), repeat)}
+
+
+@benchmark("serve_inprocess")
+def bench_serve_inprocess(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    from src.data.data_processing import preprocess_image_bytes
+
+    X, _ = make_images(min(n, MAX_SERVING_REQUESTS))
+    blobs = encode_images(X)
+    model = _make_model(X[0].size)
+
+    latencies = []
+    start = time.perf_counter()
+    for blob in blobs:
+        request_start = time.perf_counter()
+        model.predict_uint8(preprocess_image_bytes(blob, normalize=False))
+        latencies.append(time.perf_counter() - request_start)
+    return _latency_summary(latencies, time.perf_counter() - start)
+
+
+def _serving_config(workdir: Path) -> str:
+    import yaml
+
+    with open("config/dev/config.yml") as f:
+        config = yaml.safe_load(f)
+    config["logs"]["dir"] = str(workdir / "logs")
+    config["logs"]["level"] = "WARNING"
+    config["logs"].get("elasticsearch", {})["enabled"] = False
+    config["metrics"] = {"dir": None}
+    # Every request must pay the full decode and predict cost
+    config["prediction_cache"] = {"max_entries": 0}
+    path = workdir / "config.yml"
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return str(path)
+
+
+@benchmark("serve_http")
+def bench_serve_http(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    import httpx
+
+    X, _ = make_images(min(n, MAX_SERVING_REQUESTS))
+    blobs = encode_images(X)
+    _make_model(X[0].size).save(workdir / "model")
+    os.environ["CONFIG_PATH"] = _serving_config(workdir)
+    os.environ["MODEL_PATH"] = str(workdir / "model")
+    from api.app import create_app
+
+    app = create_app()
+
+    async def run() -> Dict[str, float]:
+        latencies = []
+        semaphore = asyncio.Semaphore(HTTP_CONCURRENCY)
+        transport = httpx.ASGITransport(app=app)
+        # The ASGI transport does not send lifespan events, so run the startup here
+        async with app.router.lifespan_context(app), \
+                httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def request(blob: bytes) -> None:
+                async with semaphore:
+                    request_start = time.perf_counter()
+                    response = await client.post("/api/v1/predict", files={"image": ("image.png", blob, "image/png")})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - request_start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(request(blob) for blob in blobs))
+            return _latency_summary(latencies, time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+# Imports the app and runs its lifespan startup in a fresh interpreter
+_STARTUP_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+from api.app import create_app
+app = create_app()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        from api import runtime
+        timings = dict(runtime.startup_timings)
+    timings["wall"] = time.perf_counter() - start
+    print(json.dumps(timings))
+
+asyncio.run(main())
+"""
+
+
+@benchmark("api_startup")
+def bench_api_startup(n: int, workdir: Path, repeat: int) -> Dict[str, float]:
+    X, _ = make_images(1)
+    _make_model(X[0].size).save(workdir / "model")
+    env = dict(os.environ, CONFIG_PATH=_serving_config(workdir), MODEL_PATH=str(workdir / "model"))
+
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], env=env, capture_output=True, text=True,
+                                check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(runs, key=lambda timings: timings["wall"])
+    result = {f"{step}_ms": seconds * 1000.0 for step, seconds in best.items()}
+    # Peak RSS of the startup subprocesses rather than of this process
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    result["startup_peak_rss_mb"] = children / (1024 * 1024) if sys.platform == "darwin" else children / 1024
+    return result
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_one(name: str, n: int, repeat: int) -> Dict[str, float]:
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        result = BENCHMARKS[name](n, Path(workdir), repeat)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(names: List[str], size: str, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Run benchmarks, each in a fresh spawned process.
+
+    Args:
+        names (List[str]): Benchmark names
+        size (str): Dataset size preset (see ``benchmarks.synthetic.SIZES``)
+        repeat (int): Timed repetitions per measurement; the best is kept
+
+    Returns:
+        Dict[str, Any]: Environment, settings and per-benchmark metrics
+    """
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[name] = executor.submit(_run_one, name, SIZES[size], repeat).result()
+        print(f"{name}: " + ", ".join(f"{metric}={value:.4g}" for metric, value in results[name].items()))
+    return {"environment": _environment(), "size": size, "repeat": repeat, "results": results}
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_second")
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """
+    Compare results against a baseline run and list the metrics that regressed.
+
+    Args:
+        current (Dict[str, Any]): Output of ``run_benchmarks``
+        baseline (Dict[str, Any]): A saved earlier output
+        tolerance (float): Allowed relative slowdown (or memory growth) before a
+            metric counts as a regression
+
+    Returns:
+        List[str]: One line per regressed metric
+    """
+    if current.get("size") != baseline.get("size"):
+        logger.warning(f"Comparing size {current.get('size')} against a {baseline.get('size')} baseline")
+
+    regressions = []
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            reference = baseline.get("results", {}).get(name, {}).get(metric)
+            if not reference:
+                continue
+            change = value / reference - 1.0
+            regressed = change < -tolerance if _higher_is_better(metric) else change > tolerance
+            marker = "REGRESSION" if regressed else ""
+            print(f"{name:>16} {metric:<28} {reference:>12.4g} -> {value:>12.4g} {change:+8.1%} {marker}")
+            if regressed:
+                regressions.append(f"{name}.{metric}: {reference:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="Baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", default=None, help="Also write the results to this baseline file")
+    args = parser.parse_args()
+    # Fail before the run, not after it: baselines are machine-specific and not committed
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f"baseline {args.baseline} does not exist; record one on this machine first with "
+                     f"--save-baseline {args.baseline} (or make bench-baseline)")
+
+    results = run_benchmarks(args.only or list(BENCHMARKS), args.size, args.repeat)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
@@ -0,0 +1,87 @@
+import numpy as np
+import io
+import os
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from PIL import Image
+
+from src.data.data_processing import IMAGE_SIZE
+
+# Number of examples in each dataset size preset
+SIZES = {
+    "small": 256,
+    "medium": 2048,
+    "large": 16384,
+}
+
+
+def make_images(n: int, size: Tuple[int, int] = IMAGE_SIZE, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate a labeled synthetic image set shaped like the cat/non-cat data.
+
+    Class 1 images are brighter on average than class 0 images, so a model trained on
+    them reaches a non-trivial accuracy and training curves look realistic.
+
+    Args:
+        n (int): Number of images
+        size (Tuple[int, int]): Image size (width, height)
+        seed (int): Random seed
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: uint8 images of shape (n, height, width, 3) and
+            labels of shape (1, n)
+    """
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, size=(1, n))
+    base = np.where(y.reshape(-1, 1, 1, 1) == 1, 140, 110)
+    noise = rng.integers(-60, 60, size=(n, size[1], size[0], 3))
+    X = np.clip(base + noise, 0, 255).astype(np.uint8)
+    return X, y
+
+
+def encode_images(X: np.ndarray, fmt: str = "PNG") -> List[bytes]:
+    """
+    Encode images the way clients upload them.
+
+    Args:
+        X (np.ndarray): uint8 images of shape (n, height, width, 3)
+        fmt (str): PIL image format
+
+    Returns:
+        List[bytes]: One encoded image per example
+    """
+    blobs = []
+    for image in X:
+        buffer = io.BytesIO()
+        Image.fromarray(image).save(buffer, format=fmt)
+        blobs.append(buffer.getvalue())
+    return blobs
+
+
+def write_image_folder(folder: Union[str, Path], X: np.ndarray, fmt: str = "PNG") -> List[str]:
+    """
+    Write images to a folder as individual files.
+
+    Returns:
+        List[str]: Paths of the written files
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i, blob in enumerate(encode_images(X, fmt)):
+        path = os.path.join(folder, f"{i:06d}.{fmt.lower()}")
+        with open(path, "wb") as f:
+            f.write(blob)
+        paths.append(path)
+    return paths
+
+
+def write_h5(path: Union[str, Path], X: np.ndarray, y: np.ndarray, prefix: str = "test") -> None:
+    """
+    Write images and labels to an h5 file with the layout of the course datasets.
+    """
+    import h5py
+
+    with h5py.File(str(path), "w") as dataset:
+        dataset[f"{prefix}_set_x"] = X
+        dataset[f"{prefix}_set_y"] = y.reshape(-1)
@@ -1 +1,73 @@
-# Code to GET data from ElasticSearch
\ No newline at end of file
+# Code to GET data from ElasticSearch
+import argparse
+import json
+import urllib.request
+from typing import Any, Dict, Optional
+
+
+def search(url: str, index: str, query: Dict[str, Any], timeout: float = 10.0) -> Dict[str, Any]:
+    """
+    Run a search request against Elasticsearch.
+
+    Args:
+        url (str): Elasticsearch base URL
+        index (str): Index name or pattern, e.g. ml-classifier-logs-*
+        query (Dict[str, Any]): Search request body
+        timeout (float): HTTP request timeout
+
+    Returns:
+        Dict[str, Any]: The search response
+    """
+    request = urllib.request.Request(f"{url.rstrip('/')}/{index}/_search", data=json.dumps(query).encode(),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def prediction_latency_percentiles(url: str, index: str = "ml-classifier-logs-*", since: str = "now-1h",
+                                   correlation_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Prediction latency percentiles and class counts from the shipped JSON logs.
+
+    Args:
+        url (str): Elasticsearch base URL
+        index (str): Index pattern of the log indices
+        since (str): Start of the time range, in Elasticsearch date math
+        correlation_id (Optional[str]): Only include records of this request
+
+    Returns:
+        Dict[str, Any]: Number of predictions, latency percentiles (seconds) and
+            predictions per class
+    """
+    filters = [
+        {"range": {"@timestamp": {"gte": since}}},
+        {"exists": {"field": "prediction_latency"}},
+    ]
+    if correlation_id:
+        filters.append({"term": {"correlation_id": correlation_id}})
+    query = {
+        "size": 0,
+        "query": {"bool": {"filter": filters}},
+        "aggs": {
+            "latency": {"percentiles": {"field": "prediction_latency", "percents": [50, 90, 99, 99.9]}},
+            "classes": {"terms": {"field": "prediction_class"}},
+        },
+    }
+    result = search(url, index, query)
+    aggregations = result["aggregations"]
+    return {
+        "predictions": result["hits"]["total"]["value"],
+        "latency_percentiles": aggregations["latency"]["values"],
+        "predictions_by_class": {bucket["key"]: bucket["doc_count"] for bucket in aggregations["classes"]["buckets"]},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query prediction latency from the shipped logs.")
+    parser.add_argument("--url", default="http://localhost:9200")
+    parser.add_argument("--index", default="ml-classifier-logs-*")
+    parser.add_argument("--since", default="now-1h")
+    parser.add_argument("--correlation-id", default=None)
+    args = parser.parse_args()
+
+    print(json.dumps(prediction_latency_percentiles(args.url, args.index, args.since, args.correlation_id), indent=2))
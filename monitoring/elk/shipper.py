@@ -0,0 +1,262 @@
+import base64
+import glob
+import gzip
+import json
+import logging
+import os
+import itertools
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bulk item statuses worth sending again: throttled or a server-side failure
+_RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ElasticsearchHandler(logging.Handler):
+    """
+    Logging handler that ships JSON log records to Elasticsearch with the ``_bulk`` API.
+
+    ``emit`` only appends the formatted record to an in-memory buffer; a background
+    thread sends the buffer as one gzip-compressed bulk request whenever it holds
+    ``batch_size`` records or ``flush_interval_s`` has passed. Failed requests are
+    retried with exponential backoff; a batch that still fails is appended to an
+    NDJSON file in ``spill_dir`` and replayed once Elasticsearch accepts requests
+    again. Every record gets a unique ``_id`` when it is first batched, so sending it
+    again after a timeout or partial failure overwrites the same document instead of
+    duplicating it. Use it with ``api.utils.logging.JsonFormatter``.
+
+    Args:
+        url (str): Elasticsearch base URL, e.g. http://localhost:9200
+        index (str): Index name prefix; records go to ``<index>-YYYY.MM.DD``
+        batch_size (int): Records per bulk request
+        flush_interval_s (float): Maximum time a record waits in the buffer
+        max_buffer (int): Records held in memory before new ones are dropped
+        max_retries (int): Retries of a failed bulk request before spilling it
+        backoff_s (float): Delay before the first retry, doubled on every retry
+        timeout_s (float): HTTP request timeout
+        spill_dir (Optional[str]): Directory for batches that could not be sent.
+            None drops them.
+        max_spill_bytes (int): Maximum total size of the spill files
+        username (Optional[str]): Basic auth user
+        password (Optional[str]): Basic auth password
+    """
+
+    def __init__(
+            self,
+            url: str = "http://localhost:9200",
+            index: str = "ml-classifier-logs",
+            batch_size: int = 500,
+            flush_interval_s: float = 2.0,
+            max_buffer: int = 10000,
+            max_retries: int = 5,
+            backoff_s: float = 0.5,
+            timeout_s: float = 10.0,
+            spill_dir: Optional[str] = None,
+            max_spill_bytes: int = 100 * 1024 * 1024,
+            username: Optional[str] = None,
+            password: Optional[str] = None,
+    ) -> None:
+        super().__init__()
+        self.bulk_url = url.rstrip("/") + "/_bulk"
+        self.index = index
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_s
+        self.max_buffer = max_buffer
+        self.max_retries = max_retries
+        self.backoff = backoff_s
+        self.timeout = timeout_s
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+
+        self._headers = {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+        if username is not None:
+            token = base64.b64encode(f"{username}:{password or ''}".encode()).decode()
+            self._headers["Authorization"] = f"Basic {token}"
+
+        self._buffer: Deque[Tuple[float, str]] = deque()
+        # Document ids: a random prefix per handler and a sequence number
+        self._id_prefix = uuid.uuid4().hex[:16]
+        self._id_sequence = itertools.count()
+        self._buffer_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self.shipped = 0
+        self.dropped = 0
+        self.spilled = 0
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="elasticsearch-shipper", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            document = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append((record.created, document))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def _take_batch(self) -> List[Tuple[float, str]]:
+        with self._buffer_lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _bulk_body(self, batch: List[Tuple[float, str]]) -> bytes:
+        lines = []
+        for created, document in batch:
+            index = f"{self.index}-{time.strftime('%Y.%m.%d', time.gmtime(created))}"
+            document_id = f"{self._id_prefix}-{next(self._id_sequence)}"
+            lines.append(json.dumps({"index": {"_index": index, "_id": document_id}}))
+            lines.append(document)
+        return ("\n".join(lines) + "\n").encode()
+
+    def _post(self, body: bytes) -> List[int]:
+        """
+        Send one bulk body and return the indexes (in lines / 2) of items to retry.
+
+        Raises:
+            OSError: If the request fails or the whole request should be retried
+        """
+        request = urllib.request.Request(self.bulk_url, data=gzip.compress(body, compresslevel=5),
+                                         headers=self._headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                result = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code in _RETRYABLE_STATUSES:
+                raise
+            logger.error(f"Elasticsearch rejected a bulk request ({e.code}), dropping it")
+            return []
+
+        if not result.get("errors"):
+            return []
+        retry = []
+        for i, item in enumerate(result.get("items", [])):
+            status = next(iter(item.values())).get("status", 200)
+            if status in _RETRYABLE_STATUSES:
+                retry.append(i)
+            elif status >= 300:
+                self.dropped += 1
+        return retry
+
+    @staticmethod
+    def _select(body: bytes, items: List[int]) -> bytes:
+        lines = body.decode().splitlines()
+        return ("\n".join(line for i in items for line in lines[2 * i:2 * i + 2]) + "\n").encode()
+
+    def _send(self, body: bytes) -> bool:
+        """
+        Send a bulk body, retrying failed requests and retryable items with backoff.
+
+        Returns:
+            bool: True if everything was indexed (or rejected as invalid), False if
+                the remaining items should be spilled
+        """
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                retry = self._post(body)
+                if not retry:
+                    return True
+                body = self._select(body, retry)
+            except OSError as e:
+                logger.warning(f"Bulk request to Elasticsearch failed (attempt {attempt + 1}): {str(e)}")
+            if attempt < self.max_retries and not self._stopping.is_set():
+                time.sleep(delay)
+                delay *= 2
+        self._spill(body)
+        return False
+
+    def _spill(self, body: bytes) -> None:
+        if not self.spill_dir:
+            self.dropped += body.count(b"\n") // 2
+            return
+        spill_bytes = sum(os.path.getsize(path) for path in glob.glob(os.path.join(self.spill_dir, "*.ndjson")))
+        if spill_bytes + len(body) > self.max_spill_bytes:
+            logger.error("Log spill directory is full, dropping a batch")
+            self.dropped += body.count(b"\n") // 2
+            return
+        path = os.path.join(self.spill_dir, f"spill-{os.getpid()}-{time.time_ns()}.ndjson")
+        with open(path, "wb") as f:
+            f.write(body)
+        self.spilled += body.count(b"\n") // 2
+
+    def _replay_spill(self) -> None:
+        if not self.spill_dir:
+            return
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "*.ndjson"))):
+            with open(path, "rb") as f:
+                body = f.read()
+            try:
+                retry = self._post(body)
+            except OSError:
+                return
+            total = body.count(b"\n") // 2
+            if retry:
+                # Keep only the items Elasticsearch did not accept
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(self._select(body, retry))
+                os.replace(tmp_path, path)
+                self.shipped += total - len(retry)
+                return
+            os.remove(path)
+            self.shipped += total
+
+    def _flush_buffer(self) -> None:
+        sink_down = False
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            body = self._bulk_body(batch)
+            if sink_down:
+                # Do not wait out another round of retries for every batch
+                self._spill(body)
+            elif self._send(body):
+                self.shipped += len(batch)
+                self._replay_spill()
+            else:
+                sink_down = True
+            if len(batch) < self.batch_size:
+                return
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self._flush_buffer()
+            except Exception as e:
+                logger.error(f"Error while shipping logs to Elasticsearch: {str(e)}")
+
+    def flush(self) -> None:
+        self._wakeup.set()
+
+    def close(self) -> None:
+        """
+        Stop the shipping thread and send (or spill) whatever is still buffered.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout=self.timeout + 1)
+        try:
+            self._flush_buffer()
+        except Exception as e:
+            logger.error(f"Error while shipping logs to Elasticsearch: {str(e)}")
+        super().close()
@@ -0,0 +1,204 @@
+import numpy as np
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", Path.home() / ".cache" / "py_deeplearning_ai" / "datasets"))
+DEFAULT_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", 10 * 1024 ** 3))
+
+
+def _iter_source_files(sources: Iterable[Union[str, Path]]) -> Iterable[Tuple[str, os.stat_result]]:
+    for source in sources:
+        source = Path(source)
+        if source.is_dir():
+            with os.scandir(source) as entries:
+                files = sorted((entry for entry in entries if entry.is_file()), key=lambda entry: entry.name)
+            for entry in files:
+                yield entry.path, entry.stat()
+        else:
+            yield str(source), source.stat()
+
+
+def fingerprint_sources(sources: Iterable[Union[str, Path]], content_hash: bool = False) -> str:
+    """
+    Fingerprint source files and folders by path, size and modification time.
+
+    Args:
+        sources (Iterable[Union[str, Path]]): Files and/or folders (scanned one level deep)
+        content_hash (bool): If True, also hash the file contents. Slower, but robust to
+            copies that reset modification times.
+
+    Returns:
+        str: Hex digest identifying the current state of the sources
+
+    Raises:
+        FileNotFoundError: If a source does not exist
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for path, stat in _iter_source_files(sources):
+        digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        if content_hash:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    On-disk cache of preprocessed (X, y) arrays.
+
+    Entries are keyed by a fingerprint of the source files combined with the
+    preprocessing parameters, and stored as plain ``.npy`` files that are opened with
+    ``np.load(mmap_mode='r')``, so a warm hit costs a file open rather than a re-read
+    and re-decode of the sources. When the total cache size exceeds ``max_bytes`` the
+    least recently used entries are evicted.
+
+    Args:
+        cache_dir (Union[str, Path]): Directory holding the cache entries
+        max_bytes (int): Maximum total size of all entries
+
+    Usage:
+        cache = DatasetCache()
+        X, y = cache.get_or_build([folder], {"image_size": IMAGE_SIZE}, build_fn)
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def make_key(self, sources: Iterable[Union[str, Path]], params: Dict[str, Any], content_hash: bool = False) -> str:
+        """
+        Build the cache key for the given sources and preprocessing parameters.
+
+        Args:
+            sources (Iterable[Union[str, Path]]): Source files and/or folders
+            params (Dict[str, Any]): JSON-serializable preprocessing parameters
+            content_hash (bool): If True, fingerprint file contents as well as metadata
+
+        Returns:
+            str: Cache key
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(fingerprint_sources(sources, content_hash).encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Open a cached entry as read-only memory maps.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: (X, y), or None on a miss
+        """
+        entry = self.cache_dir / key
+        try:
+            X = np.load(entry / "X.npy", mmap_mode="r")
+            y = np.load(entry / "y.npy", mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # The entry's modification time records its last use for LRU eviction
+        os.utime(entry)
+        logger.info(f"Dataset cache hit: {key}")
+        return X, y
+
+    def put(self, key: str, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Store (X, y) under ``key`` and return the stored arrays as memory maps.
+
+        Args:
+            key (str): Cache key
+            X (np.ndarray): Preprocessed features
+            y (np.ndarray): Labels
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The cached (X, y), memory-mapped
+        """
+        entry = self.cache_dir / key
+        tmp_entry = self.cache_dir / f"{key}.tmp-{os.getpid()}"
+        tmp_entry.mkdir(parents=True, exist_ok=True)
+        try:
+            np.save(tmp_entry / "X.npy", X)
+            np.save(tmp_entry / "y.npy", y)
+            try:
+                os.rename(tmp_entry, entry)
+            except OSError:
+                # Another process stored the same entry first
+                pass
+        finally:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+        logger.info(f"Dataset cached: {key}")
+        self.evict(keep=key)
+        return self.get(key)
+
+    def get_or_build(
+            self,
+            sources: Iterable[Union[str, Path]],
+            params: Dict[str, Any],
+            build: Callable[[], Tuple[np.ndarray, np.ndarray]],
+            content_hash: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the cached (X, y) for the sources and parameters, building it on a miss.
+
+        Args:
+            sources (Iterable[Union[str, Path]]): Source files and/or folders
+            params (Dict[str, Any]): JSON-serializable preprocessing parameters
+            build (Callable[[], Tuple[np.ndarray, np.ndarray]]): Builds (X, y) from the sources
+            content_hash (bool): If True, fingerprint file contents as well as metadata
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (X, y), memory-mapped from the cache
+        """
+        sources = list(sources)
+        key = self.make_key(sources, params, content_hash)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        logger.info(f"Dataset cache miss: {key}")
+        X, y = build()
+        return self.put(key, X, y)
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.cache_dir.is_dir():
+            return entries
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir() and ".tmp-" not in entry.name:
+                size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                entries.append((entry.stat().st_mtime, size, Path(entry.path)))
+        return entries
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Remove least recently used entries until the cache fits in ``max_bytes``.
+
+        Args:
+            keep (Optional[str]): Key that must not be evicted
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path.name == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted dataset cache entry: {path.name}")
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
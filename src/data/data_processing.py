@@ -1,17 +1,41 @@
 import numpy as np
-from PIL import Image
+import io
 import logging
-from typing import Tuple, Union, List
-import h5py
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, Optional, Tuple, Union, List
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from src.data.cache import DatasetCache
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# PIL and h5py are imported where they are used: the API only needs them once the
+# first image arrives, and never needs h5py at all
 logger = logging.getLogger(__name__)
 
 # Constants
 IMAGE_SIZE = (64, 64)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+SHM_DIR = "/dev/shm"
+
+def get_dataset_path(train: bool = True) -> Path:
+    """
+    Get the path of the cat/non-cat h5 file.
+
+    Args:
+        train (bool): If True, return the training set path. Otherwise, the test set path.
+
+    Returns:
+        Path: Path to the h5 file
+    """
+    file_name = "train_catvnoncat.h5" if train else "test_catvnoncat.h5"
+    return Path(__file__).parent / "datasets" / file_name
 
 def load_dataset(train: bool = True) -> Tuple[np.ndarray, np.ndarray]:
     """
@@ -27,10 +51,11 @@ def load_dataset(train: bool = True) -> Tuple[np.ndarray, np.ndarray]:
         FileNotFoundError: If the dataset file is not found.
         ValueError: If there's an issue with the dataset structure.
     """
-    file_name = "train_catvnoncat.h5" if train else "test_catvnoncat.h5"
-    dataset_path = Path(__file__).parent / "datasets" / file_name
+    dataset_path = get_dataset_path(train)
 
     try:
+        import h5py
+
         with h5py.File(str(dataset_path), "r") as dataset:
             X = np.array(dataset["train_set_x" if train else "test_set_x"][:])
             y = np.array(dataset["train_set_y" if train else "test_set_y"][:])
@@ -73,7 +98,30 @@ def preprocess_data(X: np.ndarray, flatten: bool = True) -> np.ndarray:
         logger.error(f"Error in data preprocessing: {str(e)}")
         raise
 
-def resize_image(image_path: Union[str, Path], size: Tuple[int, int] = IMAGE_SIZE) -> Image.Image:
+def load_preprocessed_dataset(train: bool = True, flatten: bool = True, cache: Optional[DatasetCache] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load and preprocess the dataset, reusing a cached copy when the source is unchanged.
+
+    Args:
+        train (bool): If True, load the training set. Otherwise, load the test set.
+        flatten (bool): If True, flatten the image data
+        cache (Optional[DatasetCache]): Cache of preprocessed arrays. If None, always
+            load and preprocess from the h5 file.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Preprocessed X (features) and y (labels) arrays
+    """
+    def build() -> Tuple[np.ndarray, np.ndarray]:
+        X, y = load_dataset(train)
+        return preprocess_data(X, flatten), y
+
+    if cache is None:
+        return build()
+
+    params = {"source": "h5", "train": train, "flatten": flatten, "dtype": "float32"}
+    return cache.get_or_build([get_dataset_path(train)], params, build)
+
+def resize_image(image_path: Union[str, Path], size: Tuple[int, int] = IMAGE_SIZE) -> "Image.Image":
     """
     Resize the image to the given size.
 
@@ -88,6 +136,8 @@ def resize_image(image_path: Union[str, Path], size: Tuple[int, int] = IMAGE_SIZ
         FileNotFoundError: If the image file is not found
         ValueError: If there's an issue with image processing
     """
+    from PIL import Image
+
     try:
         with Image.open(image_path) as img:
             resized_image = img.resize(size)
@@ -100,7 +150,7 @@ def resize_image(image_path: Union[str, Path], size: Tuple[int, int] = IMAGE_SIZ
         logger.error(f"Error resizing image {image_path}: {str(e)}")
         raise ValueError(f"Error resizing image: {str(e)}")
 
-def image_to_array(image: Image.Image) -> np.ndarray:
+def image_to_array(image: "Image.Image") -> np.ndarray:
     """
     Convert the image to a numpy array.
 
@@ -149,13 +199,295 @@ def process_image(image_path: Union[str, Path], size: Tuple[int, int] = IMAGE_SI
         logger.error(f"Error processing image {image_path}: {str(e)}")
         raise ValueError(f"Error processing image: {str(e)}")
 
-def process_images(image_folder: Union[str, Path], size: Tuple[int, int] = IMAGE_SIZE) -> np.ndarray:
+def decode_image(data: bytes, size: Tuple[int, int] = IMAGE_SIZE) -> np.ndarray:
+    """
+    Decode an encoded image (JPEG, PNG, ...) from memory and resize it.
+
+    Args:
+        data (bytes): Encoded image bytes
+        size (Tuple[int, int]): Target size (width, height)
+
+    Returns:
+        np.ndarray: RGB image as a uint8 array of shape (height, width, 3)
+
+    Raises:
+        ValueError: If the bytes cannot be decoded as an image
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            resized_image = img.convert("RGB").resize(size)
+        return image_to_array(resized_image)
+    except Exception as e:
+        logger.error(f"Error decoding image: {str(e)}")
+        raise ValueError(f"Error decoding image: {str(e)}")
+
+def preprocess_image_bytes(data: bytes, size: Tuple[int, int] = IMAGE_SIZE, normalize: bool = True) -> np.ndarray:
+    """
+    Decode, resize, normalize and flatten an encoded image into a model input column.
+
+    This is the CPU-bound part of a prediction request; it is a module-level function
+    so it can be dispatched to either a thread pool or a process pool.
+
+    Args:
+        data (bytes): Encoded image bytes
+        size (Tuple[int, int]): Target size (width, height)
+        normalize (bool): If False, return the raw uint8 pixels for
+            ``LogisticRegression.predict_uint8``
+
+    Returns:
+        np.ndarray: Image of shape (width * height * 3, 1), float32 in [0, 1] or raw uint8
+
+    Raises:
+        ValueError: If the bytes cannot be decoded as an image
+    """
+    img_array = decode_image(data, size)
+    if not normalize:
+        return img_array.reshape(-1, 1)
+    return normalize_image(img_array).reshape(-1, 1)
+
+def preprocess_image_batch(blobs: List[bytes], size: Tuple[int, int] = IMAGE_SIZE,
+                           normalize: bool = True) -> Tuple[np.ndarray, Dict[int, str]]:
+    """
+    Decode a batch of encoded images straight into one stacked model input.
+
+    Each image is written into a column of a single preallocated array, so the batch
+    is never held as a list of per-image copies.
+
+    Args:
+        blobs (List[bytes]): Encoded image bytes
+        size (Tuple[int, int]): Target size (width, height)
+        normalize (bool): If False, return the raw uint8 pixels for
+            ``LogisticRegression.predict_uint8``
+
+    Returns:
+        Tuple[np.ndarray, Dict[int, str]]: Images of shape
+            (width * height * 3, number_of_decoded_images), float32 in [0, 1] or raw
+            uint8, and a mapping from the index of each image that failed to decode
+            to its error message
+    """
+    X = np.empty((size[0] * size[1] * 3, len(blobs)), dtype=np.float32 if normalize else np.uint8)
+    errors = {}
+    for i, data in enumerate(blobs):
+        try:
+            X[:, i] = decode_image(data, size).reshape(-1)
+        except ValueError as e:
+            errors[i] = str(e)
+
+    if errors:
+        X = X[:, [i for i in range(len(blobs)) if i not in errors]]
+    if normalize:
+        X /= 255.0
+    return X, errors
+
+def iter_image_archive(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Iterate over the images stored in a zip or tar archive, one member at a time.
+
+    Args:
+        fileobj (BinaryIO): Open archive file. Zip archives must be seekable.
+        filename (str): Archive file name, used to detect the archive type
+
+    Yields:
+        Tuple[str, bytes]: Member name and encoded image bytes
+
+    Raises:
+        ValueError: If the archive type is not supported or the archive is corrupt
+    """
+    name = filename.lower()
+    try:
+        if name.endswith(".zip"):
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        yield info.filename, archive.read(info)
+        elif name.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+            with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+                for member in archive:
+                    if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield member.name, archive.extractfile(member).read()
+        else:
+            raise ValueError(f"Unsupported archive type: {filename}")
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        logger.error(f"Error reading archive {filename}: {str(e)}")
+        raise ValueError(f"Error reading archive: {str(e)}")
+
+def list_images(image_folder: Union[str, Path]) -> List[str]:
+    """
+    List the image files in a folder using a single directory scan.
+
+    Args:
+        image_folder (Union[str, Path]): Path to the folder containing images
+
+    Returns:
+        List[str]: Sorted paths of the image files in the folder
+
+    Raises:
+        FileNotFoundError: If the image folder is not found
+    """
+    with os.scandir(image_folder) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+def iter_image_folder_batches(labeled_folders: Dict[Union[str, Path], int], batch_size: int = 256,
+                              size: Tuple[int, int] = IMAGE_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Stream labeled image folders as (X, y) mini-batches, decoding one batch at a time.
+
+    Images that cannot be decoded are logged and skipped.
+
+    Args:
+        labeled_folders (Dict[Union[str, Path], int]): Folder path to the label of its images,
+            e.g. {"selfies": 1, "non_selfies": 0}
+        batch_size (int): Number of images per batch
+        size (Tuple[int, int]): Target size (width, height)
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: X of shape (width * height * 3, batch) normalized
+            to [0, 1] as float32, and y of shape (1, batch)
+
+    Raises:
+        FileNotFoundError: If a folder is not found
+    """
+    paths = []
+    labels = []
+    for folder, label in labeled_folders.items():
+        folder_paths = list_images(folder)
+        paths.extend(folder_paths)
+        labels.extend([label] * len(folder_paths))
+    labels = np.asarray(labels, dtype=np.float32)
+
+    from PIL import Image
+
+    for start in range(0, len(paths), batch_size):
+        batch_paths = paths[start:start + batch_size]
+        X = np.empty((size[0] * size[1] * 3, len(batch_paths)), dtype=np.float32)
+        keep = []
+        for i, image_path in enumerate(batch_paths):
+            try:
+                with Image.open(image_path) as img:
+                    X[:, len(keep)] = np.asarray(img.convert("RGB").resize(size)).reshape(-1)
+                keep.append(i)
+            except Exception as e:
+                logger.warning(f"Skipping image {image_path}: {str(e)}")
+        X = X[:, :len(keep)]
+        X /= 255.0
+        yield X, labels[start:start + len(batch_paths)][keep].reshape(1, -1)
+
+def _ingest_chunk(buffer_path: Optional[str], buffer: Optional[np.ndarray], shape: Tuple[int, int], dtype: str,
+                  start: int, image_paths: List[str], size: Tuple[int, int]) -> int:
+    """
+    Decode and resize a run of images into consecutive rows of the ingestion buffer.
+
+    Runs either in-process (``buffer`` given) or in a pool worker, which maps the
+    shared buffer file at ``buffer_path``.
+    """
+    from PIL import Image
+
+    if buffer is None:
+        buffer = np.memmap(buffer_path, dtype=dtype, mode="r+", shape=shape)
+    for offset, image_path in enumerate(image_paths):
+        try:
+            with Image.open(image_path) as img:
+                pixels = np.asarray(img.convert("RGB").resize(size))
+        except Exception as e:
+            raise ValueError(f"Error processing image {image_path}: {str(e)}")
+        row = buffer[start + offset]
+        row[:] = pixels.reshape(-1)
+        if row.dtype.kind == "f":
+            row /= 255.0
+    return len(image_paths)
+
+def _ingest_buffer_dir(nbytes: int) -> Optional[str]:
+    """
+    Pick the directory of the shared ingestion buffer: /dev/shm when it has room for
+    ``nbytes``, otherwise the regular temporary directory (None). Writing past the end
+    of a full /dev/shm through a memory mapping kills the process with SIGBUS instead
+    of raising, and container runtimes default it to 64 MB.
+    """
+    if os.path.isdir(SHM_DIR):
+        free = shutil.disk_usage(SHM_DIR).free
+        if nbytes <= free:
+            return SHM_DIR
+        logger.info(f"Ingestion buffer of {nbytes} bytes does not fit in {SHM_DIR} ({free} bytes free), "
+                    f"using {tempfile.gettempdir()}")
+    return None
+
+def ingest_images(image_paths: List[str], size: Tuple[int, int] = IMAGE_SIZE, workers: Optional[int] = None,
+                  dtype: Union[str, np.dtype] = np.float32, chunk_size: int = 256) -> np.ndarray:
+    """
+    Decode and resize many images in parallel into one preallocated buffer.
+
+    The buffer is a single shared memory mapping (placed in /dev/shm when it has room)
+    that every worker process writes its images into directly, so the dataset is held
+    in RAM exactly once and never copied through Python lists or pickling. Images are
+    stored one per row, so the returned (features, N) array is a transposed view of
+    the buffer with no extra copy.
+
+    Args:
+        image_paths (List[str]): Paths of the images to ingest
+        size (Tuple[int, int]): Target size (width, height)
+        workers (Optional[int]): Number of worker processes. Defaults to the CPU count;
+            1 decodes in-process.
+        dtype (Union[str, np.dtype]): float32 (normalized to [0, 1]) or uint8 (raw pixels)
+        chunk_size (int): Number of images per worker task
+
+    Returns:
+        np.ndarray: Images of shape (width * height * 3, N)
+
+    Raises:
+        ValueError: If the dtype is unsupported or an image cannot be processed
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.dtype(np.float32), np.dtype(np.uint8)):
+        raise ValueError(f"Unsupported ingestion dtype: {dtype}")
+
+    workers = workers or os.cpu_count() or 1
+    shape = (len(image_paths), size[0] * size[1] * 3)
+    chunks = [(start, image_paths[start:start + chunk_size]) for start in range(0, len(image_paths), chunk_size)]
+
+    if workers == 1 or len(chunks) <= 1:
+        buffer = np.empty(shape, dtype=dtype)
+        for start, paths in chunks:
+            _ingest_chunk(None, buffer, shape, dtype.str, start, paths, size)
+        logger.info(f"Ingested {shape[0]} images in-process.")
+        return buffer.T
+
+    buffer_dir = _ingest_buffer_dir(shape[0] * shape[1] * dtype.itemsize)
+    fd, buffer_path = tempfile.mkstemp(prefix="ingest-", suffix=".buf", dir=buffer_dir)
+    os.close(fd)
+    try:
+        buffer = np.memmap(buffer_path, dtype=dtype, mode="w+", shape=shape)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_ingest_chunk, buffer_path, None, shape, dtype.str, start, paths, size)
+                for start, paths in chunks
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        # The parent's mapping stays valid after the file name is removed
+        try:
+            os.remove(buffer_path)
+        except OSError:
+            pass
+
+    logger.info(f"Ingested {shape[0]} images with {workers} worker processes.")
+    return buffer.T
+
+def process_images(image_folder: Union[str, Path], size: Tuple[int, int] = IMAGE_SIZE, parallel: bool = False,
+                   workers: Optional[int] = None) -> np.ndarray:
     """
     Process all images in a folder: resize, convert to array, and normalize.
 
     Args:
         image_folder (Union[str, Path]): Path to the folder containing images
         size (Tuple[int, int]): Target size for resizing
+        parallel (bool): If True, decode across a process pool into one preallocated buffer
+        workers (Optional[int]): Number of worker processes when ``parallel`` is True
 
     Returns:
         np.ndarray: Array of processed images
@@ -164,10 +496,19 @@ def process_images(image_folder: Union[str, Path], size: Tuple[int, int] = IMAGE
         FileNotFoundError: If the image folder is not found
         ValueError: If there's an issue with image processing
     """
+    if parallel:
+        try:
+            X = ingest_images(list_images(image_folder), size, workers=workers)
+            logger.info(f"Processed {X.shape[1]} images from {image_folder}")
+            return X.T.reshape(X.shape[1], size[1], size[0], 3)
+        except FileNotFoundError:
+            logger.error(f"Image folder not found: {image_folder}")
+            raise
+
     try:
         images = []
         for filename in os.listdir(image_folder):
-            if filename.endswith((".jpg", ".jpeg", ".png")):
+            if filename.endswith(IMAGE_EXTENSIONS):
                 img_path = os.path.join(image_folder, filename)
                 processed_img = process_image(img_path, size)
                 images.append(processed_img)
@@ -180,13 +521,19 @@ def process_images(image_folder: Union[str, Path], size: Tuple[int, int] = IMAGE
         logger.error(f"Error processing images in {image_folder}: {str(e)}")
         raise ValueError(f"Error processing images: {str(e)}")
 
-def prepare_custom_dataset(selfies_folder: Union[str, Path], non_selfies_folder: Union[str, Path]) -> Tuple[np.ndarray, np.ndarray]:
+def prepare_custom_dataset(selfies_folder: Union[str, Path], non_selfies_folder: Union[str, Path], parallel: bool = False,
+                           workers: Optional[int] = None, cache: Optional[DatasetCache] = None) -> Tuple[np.ndarray, np.ndarray]:
     """
     Prepare a custom dataset from selfies and non-selfies folders.
 
     Args:
         selfies_folder (Union[str, Path]): Path to the folder containing selfie images
         non_selfies_folder (Union[str, Path]): Path to the folder containing non-selfie images
+        parallel (bool): If True, ingest both folders across a process pool straight into
+            one (features, N) buffer, skipping the concatenate and reshape copies
+        workers (Optional[int]): Number of worker processes when ``parallel`` is True
+        cache (Optional[DatasetCache]): Cache of preprocessed arrays. On a hit, no
+            image is decoded.
 
     Returns:
         Tuple[np.ndarray, np.ndarray]: X (features) and y (labels) arrays
@@ -195,7 +542,23 @@ def prepare_custom_dataset(selfies_folder: Union[str, Path], non_selfies_folder:
         FileNotFoundError: If either folder is not found
         ValueError: If there's an issue with image processing
     """
+    if cache is not None:
+        params = {"source": "custom", "image_size": IMAGE_SIZE, "flatten": True, "dtype": "float32"}
+        return cache.get_or_build(
+            [selfies_folder, non_selfies_folder],
+            params,
+            lambda: prepare_custom_dataset(selfies_folder, non_selfies_folder, parallel, workers),
+        )
+
     try:
+        if parallel:
+            selfie_paths = list_images(selfies_folder)
+            non_selfie_paths = list_images(non_selfies_folder)
+            X_flatten = ingest_images(selfie_paths + non_selfie_paths, workers=workers)
+            y = np.concatenate((np.ones(len(selfie_paths)), np.zeros(len(non_selfie_paths)))).reshape(1, -1)
+            logger.info("Custom dataset prepared successfully.")
+            return X_flatten, y
+
         X_selfies = process_images(selfies_folder)
         X_non_selfies = process_images(non_selfies_folder)
 
@@ -211,6 +574,7 @@ def prepare_custom_dataset(selfies_folder: Union[str, Path], non_selfies_folder:
         raise ValueError(f"Error preparing custom dataset: {str(e)}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     # Example usage
     try:
         # Load and preprocess the original dataset
@@ -0,0 +1,149 @@
+import numpy as np
+import logging
+from typing import Iterator, Optional, Tuple, Union
+import h5py
+from pathlib import Path
+
+from src.data.data_processing import get_dataset_path
+
+logger = logging.getLogger(__name__)
+
+
+class H5Dataset:
+    """
+    Lazy mini-batch reader over an image dataset stored in an h5 file.
+
+    Nothing is loaded at construction time. Iterating yields (X, y) mini-batches with
+    X of shape (features, batch) and y of shape (1, batch), read straight from the
+    file one batch at a time, so memory use is bounded by the batch size rather than
+    the dataset size.
+
+    Datasets stored with a contiguous, uncompressed layout are read through
+    ``np.memmap`` (zero-copy slicing of the file's pages). Chunked datasets are read
+    through h5py with the batch size rounded up to a whole number of chunks, so each
+    chunk is read and decompressed exactly once per epoch.
+
+    Args:
+        path (Union[str, Path]): Path to the h5 file
+        x_key (str): Name of the image dataset, shape (N, height, width, channels)
+        y_key (str): Name of the label dataset, shape (N,)
+        batch_size (int): Number of examples per mini-batch
+        shuffle (bool): If True, visit batches in a random order every epoch and
+            shuffle the examples within each batch
+        seed (Optional[int]): Seed for the shuffling random generator
+        normalize (bool): If True, yield float32 pixels scaled to [0, 1]. Otherwise
+            yield the raw stored pixels (a zero-copy view on the memmap path).
+        use_memmap (bool): Use the memmap path when the layout allows it
+
+    Usage:
+        dataset = H5Dataset.from_split(train=True, batch_size=128, shuffle=True)
+        for X_batch, y_batch in dataset:
+            ...
+    """
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            x_key: str,
+            y_key: str,
+            batch_size: int = 64,
+            shuffle: bool = False,
+            seed: Optional[int] = None,
+            normalize: bool = True,
+            use_memmap: bool = True,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.path = Path(path)
+        self.x_key = x_key
+        self.y_key = y_key
+        self.shuffle = shuffle
+        self.normalize = normalize
+        self._rng = np.random.default_rng(seed)
+
+        with h5py.File(str(self.path), "r") as dataset:
+            X = dataset[x_key]
+            self.shape = X.shape
+            self.dtype = X.dtype
+            self.chunks = X.chunks
+            offset = X.id.get_offset() if X.chunks is None and X.compression is None else None
+            # Labels are tiny compared to the images and are read once
+            self._labels = np.asarray(dataset[y_key][:]).reshape(1, -1)
+
+        if self._labels.shape[1] != self.shape[0]:
+            raise ValueError(f"{x_key} has {self.shape[0]} examples but {y_key} has {self._labels.shape[1]}")
+
+        self._offset = offset if use_memmap else None
+        if self.chunks is not None and batch_size % self.chunks[0]:
+            aligned = (batch_size // self.chunks[0] + 1) * self.chunks[0]
+            logger.info(f"Rounding batch size {batch_size} up to {aligned} to align with h5 chunks of {self.chunks[0]} rows.")
+            batch_size = aligned
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_split(cls, train: bool = True, **kwargs) -> "H5Dataset":
+        """
+        Open the cat/non-cat training or test set.
+
+        Args:
+            train (bool): If True, open the training set. Otherwise, open the test set.
+            **kwargs: Passed through to ``H5Dataset``
+
+        Returns:
+            H5Dataset: Lazy dataset over the split
+        """
+        prefix = "train" if train else "test"
+        return cls(get_dataset_path(train), f"{prefix}_set_x", f"{prefix}_set_y", **kwargs)
+
+    @property
+    def num_examples(self) -> int:
+        return self.shape[0]
+
+    @property
+    def num_features(self) -> int:
+        return int(np.prod(self.shape[1:]))
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._labels
+
+    def __len__(self) -> int:
+        return -(-self.num_examples // self.batch_size)
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        return self.iter_batches()
+
+    def iter_batches(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield one epoch of (X, y) mini-batches.
+
+        Yields:
+            Tuple[np.ndarray, np.ndarray]: X of shape (features, batch) and y of shape (1, batch)
+        """
+        starts = np.arange(0, self.num_examples, self.batch_size)
+        if self.shuffle:
+            self._rng.shuffle(starts)
+
+        if self._offset is not None:
+            X = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self._offset, shape=self.shape)
+            for start in starts:
+                yield self._make_batch(X[start:start + self.batch_size], start)
+            return
+
+        with h5py.File(str(self.path), "r") as dataset:
+            X = dataset[self.x_key]
+            for start in starts:
+                yield self._make_batch(X[start:start + self.batch_size], start)
+
+    def _make_batch(self, raw: np.ndarray, start: int) -> Tuple[np.ndarray, np.ndarray]:
+        y = self._labels[:, start:start + raw.shape[0]]
+        if self.shuffle:
+            order = self._rng.permutation(raw.shape[0])
+            raw = raw[order]
+            y = y[:, order]
+
+        X = raw.reshape(raw.shape[0], -1).T
+        if self.normalize:
+            X = np.divide(X, 255.0, dtype=np.float32)
+        return X, y
@@ -0,0 +1,137 @@
+import numpy as np
+import argparse
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _cumulative_counts(scores: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sort by descending score once and count true and false positives at every
+    distinct score, i.e. for every threshold that changes a prediction.
+    """
+    scores = np.asarray(scores, dtype=np.float64).ravel()
+    labels = np.asarray(labels).ravel()
+    if scores.shape != labels.shape:
+        raise ValueError("Shapes of scores and labels must match")
+    if scores.size == 0:
+        raise ValueError("Scores and labels must not be empty")
+
+    order = np.argsort(scores, kind="stable")[::-1]
+    sorted_scores = scores[order]
+    positives = labels[order] == 1
+
+    # Last index of every run of equal scores: ties switch class together
+    distinct = np.flatnonzero(np.diff(sorted_scores)) if sorted_scores.size > 1 else np.empty(0, dtype=np.intp)
+    ends = np.append(distinct, sorted_scores.size - 1)
+    true_positives = np.cumsum(positives)[ends]
+    false_positives = (ends + 1) - true_positives
+    return sorted_scores[ends], true_positives, false_positives
+
+
+def compute_curves(scores: np.ndarray, labels: np.ndarray) -> Dict[str, Any]:
+    """
+    Compute the ROC and precision-recall curves, their areas and the threshold with
+    the best F1 score, all from a single O(n log n) sort of the scores.
+
+    Point ``i`` of each curve is the rule "predict 1 when the score is at least
+    ``thresholds[i]``". The returned ``best_threshold`` is the midpoint between the
+    best-F1 score and the next lower score, for use with ``score > threshold``
+    (as in ``LogisticRegression.predict``). It is picked in the scores' dtype, so the
+    comparison reproduces the best-F1 predictions even between adjacent float32 scores.
+
+    Args:
+        scores (np.ndarray): Predicted probabilities (or any score, higher meaning class 1)
+        labels (np.ndarray): True labels (0 or 1), same shape as scores
+
+    Returns:
+        Dict[str, Any]: thresholds, fpr, tpr, precision and recall arrays; roc_auc;
+            average_precision; best_threshold with its f1_score, precision and recall
+
+    Raises:
+        ValueError: If the shapes don't match, the input is empty, or only one class is present
+    """
+    scores = np.asarray(scores)
+    score_type = scores.dtype.type if np.issubdtype(scores.dtype, np.floating) else np.float64
+    thresholds, true_positives, false_positives = _cumulative_counts(scores, labels)
+    num_positives = true_positives[-1]
+    num_negatives = false_positives[-1]
+    if num_positives == 0 or num_negatives == 0:
+        raise ValueError("Both classes must be present to compute ROC and PR curves")
+
+    tpr = true_positives / num_positives
+    fpr = false_positives / num_negatives
+    precision = true_positives / (true_positives + false_positives)
+    recall = tpr
+
+    # Trapezoidal ROC area, starting from (0, 0)
+    roc_tpr = np.concatenate(([0.0], tpr))
+    roc_fpr = np.concatenate(([0.0], fpr))
+    roc_auc = float(np.sum(np.diff(roc_fpr) * (roc_tpr[1:] + roc_tpr[:-1]) / 2))
+    # Step-wise PR area: precision weighted by each increase in recall
+    average_precision = float(np.sum(np.diff(np.concatenate(([0.0], recall))) * precision))
+
+    f1_scores = 2 * true_positives / (true_positives + false_positives + num_positives)
+    best = int(np.argmax(f1_scores))
+    best_score = score_type(thresholds[best])
+    next_score = score_type(thresholds[best + 1] if best + 1 < thresholds.size else max(thresholds[best] - 1e-6, 0.0))
+    # Predictions compare scores in their own dtype, where the midpoint of two adjacent
+    # values (common for a saturated sigmoid) rounds onto one of them: keep it in
+    # [next_score, best_score) so that ``score > best_threshold`` splits the two
+    midpoint = score_type((best_score + next_score) / score_type(2))
+    best_threshold = float(max(min(midpoint, np.nextafter(best_score, next_score)), next_score))
+
+    return {
+        "thresholds": thresholds,
+        "fpr": fpr,
+        "tpr": tpr,
+        "precision": precision,
+        "recall": recall,
+        "roc_auc": roc_auc,
+        "average_precision": average_precision,
+        "best_threshold": best_threshold,
+        "best_f1_score": float(f1_scores[best]),
+        "best_precision": float(precision[best]),
+        "best_recall": float(recall[best]),
+    }
+
+
+def collect_scores(model, batches: Iterable[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict probabilities for a stream of (X, y) batches, keeping only the scores and labels.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Scores and labels, each of shape (m,)
+    """
+    scores = []
+    labels = []
+    for X_batch, y_batch in batches:
+        scores.append(np.asarray(model.predict_proba(X_batch)).ravel())
+        labels.append(np.asarray(y_batch).ravel())
+    return np.concatenate(scores), np.concatenate(labels)
+
+
+if __name__ == "__main__":
+    from src.data.h5_dataset import H5Dataset
+    from src.models.artifact import set_threshold
+    from src.models.logistic_regression_nn import LogisticRegression
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Compute ROC/PR curves and the best-F1 decision threshold.")
+    parser.add_argument("--model-path", type=Path, default=Path("model/latest"))
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--save-threshold", action="store_true",
+                        help="Store the best-F1 threshold in the model artifact header")
+    args = parser.parse_args()
+
+    model = LogisticRegression.load(args.model_path)
+    scores, labels = collect_scores(model, H5Dataset.from_split(train=False, batch_size=args.batch_size))
+    curves = compute_curves(scores, labels)
+    print(f"ROC AUC: {curves['roc_auc']:.4f}  Average precision: {curves['average_precision']:.4f}")
+    print(f"Best F1 {curves['best_f1_score']:.4f} at threshold {curves['best_threshold']:.6f} "
+          f"(precision {curves['best_precision']:.4f}, recall {curves['best_recall']:.4f})")
+
+    if args.save_threshold:
+        set_threshold(args.model_path, curves["best_threshold"])
@@ -1,13 +1,19 @@
 import numpy as np
+import argparse
 import logging
-from typing import Dict, Any
+import queue
+import resource
+import sys
+import threading
+import time
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
-from src.data.data_processing import load_dataset, preprocess_data
+from src.data.cache import DatasetCache
+from src.data.data_processing import iter_image_folder_batches, load_preprocessed_dataset
+from src.data.h5_dataset import H5Dataset
 from src.models.logistic_regression_nn import LogisticRegression
-from src.utils.metrics import calculate_accuracy, calculate_f1_score
+from src.utils.metrics import MetricsAccumulator, calculate_accuracy, calculate_f1_score
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def load_model(model_path: Path) -> LogisticRegression:
@@ -62,12 +68,123 @@ def evaluate_model(model: LogisticRegression, X_test: np.ndarray, y_test: np.nda
         logger.error(f"Error in model evaluation: {str(e)}")
         raise ValueError(f"Error in model evaluation: {str(e)}")
 
-def main(model_path: Path) -> Dict[str, Any]:
+def prefetch(batches: Iterable[Tuple[np.ndarray, np.ndarray]], depth: int = 2) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Read batches on a background thread, up to ``depth`` batches ahead of the consumer,
+    so that loading batch k + 1 overlaps with predicting batch k.
+
+    Args:
+        batches (Iterable[Tuple[np.ndarray, np.ndarray]]): Source of (X, y) batches
+        depth (int): Maximum number of batches loaded ahead
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: The source batches, in order
+
+    Raises:
+        Exception: Any error raised while reading a batch, re-raised in the consumer
+    """
+    done = object()
+    buffer: "queue.Queue" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                if stop.is_set():
+                    return
+                buffer.put(batch)
+            buffer.put(done)
+        except BaseException as e:
+            buffer.put(e)
+
+    thread = threading.Thread(target=produce, name="eval-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock the producer if it is waiting for room
+        while thread.is_alive():
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                thread.join(timeout=0.1)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def evaluate_model_batches(model: LogisticRegression, batches: Iterable[Tuple[np.ndarray, np.ndarray]],
+                           prefetch_depth: int = 2) -> Dict[str, Any]:
+    """
+    Evaluate the model on a stream of (X, y) mini-batches, e.g. an ``H5Dataset``.
+
+    Batches are loaded on a prefetch thread while the previous batch is predicted, and
+    metrics are accumulated in a confusion matrix, so memory is bounded by a few
+    batches however large the test set is.
+
+    Args:
+        model (LogisticRegression): Trained model
+        batches (Iterable[Tuple[np.ndarray, np.ndarray]]): Mini-batches with X of shape
+            (features, batch) and y of shape (1, batch)
+        prefetch_depth (int): Number of batches loaded ahead. 0 disables prefetching.
+
+    Returns:
+        Dict[str, Any]: Evaluation metrics (see ``metrics_from_confusion_matrix``) and a
+            ``performance`` entry with the throughput in images/s, time spent waiting
+            for data and predicting, and the peak resident memory of the process
+
+    Raises:
+        ValueError: If there's an issue with model evaluation
+    """
+    try:
+        accumulator = MetricsAccumulator()
+        predict_time = 0.0
+        start_time = time.perf_counter()
+        for X_batch, y_batch in (prefetch(batches, prefetch_depth) if prefetch_depth > 0 else batches):
+            predict_start = time.perf_counter()
+            accumulator.update(model.predict(X_batch), y_batch)
+            predict_time += time.perf_counter() - predict_start
+        elapsed = time.perf_counter() - start_time
+
+        metrics = accumulator.compute()
+        metrics["confusion_matrix"] = metrics["confusion_matrix"].tolist()
+        metrics["performance"] = {
+            "images": accumulator.count,
+            "seconds": elapsed,
+            "images_per_second": accumulator.count / elapsed if elapsed > 0 else 0.0,
+            "predict_seconds": predict_time,
+            "load_wait_seconds": elapsed - predict_time,
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+
+        logger.info(f"Model evaluation completed. Metrics: {metrics}")
+        return metrics
+    except Exception as e:
+        logger.error(f"Error in model evaluation: {str(e)}")
+        raise ValueError(f"Error in model evaluation: {str(e)}")
+
+def main(model_path: Path, batch_size: Optional[int] = None, image_folders: Optional[Dict[str, int]] = None,
+         prefetch_depth: int = 2) -> Dict[str, Any]:
     """
     Main function to load the model and evaluate it on the test set.
 
     Args:
         model_path (Path): Path to the saved model file
+        batch_size (Optional[int]): If given, stream the test set from disk in
+            mini-batches of this size instead of loading it into memory
+        image_folders (Optional[Dict[str, int]]): Evaluate on labeled image folders
+            (folder path to label) instead of the h5 test set. Always streamed.
+        prefetch_depth (int): Number of batches loaded ahead when streaming
 
     Returns:
         Dict[str, Any]: Dictionary containing evaluation results
@@ -76,18 +193,29 @@ def main(model_path: Path) -> Dict[str, Any]:
         Exception: If there's any error during the evaluation process
     """
     try:
-        # Load test data
-        X_test, y_test = load_dataset(train=False)
-        X_test = preprocess_data(X_test)
-
         # Load trained model
         model = load_model(model_path)
 
-        # Evaluate model
-        metrics = evaluate_model(model, X_test, y_test)
+        if image_folders:
+            # Decode the image folders batch by batch
+            batches = iter_image_folder_batches(image_folders, batch_size=batch_size or 256)
+            metrics = evaluate_model_batches(model, batches, prefetch_depth)
+            test_set_size = metrics["support"]
+        elif batch_size:
+            # Stream test data from disk
+            test_set = H5Dataset.from_split(train=False, batch_size=batch_size)
+            metrics = evaluate_model_batches(model, test_set, prefetch_depth)
+            test_set_size = test_set.num_examples
+        else:
+            # Load test data
+            X_test, y_test = load_preprocessed_dataset(train=False, cache=DatasetCache())
+
+            # Evaluate model
+            metrics = evaluate_model(model, X_test, y_test)
+            test_set_size = X_test.shape[1]
 
         results = {
-            "test_set_size": X_test.shape[1],
+            "test_set_size": test_set_size,
             "metrics": metrics
         }
 
@@ -97,10 +225,25 @@ def main(model_path: Path) -> Dict[str, Any]:
         logger.error(f"Error in evaluation process: {str(e)}")
         raise
 
+def _parse_labeled_folder(value: str) -> Tuple[str, int]:
+    folder, _, label = value.rpartition("=")
+    if not folder:
+        raise argparse.ArgumentTypeError(f"Expected FOLDER=LABEL, got {value}")
+    return folder, int(label)
+
 if __name__ == "__main__":
-    model_path = Path("models/trained_model.pkl")
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Evaluate the classifier on the test set.")
+    parser.add_argument("--model-path", type=Path, default=Path("model/latest"))
+    parser.add_argument("--batch-size", type=int, default=None, help="Stream the test set in batches of this size")
+    parser.add_argument("--image-folder", type=_parse_labeled_folder, action="append", default=[],
+                        metavar="FOLDER=LABEL", help="Evaluate on a labeled image folder (repeatable)")
+    parser.add_argument("--prefetch", type=int, default=2, help="Batches loaded ahead while streaming")
+    args = parser.parse_args()
+
+    model_path = args.model_path
     try:
-        results = main(model_path)
+        results = main(model_path, args.batch_size, dict(args.image_folder) or None, args.prefetch)
         print(f"Evaluation Results: {results}")
     except Exception as e:
         logger.error(f"Evaluation failed: {str(e)}")
\ No newline at end of file
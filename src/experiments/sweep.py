@@ -0,0 +1,228 @@
+import numpy as np
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from src.models.logistic_regression_nn import LogisticRegression
+from src.utils.metrics import confusion_matrix, metrics_from_confusion_matrix
+
+logger = logging.getLogger(__name__)
+
+# Training data shared with the pool workers, memory-mapped read-only
+_shared: Dict[str, np.ndarray] = {}
+
+_BLAS_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Expand a parameter grid into the list of every combination.
+
+    Args:
+        grid (Dict[str, List[Any]]): Parameter name to list of candidate values
+
+    Returns:
+        List[Dict[str, Any]]: One ``LogisticRegression.fit`` keyword dict per combination
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _attach(data_dir: str) -> None:
+    for name in ("X", "y", "X_val", "y_val"):
+        path = os.path.join(data_dir, f"{name}.npy")
+        if os.path.exists(path):
+            _shared[name] = np.load(path, mmap_mode="r")
+
+
+def _validation_cost(model: LogisticRegression, X: np.ndarray, y: np.ndarray) -> float:
+    z = np.dot(model.w.T, X) + model.b
+    return float(np.mean(np.logaddexp(0, z) - y * z))
+
+
+def _train_config(config: Dict[str, Any], num_iterations: int) -> Dict[str, Any]:
+    X, y = _shared["X"], _shared["y"]
+    X_val, y_val = _shared.get("X_val", X), _shared.get("y_val", y)
+
+    start_time = time.time()
+    model = LogisticRegression().fit(X, y, num_iterations=num_iterations, **config)
+    scores = metrics_from_confusion_matrix(confusion_matrix(model.predict(X_val), y_val))
+
+    return {
+        "config": config,
+        "num_iterations": num_iterations,
+        "stop_reason": model.stop_reason,
+        "final_cost": model.costs[-1] if model.costs else None,
+        "costs": [float(cost) for cost in model.costs],
+        "validation_cost": _validation_cost(model, X_val, y_val),
+        "accuracy": scores["accuracy"],
+        "f1_score": scores["f1_score"],
+        "mcc": scores["mcc"],
+        "duration": time.time() - start_time,
+    }
+
+
+@contextmanager
+def _limit_blas_threads(threads: int) -> Iterator[None]:
+    # Read by each worker's BLAS when it initializes. Workers must be spawned, not
+    # forked: a forked worker inherits the parent's already initialized thread pool.
+    saved = {name: os.environ.get(name) for name in _BLAS_THREAD_VARS}
+    os.environ.update({name: str(threads) for name in _BLAS_THREAD_VARS})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _share_arrays(data_dir: Path, **arrays: Optional[np.ndarray]) -> None:
+    for name, array in arrays.items():
+        if array is not None:
+            np.save(data_dir / f"{name}.npy", np.asarray(array, dtype=np.float32))
+
+
+def run_sweep(
+        X: np.ndarray,
+        y: np.ndarray,
+        grid: Dict[str, List[Any]],
+        results_path: Union[str, Path],
+        num_iterations: int = 2000,
+        X_val: Optional[np.ndarray] = None,
+        y_val: Optional[np.ndarray] = None,
+        workers: Optional[int] = None,
+        successive_halving: bool = False,
+        min_iterations: int = 100,
+        eta: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Train every configuration in a parameter grid in parallel across a process pool.
+
+    The training and validation arrays are written once as float32 ``.npy`` files
+    (in /dev/shm when available) that every worker memory-maps read-only, so the
+    data is shared through the page cache instead of being pickled to each worker.
+    Each result is appended to ``results_path`` as a JSON line as soon as it finishes.
+    Workers are spawned with their BLAS limited to ``cpu_count // workers`` threads,
+    so the pool does not oversubscribe the cores.
+
+    With ``successive_halving``, all configurations first train for ``min_iterations``;
+    only the best ``1 / eta`` by validation cost advance to a rung with ``eta`` times
+    the budget, until ``num_iterations`` is reached.
+
+    Args:
+        X (np.ndarray): Training data of shape (n_features, m)
+        y (np.ndarray): Training labels of shape (1, m)
+        grid (Dict[str, List[Any]]): ``LogisticRegression.fit`` keyword name to candidate
+            values, e.g. learning_rate, l2, batch_size, optimizer. A ``num_iterations``
+            entry sets per-configuration budgets when successive halving is off.
+        results_path (Union[str, Path]): JSON lines file the results are appended to
+        num_iterations (int): Iteration budget (the final rung budget with successive halving)
+        X_val (Optional[np.ndarray]): Validation data. Defaults to the training data.
+        y_val (Optional[np.ndarray]): Validation labels
+        workers (Optional[int]): Number of worker processes. Defaults to the CPU count.
+        successive_halving (bool): Kill poorly performing configurations early
+        min_iterations (int): Budget of the first successive-halving rung
+        eta (int): Successive-halving reduction factor
+
+    Returns:
+        List[Dict[str, Any]]: Results of the final rung, best validation cost first
+    """
+    workers = workers or os.cpu_count() or 1
+    configs = expand_grid(grid)
+    shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    data_dir = Path(tempfile.mkdtemp(prefix="sweep-", dir=shm_dir))
+
+    try:
+        _share_arrays(data_dir, X=X, y=y, X_val=X_val, y_val=y_val)
+
+        if successive_halving:
+            rungs = []
+            budget = min_iterations
+            while budget < num_iterations:
+                rungs.append(budget)
+                budget *= eta
+            rungs.append(num_iterations)
+        else:
+            rungs = [None]
+
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with open(results_path, "a") as results_file, _limit_blas_threads(threads), \
+                ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                    initializer=_attach, initargs=(str(data_dir),)) as executor:
+            for rung, budget in enumerate(rungs):
+                if len(configs) == 1 and rung < len(rungs) - 1 and rung > 0:
+                    # A single survivor goes straight to the full budget
+                    continue
+                logger.info(f"Sweep rung {rung}: {len(configs)} configurations")
+                pending = set()
+                for config in configs:
+                    config = dict(config)
+                    config_iterations = config.pop("num_iterations", num_iterations)
+                    iterations = budget or config_iterations
+                    pending.add(executor.submit(_train_config, config, iterations))
+
+                results = []
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        result["rung"] = rung
+                        results_file.write(json.dumps(result) + "\n")
+                        results_file.flush()
+                        results.append(result)
+
+                results.sort(key=lambda result: result["validation_cost"])
+                if rung < len(rungs) - 1:
+                    configs = [result["config"] for result in results[:max(1, len(results) // eta)]]
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    logger.info(f"Sweep completed. Best configuration: {results[0]['config'] if results else None}")
+    return results
+
+
+def _parse_batch_size(value: str) -> Optional[int]:
+    return None if value.lower() == "none" else int(value)
+
+
+if __name__ == "__main__":
+    from src.data.cache import DatasetCache
+    from src.data.data_processing import load_preprocessed_dataset
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Run a parallel hyperparameter sweep.")
+    parser.add_argument("--learning-rates", type=float, nargs="+", default=[0.001, 0.005, 0.01])
+    parser.add_argument("--l2", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--batch-sizes", type=_parse_batch_size, nargs="+", default=[None])
+    parser.add_argument("--optimizers", nargs="+", default=["gd"])
+    parser.add_argument("--num-iterations", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--successive-halving", action="store_true")
+    parser.add_argument("--min-iterations", type=int, default=100)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--output", default="sweep_results.jsonl")
+    args = parser.parse_args()
+
+    X_train, y_train = load_preprocessed_dataset(train=True, cache=DatasetCache())
+    X_test, y_test = load_preprocessed_dataset(train=False, cache=DatasetCache())
+    grid = {
+        "learning_rate": args.learning_rates,
+        "l2": args.l2,
+        "batch_size": args.batch_sizes,
+        "optimizer": args.optimizers,
+    }
+    best = run_sweep(X_train, y_train, grid, args.output, args.num_iterations, X_test, y_test, args.workers,
+                     args.successive_halving, args.min_iterations, args.eta)
+    print(f"Best configuration: {best[0]['config']} (validation cost {best[0]['validation_cost']:.4f})")
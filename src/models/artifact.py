@@ -0,0 +1,317 @@
+import numpy as np
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Constants
+FORMAT_VERSION = 1
+HEADER_FILE = "model.json"
+WEIGHTS_FILE = "w.npy"
+# Symlink that points at the artifact to serve
+LATEST_LINK = "latest"
+
+
+def _file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def save_artifact(model, directory: Union[str, Path], version: Optional[str] = None,
+                  metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Save a model as a versioned, memory-mappable artifact directory.
+
+    The directory holds the raw weights as ``w.npy`` (float32, or float16/int8 for a
+    model returned by ``LogisticRegression.quantize``) and a small JSON header
+    (``model.json``) with the format version, shapes, dtype, bias, preprocessing
+    parameters, training metadata and a SHA-256 checksum of the weights file. Each
+    file is replaced with an atomic rename, the weights first. Overwriting an existing
+    artifact this way is not atomic as a whole: a reader loading between the two
+    renames sees the new weights with the old header, which the checksum detects and
+    ``load_artifact`` rejects. Use ``publish_artifact`` to switch readers over to a
+    complete new version in one step.
+
+    Args:
+        model (LogisticRegression): Trained model
+        directory (Union[str, Path]): Destination directory (created if missing)
+        version (Optional[str]): Model version label. Defaults to a prefix of the checksum.
+        metadata (Optional[Dict[str, Any]]): Extra JSON-serializable training metadata
+
+    Returns:
+        Dict[str, Any]: The header that was written
+
+    Raises:
+        ValueError: If the model is not trained
+    """
+    from src.data.data_processing import IMAGE_SIZE
+
+    if model.w is None:
+        raise ValueError("Model is not trained")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    weight_scale = getattr(model, "weight_scale", None)
+    quantized = weight_scale is not None or model.w.dtype == np.float16
+    w = np.ascontiguousarray(model.w, dtype=model.w.dtype if quantized else np.float32)
+
+    weights_path = directory / WEIGHTS_FILE
+
+    def write_weights(path: Path) -> None:
+        with open(path, "wb") as f:
+            np.save(f, w)
+
+    _write_atomic(weights_path, write_weights)
+    checksum = _file_checksum(weights_path)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_class": type(model).__name__,
+        "version": version or checksum[:12],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "weights": {"file": WEIGHTS_FILE, "shape": list(w.shape), "dtype": str(w.dtype), "sha256": checksum},
+        "bias": float(model.b),
+        "threshold": float(getattr(model, "threshold", 0.5)),
+        "quantization": {"dtype": str(w.dtype), "scale": weight_scale} if quantized else None,
+        "preprocessing": {"image_size": list(IMAGE_SIZE), "channels": 3, "scale": 1 / 255.0, "flatten": True},
+        "training": {
+            "stop_reason": getattr(model, "stop_reason", None),
+            "stop_iteration": getattr(model, "stop_iteration", None),
+            "final_cost": float(model.costs[-1]) if getattr(model, "costs", None) else None,
+            **(metadata or {}),
+        },
+    }
+    _write_atomic(directory / HEADER_FILE, lambda path: path.write_text(json.dumps(header, indent=2)))
+    logger.info(f"Model artifact {header['version']} saved to {directory}")
+    return header
+
+
+def link_artifact(link: Union[str, Path], directory: Union[str, Path]) -> None:
+    """
+    Atomically point a symlink (e.g. ``model/latest``) at an artifact directory.
+
+    A new link is created next to the old one and renamed over it, so a reader
+    resolving the link sees either the old or the new artifact, never a missing or
+    partial one. Targets in the link's own directory are linked relatively, so the
+    model directory can be moved or mounted elsewhere.
+
+    Args:
+        link (Union[str, Path]): Symlink to create or repoint
+        directory (Union[str, Path]): Artifact directory it should point at
+
+    Raises:
+        FileNotFoundError: If the artifact directory has no header
+        ValueError: If ``link`` exists and is not a symlink
+    """
+    link, directory = Path(link), Path(directory)
+    if not (directory / HEADER_FILE).is_file():
+        raise FileNotFoundError(f"No model artifact in {directory}")
+    if link.exists() and not link.is_symlink():
+        raise ValueError(f"{link} exists and is not a symlink")
+
+    directory = directory.resolve()
+    link_parent = link.parent.resolve()
+    target = directory.relative_to(link_parent) if directory.parent == link_parent else directory
+    tmp_link = link.with_name(f".{link.name}.tmp-{os.getpid()}")
+    if tmp_link.is_symlink():
+        tmp_link.unlink()
+    os.symlink(target, tmp_link, target_is_directory=True)
+    os.replace(tmp_link, link)
+
+
+def publish_artifact(model, root: Union[str, Path], version: Optional[str] = None,
+                     metadata: Optional[Dict[str, Any]] = None, link_name: str = LATEST_LINK) -> Dict[str, Any]:
+    """
+    Save a model as a new version directory under ``root`` and point ``root/latest`` at it.
+
+    The artifact is written completely into ``root/<version>`` before the link is
+    swapped with ``link_artifact``, so a process loading ``root/latest`` always gets
+    a header and weights that belong together. Earlier versions stay in place, so the
+    link can be pointed back at one of them. An existing ``latest`` that is a plain
+    artifact directory (as older releases wrote) is first moved to its version's
+    directory.
+
+    Args:
+        model (LogisticRegression): Trained model
+        root (Union[str, Path]): Model directory, e.g. ``model``
+        version (Optional[str]): Model version label. Defaults to a prefix of the checksum.
+        metadata (Optional[Dict[str, Any]]): Extra JSON-serializable training metadata
+        link_name (str): Name of the link to repoint
+
+    Returns:
+        Dict[str, Any]: The header that was written
+
+    Raises:
+        ValueError: If the model is not trained, or a different artifact already has this version
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    link = root / link_name
+    if link.is_dir() and not link.is_symlink():
+        legacy_version = read_header(link)["version"]
+        os.rename(link, root / legacy_version)
+        link_artifact(link, root / legacy_version)
+        logger.info(f"Moved model artifact {legacy_version} from {link} to {root / legacy_version}")
+
+    staging = root / f".staging-{os.getpid()}"
+    try:
+        header = save_artifact(model, staging, version, metadata)
+        directory = root / header["version"]
+        if directory.exists():
+            if read_header(directory)["weights"]["sha256"] != header["weights"]["sha256"]:
+                raise ValueError(f"A different model artifact with version {header['version']} exists in {root}")
+            header = read_header(directory)
+        else:
+            os.rename(staging, directory)
+    finally:
+        if staging.exists():
+            for path in staging.iterdir():
+                path.unlink()
+            staging.rmdir()
+
+    link_artifact(link, directory)
+    logger.info(f"Model artifact {header['version']} published as {link}")
+    return header
+
+
+def read_header(directory: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read and validate an artifact's JSON header.
+
+    Args:
+        directory (Union[str, Path]): Artifact directory
+
+    Returns:
+        Dict[str, Any]: The header
+
+    Raises:
+        FileNotFoundError: If the artifact header is not found
+        ValueError: If the artifact format version is not supported
+    """
+    header = json.loads((Path(directory) / HEADER_FILE).read_text())
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format version: {header.get('format_version')}")
+    return header
+
+
+def load_artifact(directory: Union[str, Path], mmap: bool = True, verify: bool = True):
+    """
+    Load a model artifact.
+
+    With ``mmap`` the weights are mapped read-only with ``np.load(mmap_mode='r')``, so
+    every process serving the same artifact shares one copy of the weights through
+    the OS page cache, and loading costs a header parse and a file map.
+
+    Args:
+        directory (Union[str, Path]): Artifact directory
+        mmap (bool): Memory-map the weights instead of reading them into memory
+        verify (bool): Check the weights file against the header checksum
+
+    Returns:
+        LogisticRegression: The loaded model, with the header available as ``model.artifact``
+
+    Raises:
+        FileNotFoundError: If the artifact is not found
+        ValueError: If the artifact is corrupt or does not match its header
+    """
+    from src.models.logistic_regression_nn import LogisticRegression
+
+    directory = Path(directory)
+    header = read_header(directory)
+    weights = header["weights"]
+    weights_path = directory / weights["file"]
+
+    if verify and _file_checksum(weights_path) != weights["sha256"]:
+        raise ValueError(f"Checksum mismatch for {weights_path}")
+
+    w = np.load(weights_path, mmap_mode="r" if mmap else None)
+    if list(w.shape) != weights["shape"] or str(w.dtype) != weights["dtype"]:
+        raise ValueError(f"Weights {w.shape} {w.dtype} do not match header {weights['shape']} {weights['dtype']}")
+
+    model = LogisticRegression()
+    model.w = w
+    model.b = header["bias"]
+    model.threshold = header.get("threshold", 0.5)
+    model.weight_scale = (header.get("quantization") or {}).get("scale")
+    model.stop_reason = header["training"].get("stop_reason")
+    model.stop_iteration = header["training"].get("stop_iteration")
+    model.artifact = header
+    logger.info(f"Model artifact {header['version']} loaded from {directory}")
+    return model
+
+
+def set_threshold(directory: Union[str, Path], threshold: float) -> Dict[str, Any]:
+    """
+    Store a new decision threshold in an artifact's header, leaving the weights as is.
+
+    The header is replaced atomically, so a serving process watching the artifact
+    picks up the new threshold on its next reload.
+
+    Args:
+        directory (Union[str, Path]): Artifact directory
+        threshold (float): Probability above which the model predicts 1
+
+    Returns:
+        Dict[str, Any]: The updated header
+
+    Raises:
+        ValueError: If the threshold is not in [0, 1]
+    """
+    if not 0.0 <= threshold <= 1.0:
+        raise ValueError(f"Threshold must be in [0, 1], got {threshold}")
+    directory = Path(directory)
+    header = read_header(directory)
+    header["threshold"] = float(threshold)
+    _write_atomic(directory / HEADER_FILE, lambda path: path.write_text(json.dumps(header, indent=2)))
+    logger.info(f"Model artifact {header['version']} threshold set to {threshold:.6f}")
+    return header
+
+
+def convert_pickle(pickle_path: Union[str, Path], directory: Union[str, Path],
+                   version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert a pickled model into the artifact format.
+
+    Args:
+        pickle_path (Union[str, Path]): Pickled model file
+        directory (Union[str, Path]): Destination artifact directory
+        version (Optional[str]): Model version label
+
+    Returns:
+        Dict[str, Any]: The header that was written
+    """
+    from src.models.logistic_regression_nn import LogisticRegression
+
+    model = LogisticRegression.load(pickle_path)
+    return save_artifact(model, directory, version, metadata={"converted_from": str(pickle_path)})
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Convert a pickled model into a memory-mappable artifact.")
+    parser.add_argument("pickle_path")
+    parser.add_argument("directory")
+    parser.add_argument("--version", default=None)
+    args = parser.parse_args()
+
+    header = convert_pickle(args.pickle_path, args.directory, args.version)
+    print(f"Converted {args.pickle_path} to {args.directory} (version {header['version']})")
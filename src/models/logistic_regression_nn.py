@@ -0,0 +1,421 @@
+import numpy as np
+import logging
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.models.artifact import load_artifact, save_artifact
+from src.models.trainer import BatchSource, MultiTrainer, Trainer
+
+logger = logging.getLogger(__name__)
+
+# Pixel scale applied by preprocess_data, folded into the weights for raw uint8 input
+PIXEL_SCALE = 1 / 255.0
+# float32 elements converted at a time by the uint8 path (1 MiB, small enough to stay in cache)
+UINT8_BLOCK_ELEMENTS = 1 << 18
+# Weight dtypes ``quantize`` can export
+QUANTIZED_DTYPES = ("float16", "int8")
+INT8_MAX = 127
+
+
+def sigmoid(z: np.ndarray) -> np.ndarray:
+    """
+    Compute the sigmoid of z.
+
+    Args:
+        z (np.ndarray): A scalar or numpy array of any size
+
+    Returns:
+        np.ndarray: sigmoid(z)
+    """
+    return 1 / (1 + np.exp(-z))
+
+
+class LogisticRegression:
+    """
+    Logistic regression classifier trained with gradient descent, following the
+    "Logistic Regression with a Neural Network mindset" notebook.
+
+    Attributes:
+        w (np.ndarray): Weights of shape (n_features, 1)
+        b (float): Bias
+        costs (List[float]): Training costs recorded during ``fit``
+        stop_reason (Optional[str]): Criterion that ended the last ``fit``: 'max_iterations',
+            'tol', 'grad_tol' or 'patience'
+        stop_iteration (Optional[int]): Iteration at which the last ``fit`` stopped
+        artifact (Optional[Dict[str, Any]]): Artifact header, when loaded from an artifact directory
+        threshold (float): Probability above which ``predict`` returns 1
+        weight_scale (Optional[float]): For int8 weights, the scale that maps them back
+            to real weights (``w * weight_scale``). None for float weights.
+    """
+
+    def __init__(self) -> None:
+        self.w: Optional[np.ndarray] = None
+        self.b: float = 0.0
+        self.costs: List[float] = []
+        self.stop_reason: Optional[str] = None
+        self.stop_iteration: Optional[int] = None
+        self.artifact: Optional[Dict[str, Any]] = None
+        self.threshold: float = 0.5
+        self.weight_scale: Optional[float] = None
+        self._weight_cache: Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Cached weight variants are derived from w and not worth storing in pickles
+        state = self.__dict__.copy()
+        state.pop("_weight_cache", None)
+        return state
+
+    def fit(
+            self,
+            X: np.ndarray,
+            y: np.ndarray,
+            num_iterations: int = 2000,
+            learning_rate: float = 0.005,
+            optimizer: str = "gd",
+            batch_size: Optional[int] = None,
+            print_cost: bool = False,
+            seed: Optional[int] = None,
+            tol: Optional[float] = None,
+            grad_tol: Optional[float] = None,
+            patience: Optional[int] = None,
+            validation_split: float = 0.0,
+            X_val: Optional[np.ndarray] = None,
+            y_val: Optional[np.ndarray] = None,
+            **optimizer_params,
+    ) -> "LogisticRegression":
+        """
+        Train the model on in-memory data, optionally stopping early once converged.
+
+        Args:
+            X (np.ndarray): Training data of shape (n_features, m)
+            y (np.ndarray): Labels of shape (1, m)
+            num_iterations (int): Number of passes over the data
+            learning_rate (float): Step size
+            optimizer (str): One of 'gd', 'sgd', 'momentum' or 'adam'
+            batch_size (Optional[int]): Mini-batch size. None uses the full batch.
+            print_cost (bool): Log the cost every 100 iterations
+            seed (Optional[int]): Seed for mini-batch shuffling
+            tol (Optional[float]): Stop when the relative change in cost falls below this value
+            grad_tol (Optional[float]): Stop when the gradient norm falls below this value
+            patience (Optional[int]): Stop when the validation cost has not improved for this
+                many validation checks, keeping the best weights. Requires ``X_val`` or a
+                ``validation_split``.
+            validation_split (float): Fraction of examples (taken from the end of X) held out
+                as validation data when ``X_val`` is not given
+            X_val (Optional[np.ndarray]): Validation data of shape (n_features, m_val)
+            y_val (Optional[np.ndarray]): Validation labels of shape (1, m_val)
+            **optimizer_params: Extra ``Trainer`` arguments (l2, beta, beta1, beta2, epsilon, shuffle,
+                validation_every)
+
+        Returns:
+            LogisticRegression: The fitted model
+        """
+        if X_val is None and validation_split > 0:
+            split = X.shape[1] - int(round(X.shape[1] * validation_split))
+            X, X_val = X[:, :split], X[:, split:]
+            y, y_val = y[:, :split], y[:, split:]
+
+        trainer = Trainer(X.shape[0], optimizer=optimizer, learning_rate=learning_rate, batch_size=batch_size,
+                          seed=seed, tol=tol, grad_tol=grad_tol, patience=patience, **optimizer_params)
+        trainer.fit(X, y, num_iterations, print_cost=print_cost, X_val=X_val, y_val=y_val)
+        return self._from_trainer(trainer)
+
+    def fit_batches(
+            self,
+            batches: BatchSource,
+            n_features: int,
+            num_epochs: int = 10,
+            learning_rate: float = 0.005,
+            optimizer: str = "adam",
+            print_cost: bool = False,
+            X_val: Optional[np.ndarray] = None,
+            y_val: Optional[np.ndarray] = None,
+            **optimizer_params,
+    ) -> "LogisticRegression":
+        """
+        Train the model on a stream of (X, y) mini-batches, such as an ``H5Dataset``.
+
+        Args:
+            batches (BatchSource): Re-iterable of mini-batches, or a callable returning
+                a fresh iterator for every epoch
+            n_features (int): Number of input features
+            num_epochs (int): Number of passes over the batches
+            learning_rate (float): Step size
+            optimizer (str): One of 'sgd', 'momentum' or 'adam'
+            print_cost (bool): Log the cost every epoch
+            X_val (Optional[np.ndarray]): Validation data of shape (n_features, m_val), required
+                with ``patience``
+            y_val (Optional[np.ndarray]): Validation labels of shape (1, m_val)
+            **optimizer_params: Extra ``Trainer`` arguments (l2, beta, beta1, beta2, epsilon, tol,
+                grad_tol, patience, validation_every)
+
+        Returns:
+            LogisticRegression: The fitted model
+        """
+        trainer = Trainer(n_features, optimizer=optimizer, learning_rate=learning_rate, **optimizer_params)
+        trainer.fit_batches(batches, num_epochs, print_cost=print_cost, X_val=X_val, y_val=y_val)
+        return self._from_trainer(trainer)
+
+    @classmethod
+    def fit_many(
+            cls,
+            X: np.ndarray,
+            y: np.ndarray,
+            learning_rates: Sequence[float],
+            num_iterations: int = 2000,
+            l2: float = 0.0,
+            tol: Optional[float] = None,
+            grad_tol: Optional[float] = None,
+    ) -> List["LogisticRegression"]:
+        """
+        Train one model per learning rate in a single vectorized pass over X per iteration.
+
+        The models are fitted as the columns of one (n_features, K) weight matrix, so each
+        iteration costs two GEMMs instead of K separate forward/backward passes. Each model
+        stops independently when it meets ``tol`` or ``grad_tol``.
+
+        Args:
+            X (np.ndarray): Training data of shape (n_features, m)
+            y (np.ndarray): Labels of shape (1, m)
+            learning_rates (Sequence[float]): One learning rate per model
+            num_iterations (int): Maximum number of iterations
+            l2 (float): L2 regularization strength
+            tol (Optional[float]): Per-model relative cost change stopping threshold
+            grad_tol (Optional[float]): Per-model gradient norm stopping threshold
+
+        Returns:
+            List[LogisticRegression]: One fitted model per learning rate, in order
+        """
+        trainer = MultiTrainer(X.shape[0], learning_rates, l2=l2, tol=tol, grad_tol=grad_tol)
+        costs = trainer.fit(X, y, num_iterations)
+
+        models = []
+        for k in range(len(learning_rates)):
+            model = cls()
+            model.w = np.ascontiguousarray(trainer.W[:, k:k + 1])
+            model.b = float(trainer.b[k, 0])
+            model.costs = costs[k]
+            model.stop_reason = trainer.stop_reasons[k]
+            model.stop_iteration = trainer.stop_iterations[k]
+            models.append(model)
+        logger.info(f"Trained {len(models)} models in {trainer.iteration} iterations")
+        return models
+
+    def _from_trainer(self, trainer: Trainer) -> "LogisticRegression":
+        self.w = trainer.w
+        self.weight_scale = None
+        self.b = float(trainer.b)
+        self.costs = trainer.costs
+        self.stop_reason = trainer.stop_reason
+        self.stop_iteration = trainer.stop_iteration
+        logger.info(f"Model trained for {trainer.iteration} iterations ({self.stop_reason}), "
+                    f"final cost {self.costs[-1] if self.costs else float('nan'):.6f}")
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Probability that the label is 1 for every example in X.
+
+        Args:
+            X (np.ndarray): Data of shape (n_features, m)
+
+        Returns:
+            np.ndarray: Probabilities of shape (1, m)
+        """
+        return sigmoid(np.dot(self.dense_weights().T, X) + self.b)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict whether the label is 0 or 1 for every example in X.
+
+        Args:
+            X (np.ndarray): Data of shape (n_features, m)
+
+        Returns:
+            np.ndarray: Predictions (0/1) of shape (1, m), 1 where the probability is
+                above ``threshold``
+        """
+        A = self.predict_proba(X)
+        return (A > self.threshold).astype(np.float32)
+
+    def _cached_weights(self, kind: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        A variant of ``w`` (dequantized, pre-scaled, ...), computed once per weight
+        array and reused until ``w`` is replaced.
+        """
+        if self.w is None:
+            raise ValueError("Model is not trained")
+        cache = getattr(self, "_weight_cache", None)
+        if cache is None or cache[0] is not self.w:
+            cache = (self.w, {})
+            self._weight_cache = cache
+        if kind not in cache[1]:
+            cache[1][kind] = build()
+        return cache[1][kind]
+
+    def dense_weights(self) -> np.ndarray:
+        """
+        Real-valued weights of shape (n_features, 1), dequantizing float16 or int8 weights.
+
+        Returns:
+            np.ndarray: ``w`` itself for float32/float64 weights, otherwise a cached float32 copy
+        """
+        if self.w is None:
+            raise ValueError("Model is not trained")
+        scale = getattr(self, "weight_scale", None)
+        if scale is None and self.w.dtype in (np.float32, np.float64):
+            return self.w
+        return self._cached_weights("dense", lambda: self.w.astype(np.float32) * np.float32(scale or 1.0))
+
+    def _folded_weights(self) -> np.ndarray:
+        """
+        Weights with the pixel scale folded in, as a (1, n_features) float32 row.
+        """
+        return self._cached_weights(
+            "folded", lambda: (np.asarray(self.dense_weights(), dtype=np.float32) * np.float32(PIXEL_SCALE)).reshape(1, -1))
+
+    def _predict_proba_int8(self, X: np.ndarray) -> np.ndarray:
+        """
+        Integer kernel for int8 weights against uint8 pixels: the dot products are
+        accumulated exactly in int32 (int64 for very wide inputs) and scaled once.
+        """
+        accumulator = np.int32 if self.w.shape[0] * INT8_MAX * 255 <= np.iinfo(np.int32).max else np.int64
+        q = self._cached_weights(np.dtype(accumulator).name, lambda: self.w.astype(accumulator).reshape(1, -1))
+        # einsum casts the pixels in small internal buffers, without a full-size copy
+        acc = np.einsum("ij,jk->ik", q, X, dtype=accumulator)
+        return sigmoid(acc * (self.weight_scale * PIXEL_SCALE) + self.b)
+
+    def predict_proba_uint8(self, X: np.ndarray, block_size: Optional[int] = None) -> np.ndarray:
+        """
+        Probability that the label is 1 for raw (unnormalized) uint8 pixels.
+
+        Equivalent to ``predict_proba(preprocess_data(images))``, but the 1/255 scaling
+        is folded into the weights instead of being applied to the input, so the input
+        is never copied into a full float array. Batches are converted to float32 a
+        block of examples at a time. int8 models use an integer dot product instead.
+
+        Args:
+            X (np.ndarray): uint8 pixels of shape (n_features, m)
+            block_size (Optional[int]): Examples per block. Defaults to as many as fit
+                in ``UINT8_BLOCK_ELEMENTS`` float32 values.
+
+        Returns:
+            np.ndarray: Probabilities of shape (1, m)
+
+        Raises:
+            ValueError: If X is not a uint8 array of shape (n_features, m)
+        """
+        if self.w is None:
+            raise ValueError("Model is not trained")
+        n_features = self.w.shape[0]
+        if X.dtype != np.uint8 or X.ndim != 2 or X.shape[0] != n_features:
+            raise ValueError(f"Expected uint8 input of shape ({n_features}, m), got {X.dtype} {X.shape}")
+        if self.w.dtype == np.int8:
+            return self._predict_proba_int8(X)
+
+        w = self._folded_weights()
+        m = X.shape[1]
+        block_size = block_size or max(1, UINT8_BLOCK_ELEMENTS // n_features)
+        z = np.empty((1, m), dtype=np.float32)
+        block = np.empty((n_features, min(block_size, m)), dtype=np.float32)
+        for start in range(0, m, block_size):
+            stop = min(start + block_size, m)
+            chunk = block[:, :stop - start]
+            np.copyto(chunk, X[:, start:stop], casting="unsafe")
+            np.dot(w, chunk, out=z[:, start:stop])
+        z += np.float32(self.b)
+        return sigmoid(z)
+
+    def predict_uint8(self, X: np.ndarray, block_size: Optional[int] = None) -> np.ndarray:
+        """
+        Predict whether the label is 0 or 1 from raw uint8 pixels (see ``predict_proba_uint8``).
+
+        Args:
+            X (np.ndarray): uint8 pixels of shape (n_features, m)
+            block_size (Optional[int]): Examples per block
+
+        Returns:
+            np.ndarray: Predictions (0/1) of shape (1, m)
+        """
+        A = self.predict_proba_uint8(X, block_size)
+        return (A > self.threshold).astype(np.float32)
+
+    def quantize(self, dtype: str) -> "LogisticRegression":
+        """
+        Return a copy of the model with quantized weights for inference.
+
+        'float16' halves the size of the weights; 'int8' quarters it using one symmetric
+        per-tensor scale (the largest absolute weight maps to 127) and makes
+        ``predict_uint8`` use an integer dot product.
+
+        Args:
+            dtype (str): One of ``QUANTIZED_DTYPES``
+
+        Returns:
+            LogisticRegression: The quantized model
+
+        Raises:
+            ValueError: If the model is not trained or the dtype is not supported
+        """
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported quantization dtype {dtype}, expected one of {QUANTIZED_DTYPES}")
+        w = self.dense_weights()
+
+        model = LogisticRegression()
+        model.b = self.b
+        model.threshold = self.threshold
+        model.costs = list(self.costs)
+        model.stop_reason = self.stop_reason
+        model.stop_iteration = self.stop_iteration
+        if dtype == "float16":
+            model.w = w.astype(np.float16)
+        else:
+            max_abs = float(np.max(np.abs(w)))
+            model.weight_scale = max_abs / INT8_MAX if max_abs > 0 else 1.0
+            model.w = np.clip(np.rint(w / model.weight_scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+        return model
+
+    def save(self, path: Union[str, Path], version: Optional[str] = None) -> None:
+        """
+        Save the model.
+
+        Paths ending in ``.pkl`` are written as a pickle; any other path is written as a
+        memory-mappable artifact directory (see ``src.models.artifact``).
+
+        Args:
+            path (Union[str, Path]): Destination file or directory
+            version (Optional[str]): Version label stored in the artifact header
+        """
+        if str(path).endswith(".pkl"):
+            with open(path, "wb") as f:
+                pickle.dump(self, f)
+            logger.info(f"Model saved to {path}")
+        else:
+            save_artifact(self, path, version)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LogisticRegression":
+        """
+        Load a model saved with ``save``: an artifact directory or a pickle file.
+
+        Args:
+            path (Union[str, Path]): Artifact directory or pickle file
+
+        Returns:
+            LogisticRegression: The loaded model
+
+        Raises:
+            FileNotFoundError: If the model file is not found
+        """
+        if Path(path).is_dir():
+            return load_artifact(path)
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+        # Pickles from before early stopping, artifacts, the decision threshold and quantization were added
+        model.__dict__.setdefault("stop_reason", None)
+        model.__dict__.setdefault("stop_iteration", None)
+        model.__dict__.setdefault("artifact", None)
+        model.__dict__.setdefault("threshold", 0.5)
+        model.__dict__.setdefault("weight_scale", None)
+        return model
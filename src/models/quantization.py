@@ -0,0 +1,114 @@
+import numpy as np
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from src.models.artifact import save_artifact
+from src.models.logistic_regression_nn import LogisticRegression
+from src.utils.metrics import MetricsAccumulator
+
+logger = logging.getLogger(__name__)
+
+# Metrics compared between the reference and the quantized model
+REPORT_METRICS = ("accuracy", "precision", "recall", "f1_score", "mcc")
+
+
+def accuracy_delta_report(reference: LogisticRegression, quantized: LogisticRegression,
+                          batches: Iterable[Tuple[np.ndarray, np.ndarray]]) -> Dict[str, Any]:
+    """
+    Compare a quantized model with the model it was quantized from on labeled data.
+
+    Both models run their serving path (``predict_uint8``) on the same raw uint8
+    batches, in a single pass.
+
+    Args:
+        reference (LogisticRegression): Original model
+        quantized (LogisticRegression): Quantized copy of it
+        batches (Iterable[Tuple[np.ndarray, np.ndarray]]): (X, y) batches with X as raw
+            uint8 pixels of shape (n_features, batch), e.g. ``H5Dataset(normalize=False)``
+
+    Returns:
+        Dict[str, Any]: Reference and quantized metrics, their difference (quantized minus
+            reference), the number of changed decisions and the largest probability change
+    """
+    reference_metrics = MetricsAccumulator()
+    quantized_metrics = MetricsAccumulator()
+    changed = 0
+    max_difference = 0.0
+    for X_batch, y_batch in batches:
+        reference_proba = reference.predict_proba_uint8(X_batch)
+        quantized_proba = quantized.predict_proba_uint8(X_batch)
+        reference_predictions = reference_proba > reference.threshold
+        quantized_predictions = quantized_proba > quantized.threshold
+        reference_metrics.update(reference_predictions, y_batch)
+        quantized_metrics.update(quantized_predictions, y_batch)
+        changed += int(np.count_nonzero(reference_predictions != quantized_predictions))
+        max_difference = max(max_difference, float(np.max(np.abs(reference_proba - quantized_proba))))
+
+    before = reference_metrics.compute()
+    after = quantized_metrics.compute()
+    return {
+        "examples": reference_metrics.count,
+        "reference": {name: before[name] for name in REPORT_METRICS},
+        "quantized": {name: after[name] for name in REPORT_METRICS},
+        "delta": {name: after[name] - before[name] for name in REPORT_METRICS},
+        "changed_decisions": changed,
+        "max_probability_difference": max_difference,
+    }
+
+
+def export_quantized(source: Union[str, Path], directory: Union[str, Path], dtype: str,
+                     batches: Optional[Iterable[Tuple[np.ndarray, np.ndarray]]] = None,
+                     version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Quantize a saved model and write it as a new artifact.
+
+    Args:
+        source (Union[str, Path]): Model artifact directory or pickle file
+        directory (Union[str, Path]): Destination artifact directory
+        dtype (str): 'float16' or 'int8'
+        batches (Optional[Iterable[Tuple[np.ndarray, np.ndarray]]]): Labeled raw uint8
+            batches for the accuracy-delta report. None skips the report.
+        version (Optional[str]): Version label of the new artifact
+
+    Returns:
+        Dict[str, Any]: The header that was written, with the report (if any) under
+            ``training.quantization_report``
+    """
+    reference = LogisticRegression.load(source)
+    quantized = reference.quantize(dtype)
+    source_version = (reference.artifact or {}).get("version", str(source))
+    metadata: Dict[str, Any] = {"quantized_from": source_version}
+
+    if batches is not None:
+        report = accuracy_delta_report(reference, quantized, batches)
+        metadata["quantization_report"] = report
+        logger.info(f"{dtype} model changes {report['changed_decisions']} of {report['examples']} decisions, "
+                    f"accuracy delta {report['delta']['accuracy']:+.4f}")
+
+    weight_bytes = (reference.w.nbytes, quantized.w.nbytes)
+    logger.info(f"Quantized weights from {weight_bytes[0]} to {weight_bytes[1]} bytes")
+    return save_artifact(quantized, directory, version, metadata=metadata)
+
+
+if __name__ == "__main__":
+    from src.data.h5_dataset import H5Dataset
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Export a quantized copy of a model with an accuracy-delta report.")
+    parser.add_argument("source", type=Path, help="Model artifact directory or pickle file")
+    parser.add_argument("directory", type=Path, help="Destination artifact directory")
+    parser.add_argument("--dtype", choices=["float16", "int8"], default="int8")
+    parser.add_argument("--version", default=None)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--skip-report", action="store_true", help="Do not evaluate against the test set")
+    args = parser.parse_args()
+
+    test_batches = None if args.skip_report else H5Dataset.from_split(train=False, batch_size=args.batch_size,
+                                                                        normalize=False)
+    header = export_quantized(args.source, args.directory, args.dtype, test_batches, args.version)
+    print(f"Exported {args.dtype} model {header['version']} to {args.directory}")
+    if "quantization_report" in header["training"]:
+        print(json.dumps(header["training"]["quantization_report"], indent=2))
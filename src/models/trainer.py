@@ -0,0 +1,576 @@
+import numpy as np
+import logging
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZERS = ("gd", "sgd", "momentum", "adam")
+
+BatchSource = Union[Iterable[Tuple[np.ndarray, np.ndarray]], Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]]]
+
+
+class Trainer:
+    """
+    Vectorized gradient-descent engine for logistic regression.
+
+    Parameters, data and all intermediate buffers are float32, so the forward and
+    backward passes run as single-precision BLAS GEMV/GEMM calls (multi-threaded by
+    whichever BLAS NumPy is linked against). Every buffer used by the inner loop is
+    allocated once up front; an iteration does no array allocation. The sigmoid and
+    the cross-entropy cost share a single ``exp`` evaluation and are computed in a
+    numerically stable form, so the cost is finite even for saturated activations.
+
+    Args:
+        n_features (int): Number of input features
+        optimizer (str): One of 'gd' (full batch), 'sgd', 'momentum' or 'adam'
+        learning_rate (float): Step size
+        batch_size (Optional[int]): Mini-batch size. None uses the full batch.
+        l2 (float): L2 regularization strength (lambda); the cost gains lambda / (2m) * ||w||^2
+        beta (float): Momentum coefficient for 'momentum'
+        beta1 (float): First moment decay for 'adam'
+        beta2 (float): Second moment decay for 'adam'
+        epsilon (float): Numerical stability term for 'adam'
+        shuffle (bool): Visit mini-batches in a random order every epoch
+        seed (Optional[int]): Seed for batch shuffling
+        tol (Optional[float]): Stop when the relative change in cost between two
+            iterations falls below this value
+        grad_tol (Optional[float]): Stop when the L2 norm of the gradient (w and b) of
+            the last update falls below this value
+        patience (Optional[int]): Stop when the validation cost has not improved for this
+            many validation checks, and restore the best weights. Requires validation data.
+        validation_every (int): Iterations between validation cost checks
+
+    After training, ``stop_reason`` is one of 'max_iterations', 'tol', 'grad_tol' or
+    'patience', and ``stop_iteration`` is the iteration at which training stopped.
+    """
+
+    def __init__(
+            self,
+            n_features: int,
+            optimizer: str = "gd",
+            learning_rate: float = 0.005,
+            batch_size: Optional[int] = None,
+            l2: float = 0.0,
+            beta: float = 0.9,
+            beta1: float = 0.9,
+            beta2: float = 0.999,
+            epsilon: float = 1e-8,
+            shuffle: bool = True,
+            seed: Optional[int] = None,
+            tol: Optional[float] = None,
+            grad_tol: Optional[float] = None,
+            patience: Optional[int] = None,
+            validation_every: int = 10,
+    ) -> None:
+        if optimizer not in OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer '{optimizer}'. Expected one of {OPTIMIZERS}")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.n_features = n_features
+        self.optimizer = optimizer
+        self.learning_rate = learning_rate
+        self.batch_size = batch_size
+        self.l2 = l2
+        self.beta = beta
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self.tol = tol
+        self.grad_tol = grad_tol
+        self.patience = patience
+        self.validation_every = validation_every
+
+        self.w = np.zeros((n_features, 1), dtype=np.float32)
+        self.b = 0.0
+        self.costs: List[float] = []
+        self.validation_costs: List[float] = []
+        self.iteration = 0
+        self.grad_norm = float("nan")
+        self.stop_reason = "max_iterations"
+        self.stop_iteration: Optional[int] = None
+
+        # Gradient and optimizer state buffers
+        self._dw = np.empty_like(self.w)
+        self._tmp = np.empty_like(self.w)
+        self._vw = np.zeros_like(self.w) if optimizer in ("momentum", "adam") else None
+        self._sw = np.zeros_like(self.w) if optimizer == "adam" else None
+        self._vb = 0.0
+        self._sb = 0.0
+        self._steps = 0
+
+        # Per-example buffers, sized on first use
+        self._capacity = 0
+
+        # Early stopping state
+        self._prev_cost: Optional[float] = None
+        self._best_val_cost = float("inf")
+        self._best_w: Optional[np.ndarray] = None
+        self._best_b = 0.0
+        self._bad_checks = 0
+
+    def _reserve(self, m: int) -> None:
+        if m <= self._capacity:
+            return
+        self._z = np.empty((1, m), dtype=np.float32)
+        self._e = np.empty((1, m), dtype=np.float32)
+        self._a = np.empty((1, m), dtype=np.float32)
+        self._capacity = m
+
+    def propagate(self, X: np.ndarray, y: np.ndarray) -> float:
+        """
+        Forward and backward pass over one batch, writing the gradient into ``self._dw``.
+
+        Args:
+            X (np.ndarray): float32 data of shape (n_features, m)
+            y (np.ndarray): float32 labels of shape (1, m)
+
+        Returns:
+            float: Mean cross-entropy cost over the batch. The bias gradient is stored in
+                ``self._db``.
+        """
+        m = X.shape[1]
+        self._reserve(m)
+        z, e, a = self._z[:, :m], self._e[:, :m], self._a[:, :m]
+
+        # z = w.T X + b
+        np.dot(self.w.T, X, out=z)
+        z += self.b
+
+        # e = exp(-|z|), shared by the cost and the sigmoid
+        np.abs(z, out=e)
+        np.negative(e, out=e)
+        np.exp(e, out=e)
+
+        # cost = mean(log(1 + exp(-|z|)) + max(z, 0) - y * z)
+        cost = float(np.dot(y, z.T)[0, 0])
+        np.maximum(z, 0, out=a)
+        cost = float(a.sum(dtype=np.float64)) - cost
+        np.log1p(e, out=a)
+        cost = (cost + float(a.sum(dtype=np.float64))) / m
+
+        # sigmoid(z) = 0.5 + sign(z) * (1 / (1 + exp(-|z|)) - 0.5)
+        e += 1.0
+        np.reciprocal(e, out=a)
+        a -= 0.5
+        np.copysign(a, z, out=a)
+        a += 0.5
+
+        # dz = A - y, dw = X dz.T / m, db = sum(dz) / m
+        a -= y
+        np.dot(X, a.T, out=self._dw)
+        self._dw *= 1.0 / m
+        self._db = float(a.sum(dtype=np.float64)) / m
+
+        if self.l2:
+            cost += self.l2 / (2 * m) * float(np.dot(self.w.T, self.w)[0, 0])
+            np.multiply(self.w, self.l2 / m, out=self._tmp)
+            self._dw += self._tmp
+        return cost
+
+    def cost(self, X: np.ndarray, y: np.ndarray) -> float:
+        """
+        Forward pass only: the mean cross-entropy cost of the current parameters on a batch.
+
+        Uses the same preallocated buffers as ``propagate``, so validation checks do
+        not allocate.
+
+        Args:
+            X (np.ndarray): float32 data of shape (n_features, m)
+            y (np.ndarray): float32 labels of shape (1, m)
+
+        Returns:
+            float: Mean cross-entropy cost
+        """
+        m = X.shape[1]
+        self._reserve(m)
+        z, e = self._z[:, :m], self._e[:, :m]
+        np.dot(self.w.T, X, out=z)
+        z += self.b
+        cost = -float(np.dot(y, z.T)[0, 0])
+        np.abs(z, out=e)
+        np.negative(e, out=e)
+        np.exp(e, out=e)
+        np.log1p(e, out=e)
+        cost += float(e.sum(dtype=np.float64))
+        np.maximum(z, 0, out=z)
+        cost = (cost + float(z.sum(dtype=np.float64))) / m
+        if self.l2:
+            cost += self.l2 / (2 * m) * float(np.dot(self.w.T, self.w)[0, 0])
+        return cost
+
+    def _update(self) -> None:
+        lr = self.learning_rate
+        dw, tmp = self._dw, self._tmp
+        db = self._db
+
+        if self.optimizer in ("gd", "sgd"):
+            dw *= lr
+            self.w -= dw
+            self.b -= lr * db
+        elif self.optimizer == "momentum":
+            vw = self._vw
+            vw *= self.beta
+            dw *= 1.0 - self.beta
+            vw += dw
+            np.multiply(vw, lr, out=tmp)
+            self.w -= tmp
+            self._vb = self.beta * self._vb + (1.0 - self.beta) * db
+            self.b -= lr * self._vb
+        else:
+            self._steps += 1
+            beta1, beta2 = self.beta1, self.beta2
+            vw, sw = self._vw, self._sw
+            vw *= beta1
+            np.multiply(dw, 1.0 - beta1, out=tmp)
+            vw += tmp
+            np.square(dw, out=tmp)
+            tmp *= 1.0 - beta2
+            sw *= beta2
+            sw += tmp
+
+            bias1 = 1.0 - beta1 ** self._steps
+            bias2 = 1.0 - beta2 ** self._steps
+            np.sqrt(sw, out=tmp)
+            tmp *= 1.0 / np.sqrt(bias2)
+            tmp += self.epsilon
+            np.divide(vw, tmp, out=tmp)
+            tmp *= lr / bias1
+            self.w -= tmp
+
+            self._vb = beta1 * self._vb + (1.0 - beta1) * db
+            self._sb = beta2 * self._sb + (1.0 - beta2) * db * db
+            self.b -= lr * (self._vb / bias1) / (np.sqrt(self._sb / bias2) + self.epsilon)
+
+    def step(self, X: np.ndarray, y: np.ndarray) -> float:
+        """
+        Run one parameter update on a batch.
+
+        Returns:
+            float: Cost of the batch before the update
+        """
+        cost = self.propagate(X, y)
+        if self.grad_tol is not None:
+            self.grad_norm = float(np.sqrt(np.dot(self._dw.T, self._dw)[0, 0] + self._db * self._db))
+        self._update()
+        return cost
+
+    def _epoch(self, X: np.ndarray, y: np.ndarray) -> float:
+        m = X.shape[1]
+        if self.batch_size is None or self.batch_size >= m:
+            return self.step(X, y)
+
+        starts = np.arange(0, m, self.batch_size)
+        if self.shuffle:
+            self._rng.shuffle(starts)
+        total = 0.0
+        for start in starts:
+            end = min(start + self.batch_size, m)
+            total += self.step(X[:, start:end], y[:, start:end]) * (end - start)
+        return total / m
+
+    def fit(self, X: np.ndarray, y: np.ndarray, num_iterations: int = 2000, print_cost: bool = False,
+            record_every: int = 100, X_val: Optional[np.ndarray] = None,
+            y_val: Optional[np.ndarray] = None) -> List[float]:
+        """
+        Train on in-memory data.
+
+        One iteration is one pass over the data: a single update for full-batch
+        gradient descent, or one update per mini-batch otherwise.
+
+        Args:
+            X (np.ndarray): Data of shape (n_features, m). Converted to float32 once if needed.
+            y (np.ndarray): Labels of shape (1, m)
+            num_iterations (int): Number of passes over the data
+            print_cost (bool): Log the cost every ``record_every`` iterations
+            record_every (int): Interval at which the cost is recorded in ``self.costs``
+            X_val (Optional[np.ndarray]): Validation data for patience-based stopping
+            y_val (Optional[np.ndarray]): Validation labels
+
+        Returns:
+            List[float]: Recorded costs
+
+        Raises:
+            ValueError: If the data shapes do not match, or ``patience`` is set without
+                validation data
+        """
+        X, y = self._check_data(X, y)
+        X_val, y_val = self._check_validation(X_val, y_val)
+
+        for _ in range(num_iterations):
+            cost = self._epoch(X, y)
+            self._record(cost, print_cost, record_every)
+            if self._should_stop(cost, X_val, y_val):
+                break
+        self._finish()
+        return self.costs
+
+    def fit_batches(self, batches: BatchSource, num_epochs: int = 10, print_cost: bool = False,
+                    record_every: int = 1, X_val: Optional[np.ndarray] = None,
+                    y_val: Optional[np.ndarray] = None) -> List[float]:
+        """
+        Train on a stream of (X, y) mini-batches, e.g. an ``H5Dataset``.
+
+        Args:
+            batches (BatchSource): Re-iterable of mini-batches, or a callable returning a
+                fresh iterator for every epoch
+            num_epochs (int): Number of passes over the batches
+            print_cost (bool): Log the cost every ``record_every`` epochs
+            record_every (int): Interval at which the epoch cost is recorded in ``self.costs``
+            X_val (Optional[np.ndarray]): Validation data for patience-based stopping
+            y_val (Optional[np.ndarray]): Validation labels
+
+        Returns:
+            List[float]: Recorded costs
+
+        Raises:
+            ValueError: If the data shapes do not match, or ``patience`` is set without
+                validation data
+        """
+        X_val, y_val = self._check_validation(X_val, y_val)
+
+        for _ in range(num_epochs):
+            total, m = 0.0, 0
+            for X_batch, y_batch in (batches() if callable(batches) else batches):
+                X_batch = np.asarray(X_batch, dtype=np.float32)
+                y_batch = np.asarray(y_batch, dtype=np.float32).reshape(1, -1)
+                total += self.step(X_batch, y_batch) * X_batch.shape[1]
+                m += X_batch.shape[1]
+            cost = total / max(m, 1)
+            self._record(cost, print_cost, record_every)
+            if self._should_stop(cost, X_val, y_val):
+                break
+        self._finish()
+        return self.costs
+
+    def _check_data(self, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32).reshape(1, -1)
+        if X.shape[0] != self.n_features or X.shape[1] != y.shape[1]:
+            raise ValueError(f"Expected X of shape ({self.n_features}, m) and y of shape (1, m), "
+                             f"got {X.shape} and {y.shape}")
+        return X, y
+
+    def _check_validation(self, X_val: Optional[np.ndarray],
+                          y_val: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        if X_val is None or y_val is None:
+            if self.patience is not None:
+                raise ValueError("patience requires validation data (X_val and y_val)")
+            return None, None
+        return self._check_data(X_val, y_val)
+
+    def _should_stop(self, cost: float, X_val: Optional[np.ndarray], y_val: Optional[np.ndarray]) -> bool:
+        iteration = self.iteration - 1
+
+        if self.tol is not None and self._prev_cost is not None:
+            if abs(self._prev_cost - cost) <= self.tol * max(abs(self._prev_cost), 1e-12):
+                return self._stop("tol", iteration)
+        self._prev_cost = cost
+
+        if self.grad_tol is not None and self.grad_norm <= self.grad_tol:
+            return self._stop("grad_tol", iteration)
+
+        if self.patience is not None and X_val is not None and iteration % self.validation_every == 0:
+            val_cost = self.cost(X_val, y_val)
+            self.validation_costs.append(val_cost)
+            # A NaN cost never counts as an improvement (and never becomes the best weights)
+            if np.isfinite(val_cost) and val_cost < self._best_val_cost:
+                self._best_val_cost = val_cost
+                if self._best_w is None:
+                    self._best_w = np.empty_like(self.w)
+                np.copyto(self._best_w, self.w)
+                self._best_b = self.b
+                self._bad_checks = 0
+            else:
+                self._bad_checks += 1
+                if self._bad_checks >= self.patience:
+                    if self._best_w is not None:
+                        np.copyto(self.w, self._best_w)
+                        self.b = self._best_b
+                    return self._stop("patience", iteration)
+        return False
+
+    def _stop(self, reason: str, iteration: int) -> bool:
+        self.stop_reason = reason
+        self.stop_iteration = iteration
+        logger.info(f"Training stopped by '{reason}' at iteration {iteration}")
+        return True
+
+    def _finish(self) -> None:
+        if self.stop_iteration is None:
+            self.stop_iteration = self.iteration - 1
+
+    def _record(self, cost: float, print_cost: bool, record_every: int) -> None:
+        if self.iteration % record_every == 0:
+            self.costs.append(cost)
+            if print_cost:
+                logger.info(f"Cost after iteration {self.iteration}: {cost:f}")
+        self.iteration += 1
+
+
+class MultiTrainer:
+    """
+    Full-batch gradient descent for K logistic regression models trained at once.
+
+    The K weight vectors are the columns of one (n_features, K) matrix, so every
+    iteration is two GEMMs over X (forward and gradient) shared by all models instead
+    of 2K GEMVs. X is streamed from memory once per iteration regardless of K, which
+    is where most of the time goes on memory-bound hardware. Each column has its own
+    learning rate and stops independently: once a column meets a stopping criterion
+    its learning rate is masked to zero and its parameters are frozen.
+
+    Args:
+        n_features (int): Number of input features
+        learning_rates (Sequence[float]): One learning rate per model
+        l2 (float): L2 regularization strength shared by all models
+        tol (Optional[float]): Per-model relative cost change stopping threshold
+        grad_tol (Optional[float]): Per-model gradient norm stopping threshold
+    """
+
+    def __init__(
+            self,
+            n_features: int,
+            learning_rates: Sequence[float],
+            l2: float = 0.0,
+            tol: Optional[float] = None,
+            grad_tol: Optional[float] = None,
+    ) -> None:
+        k = len(learning_rates)
+        if k < 1:
+            raise ValueError("At least one learning rate is required")
+
+        self.n_features = n_features
+        self.learning_rates = np.asarray(learning_rates, dtype=np.float32).reshape(1, k)
+        self.l2 = l2
+        self.tol = tol
+        self.grad_tol = grad_tol
+
+        self.W = np.zeros((n_features, k), dtype=np.float32)
+        self.b = np.zeros((k, 1), dtype=np.float32)
+        # Recorded costs of each model, up to the iteration it stopped at
+        self.costs: List[List[float]] = [[] for _ in range(k)]
+        self.iteration = 0
+        self.active = np.ones(k, dtype=bool)
+        self.stop_reasons = ["max_iterations"] * k
+        self.stop_iterations: List[Optional[int]] = [None] * k
+
+        self._dW = np.empty_like(self.W)
+        self._tmp = np.empty_like(self.W)
+        self._rates = self.learning_rates.copy()
+        self._cost = np.empty(k, dtype=np.float64)
+        self._prev_cost: Optional[np.ndarray] = None
+        self._capacity = 0
+
+    def _reserve(self, m: int) -> None:
+        if m <= self._capacity:
+            return
+        k = self.W.shape[1]
+        self._Z = np.empty((k, m), dtype=np.float32)
+        self._E = np.empty((k, m), dtype=np.float32)
+        self._A = np.empty((k, m), dtype=np.float32)
+        self._capacity = m
+
+    def propagate(self, X: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Forward and backward pass for all K models, writing gradients into ``self._dW``
+        and ``self._db``.
+
+        Returns:
+            np.ndarray: Cost of each model, shape (K,)
+        """
+        m = X.shape[1]
+        self._reserve(m)
+        Z, E, A = self._Z[:, :m], self._E[:, :m], self._A[:, :m]
+
+        np.dot(self.W.T, X, out=Z)
+        Z += self.b
+
+        np.abs(Z, out=E)
+        np.negative(E, out=E)
+        np.exp(E, out=E)
+
+        cost = self._cost
+        np.maximum(Z, 0, out=A)
+        np.sum(A, axis=1, dtype=np.float64, out=cost)
+        cost -= np.dot(Z, y.T)[:, 0]
+        np.log1p(E, out=A)
+        cost += A.sum(axis=1, dtype=np.float64)
+        cost /= m
+
+        E += 1.0
+        np.reciprocal(E, out=A)
+        A -= 0.5
+        np.copysign(A, Z, out=A)
+        A += 0.5
+
+        A -= y
+        np.dot(X, A.T, out=self._dW)
+        self._dW *= 1.0 / m
+        self._db = A.sum(axis=1, dtype=np.float64).reshape(-1, 1) / m
+
+        if self.l2:
+            cost += self.l2 / (2 * m) * np.einsum("ij,ij->j", self.W, self.W)
+            np.multiply(self.W, self.l2 / m, out=self._tmp)
+            self._dW += self._tmp
+        return cost.copy()
+
+    def fit(self, X: np.ndarray, y: np.ndarray, num_iterations: int = 2000,
+            record_every: int = 100) -> List[List[float]]:
+        """
+        Train all K models on in-memory data.
+
+        Args:
+            X (np.ndarray): Data of shape (n_features, m). Converted to float32 once if needed.
+            y (np.ndarray): Labels of shape (1, m)
+            num_iterations (int): Maximum number of iterations
+            record_every (int): Interval at which the cost of every model still training is recorded
+
+        Returns:
+            List[List[float]]: Recorded costs of each model, as ``Trainer.fit`` records them
+                for a single model
+        """
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32).reshape(1, -1)
+        if X.shape[0] != self.n_features or X.shape[1] != y.shape[1]:
+            raise ValueError(f"Expected X of shape ({self.n_features}, m) and y of shape (1, m), "
+                             f"got {X.shape} and {y.shape}")
+
+        for _ in range(num_iterations):
+            cost = self.propagate(X, y)
+            if self.iteration % record_every == 0:
+                for column in np.flatnonzero(self.active):
+                    self.costs[column].append(float(cost[column]))
+            grad_norm = None
+            if self.grad_tol is not None:
+                grad_norm = np.sqrt(np.einsum("ij,ij->j", self._dW, self._dW) + self._db[:, 0] ** 2)
+
+            self._dW *= self._rates
+            self.W -= self._dW
+            self.b -= self._rates.T * self._db
+
+            self._check_convergence(cost, grad_norm)
+            self.iteration += 1
+            if not self.active.any():
+                break
+
+        for column in np.flatnonzero(self.active):
+            self.stop_iterations[column] = self.iteration - 1
+        return self.costs
+
+    def _check_convergence(self, cost: np.ndarray, grad_norm: Optional[np.ndarray]) -> None:
+        if self.tol is not None and self._prev_cost is not None:
+            tol_hit = np.abs(self._prev_cost - cost) <= self.tol * np.maximum(np.abs(self._prev_cost), 1e-12)
+            self._mark(tol_hit & self.active, "tol")
+        self._prev_cost = cost
+
+        if grad_norm is not None:
+            self._mark((grad_norm <= self.grad_tol) & self.active, "grad_tol")
+
+    def _mark(self, columns: np.ndarray, reason: str) -> None:
+        for column in np.flatnonzero(columns):
+            self.active[column] = False
+            self._rates[0, column] = 0.0
+            self.stop_reasons[column] = reason
+            self.stop_iterations[column] = self.iteration
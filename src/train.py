@@ -1,22 +1,52 @@
-from src.data.data_processing import load_dataset, preprocess_data
-from src.model.logistic_regression import LogisticRegression
+import argparse
+import logging
+from src.data.cache import DatasetCache
+from src.data.data_processing import load_preprocessed_dataset
+from src.data.h5_dataset import H5Dataset
+from src.models.artifact import publish_artifact
+from src.models.logistic_regression_nn import LogisticRegression
 from src.utils.helper_functions import plot_learning_curve
 
-def train_model(X_train, y_train, learning_rate=0.01, num_iterations=2000):
+def train_model(X_train, y_train, learning_rate=0.01, num_iterations=2000, optimizer="gd", batch_size=None):
     model = LogisticRegression()
-    model.fit(X_train, y_train, num_iterations=num_iterations, learning_rate=learning_rate)
+    model.fit(X_train, y_train, num_iterations=num_iterations, learning_rate=learning_rate,
+              optimizer=optimizer, batch_size=batch_size)
+    return model
+
+def train_model_streaming(dataset, learning_rate=0.01, num_epochs=10, optimizer="adam"):
+    model = LogisticRegression()
+    model.fit_batches(dataset, dataset.num_features, num_epochs=num_epochs, learning_rate=learning_rate,
+                      optimizer=optimizer)
     return model
 
 if __name__ == "__main__":
-    # Load and preprocess data
-    X_train, y_train = load_dataset(train=True)
-    X_train = preprocess_data(X_train)
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Train the logistic regression classifier.")
+    parser.add_argument("--learning-rate", type=float, default=0.01)
+    parser.add_argument("--num-iterations", type=int, default=2000)
+    parser.add_argument("--epochs", type=int, default=10, help="Passes over the h5 file with --stream")
+    parser.add_argument("--optimizer", choices=["gd", "sgd", "momentum", "adam"], default=None,
+                        help="Defaults to gd, or adam with --stream")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--stream", action="store_true", help="Stream mini-batches from the h5 file")
+    args = parser.parse_args()
+
+    if args.stream:
+        # Train from disk one mini-batch at a time
+        dataset = H5Dataset.from_split(train=True, batch_size=args.batch_size or 64, shuffle=True)
+        # Leave the optimizer to train_model_streaming unless one was asked for
+        optimizer = {"optimizer": args.optimizer} if args.optimizer else {}
+        model = train_model_streaming(dataset, args.learning_rate, args.epochs, **optimizer)
+    else:
+        # Load and preprocess data
+        X_train, y_train = load_preprocessed_dataset(train=True, cache=DatasetCache())
 
-    # Train model
-    model = train_model(X_train, y_train)
+        # Train model
+        model = train_model(X_train, y_train, args.learning_rate, args.num_iterations, args.optimizer or "gd",
+                            args.batch_size)
 
-    # Save model
-    model.save("trained_model.pkl")
+    # Save model as a new version and point model/latest at it
+    publish_artifact(model, "model")
 
     # Plot learning curve
-    plot_learning_curve(model.costs)
\ No newline at end of file
+    plot_learning_curve(model.costs)
@@ -1,9 +1,20 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
-def plot_learning_curve(costs):
-    # Plot learning curve
-    pass
+def plot_learning_curve(costs, path=None):
+    # Imported here so importing this module does not pull in matplotlib
+    import matplotlib.pyplot as plt
+
+    # Plot learning curve, to a file if a path is given
+    fig, ax = plt.subplots()
+    ax.plot(np.arange(len(costs)), costs)
+    ax.set_xlabel("Iteration")
+    ax.set_ylabel("Cost")
+    ax.set_title("Learning curve")
+    if path:
+        fig.savefig(path)
+        plt.close(fig)
+    else:
+        plt.show()
 
 def calculate_accuracy(predictions, labels):
     # Calculate accuracy
@@ -1,11 +1,191 @@
 import numpy as np
-from typing import Union
+from typing import Any, Dict, Optional, Union
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of examples folded into the confusion matrix at a time, which bounds the
+# size of the temporaries regardless of the input size
+CHUNK_SIZE = 1 << 20
+
+
+def _class_indices(values: np.ndarray, num_classes: int) -> np.ndarray:
+    # Booleans, integers and integral floats (e.g. float32 labels) are class indices;
+    # anything else, such as probabilities, is rejected rather than truncated
+    if values.dtype.kind not in "biuf":
+        raise ValueError(f"Labels and predictions must be integers in [0, {num_classes}), got dtype {values.dtype}")
+    with np.errstate(invalid="ignore"):
+        indices = values.astype(np.intp)
+    if values.dtype.kind == "f" and not np.array_equal(indices, values):
+        raise ValueError(f"Labels and predictions must be integers in [0, {num_classes}), "
+                         f"got non-integral values such as probabilities")
+    if indices.size and (indices.min() < 0 or indices.max() >= num_classes):
+        raise ValueError(f"Labels and predictions must be integers in [0, {num_classes})")
+    return indices
+
+
+def _confusion_counts(predictions: np.ndarray, labels: np.ndarray, num_classes: int,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+    predictions = np.asarray(predictions).ravel()
+    labels = np.asarray(labels).ravel()
+    if predictions.shape != labels.shape:
+        raise ValueError("Shapes of predictions and labels must match")
+
+    # Counted separately and added to ``out`` at the end, so a rejected chunk leaves it unchanged
+    counts = np.zeros(num_classes * num_classes, dtype=np.int64)
+    for start in range(0, labels.size, CHUNK_SIZE):
+        chunk_labels = _class_indices(labels[start:start + CHUNK_SIZE], num_classes)
+        chunk_predictions = _class_indices(predictions[start:start + CHUNK_SIZE], num_classes)
+
+        # Cell index true * k + predicted, counted in one bincount
+        chunk_labels *= num_classes
+        chunk_labels += chunk_predictions
+        counts += np.bincount(chunk_labels, minlength=num_classes * num_classes)
+    if out is None:
+        return counts.reshape(num_classes, num_classes)
+    out += counts.reshape(num_classes, num_classes)
+    return out
+
+
+def confusion_matrix(predictions: np.ndarray, labels: np.ndarray, num_classes: int = 2) -> np.ndarray:
+    """
+    Compute the confusion matrix in a single pass over the data.
+
+    Args:
+        predictions (np.ndarray): Predicted class indices, any shape
+        labels (np.ndarray): True class indices, same shape as predictions
+        num_classes (int): Number of classes
+
+    Returns:
+        np.ndarray: (num_classes, num_classes) int64 matrix; rows are true classes and
+            columns are predicted classes, so the binary case is
+            [[true_negatives, false_positives], [false_negatives, true_positives]]
+
+    Raises:
+        ValueError: If the shapes don't match or a value is not a valid class index
+            (including non-integral floats such as probabilities)
+    """
+    return _confusion_counts(predictions, labels, num_classes)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def metrics_from_confusion_matrix(matrix: np.ndarray) -> Dict[str, Any]:
+    """
+    Derive classification metrics from a confusion matrix.
+
+    For two classes, precision, recall, F1 and specificity are those of the positive
+    class (1). For more classes they are per-class lists, with unweighted (macro)
+    averages under ``macro_*`` keys. MCC uses the multiclass (Gorodkin) form, which
+    equals the usual binary MCC for two classes. Undefined ratios are reported as 0.
+
+    Args:
+        matrix (np.ndarray): Confusion matrix from ``confusion_matrix``
+
+    Returns:
+        Dict[str, Any]: accuracy, precision, recall, f1_score, specificity, mcc, support
+            and the confusion matrix
+    """
+    matrix = np.asarray(matrix, dtype=np.int64)
+    total = matrix.sum()
+    true_positives = np.diag(matrix)
+    predicted = matrix.sum(axis=0)
+    actual = matrix.sum(axis=1)
+    false_positives = predicted - true_positives
+    false_negatives = actual - true_positives
+    true_negatives = total - true_positives - false_positives - false_negatives
+
+    precision = _safe_divide(true_positives, predicted)
+    recall = _safe_divide(true_positives, actual)
+    f1_score = _safe_divide(2 * precision * recall, precision + recall)
+    specificity = _safe_divide(true_negatives, true_negatives + false_positives)
+
+    correct = float(true_positives.sum())
+    total = float(total)
+    mcc_denominator = np.sqrt((total ** 2 - float(np.dot(predicted, predicted))) *
+                              (total ** 2 - float(np.dot(actual, actual))))
+    mcc = (correct * total - float(np.dot(predicted, actual))) / mcc_denominator if mcc_denominator else 0.0
+
+    metrics = {
+        "accuracy": correct / total if total else 0.0,
+        "mcc": float(mcc),
+        "support": int(total),
+        "confusion_matrix": matrix,
+    }
+    if matrix.shape[0] == 2:
+        metrics.update({
+            "precision": float(precision[1]),
+            "recall": float(recall[1]),
+            "f1_score": float(f1_score[1]),
+            "specificity": float(specificity[1]),
+        })
+    else:
+        metrics.update({
+            "precision": precision.tolist(),
+            "recall": recall.tolist(),
+            "f1_score": f1_score.tolist(),
+            "specificity": specificity.tolist(),
+            "macro_precision": float(precision.mean()),
+            "macro_recall": float(recall.mean()),
+            "macro_f1_score": float(f1_score.mean()),
+        })
+    return metrics
+
+
+class MetricsAccumulator:
+    """
+    Streaming classification metrics: feed predictions and labels chunk by chunk and
+    read the metrics at any point. Only the confusion matrix is kept, so memory does
+    not grow with the number of examples.
+
+    Args:
+        num_classes (int): Number of classes
+
+    Usage:
+        accumulator = MetricsAccumulator()
+        for X, y in batches:
+            accumulator.update(model.predict(X), y)
+        metrics = accumulator.compute()
+    """
+
+    def __init__(self, num_classes: int = 2) -> None:
+        if num_classes < 2:
+            raise ValueError("num_classes must be at least 2")
+        self.num_classes = num_classes
+        self.matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    def update(self, predictions: np.ndarray, labels: np.ndarray) -> "MetricsAccumulator":
+        """
+        Add a chunk of predictions and labels.
+
+        Raises:
+            ValueError: If the shapes don't match or a value is not a valid class index.
+                The accumulated counts are left unchanged.
+        """
+        _confusion_counts(predictions, labels, self.num_classes, out=self.matrix)
+        return self
+
+    def merge(self, other: "MetricsAccumulator") -> "MetricsAccumulator":
+        if other.num_classes != self.num_classes:
+            raise ValueError("Cannot merge accumulators with different numbers of classes")
+        self.matrix += other.matrix
+        return self
+
+    @property
+    def count(self) -> int:
+        return int(self.matrix.sum())
+
+    def compute(self) -> Dict[str, Any]:
+        return metrics_from_confusion_matrix(self.matrix)
+
+    def reset(self) -> None:
+        self.matrix[:] = 0
+
+
 def calculate_accuracy(predictions: np.ndarray, labels: np.ndarray) -> float:
     """
     Calculate the accuracy of predictions.
@@ -25,7 +205,7 @@ def calculate_accuracy(predictions: np.ndarray, labels: np.ndarray) -> float:
             raise ValueError("Shapes of predictions and labels must match")
 
         accuracy = np.mean(predictions == labels)
-        logger.info(f"Accuracy calculated: {accuracy:.4f}")
+        logger.debug(f"Accuracy calculated: {accuracy:.4f}")
         return accuracy
     except Exception as e:
         logger.error(f"Error calculating accuracy: {str(e)}")
@@ -59,7 +239,7 @@ def calculate_f1_score(predictions: np.ndarray, labels: np.ndarray) -> float:
 
         f1_score = 2 * (precision * recall) / (precision + recall + 1e-10)
 
-        logger.info(f"F1 score calculated: {f1_score:.4f}")
+        logger.debug(f"F1 score calculated: {f1_score:.4f}")
         return f1_score
     except Exception as e:
         logger.error(f"Error calculating F1 score: {str(e)}")
@@ -85,17 +265,9 @@ def calculate_confusion_matrix(predictions: np.ndarray, labels: np.ndarray) -> n
         if predictions.shape != labels.shape:
             raise ValueError("Shapes of predictions and labels must match")
 
-        true_positives = np.sum((predictions == 1) & (labels == 1))
-        true_negatives = np.sum((predictions == 0) & (labels == 0))
-        false_positives = np.sum((predictions == 1) & (labels == 0))
-        false_negatives = np.sum((predictions == 0) & (labels == 1))
+        confusion_matrix = _confusion_counts(predictions, labels, 2)
 
-        confusion_matrix = np.array([
-            [true_negatives, false_positives],
-            [false_negatives, true_positives]
-        ])
-
-        logger.info("Confusion matrix calculated")
+        logger.debug("Confusion matrix calculated")
         return confusion_matrix
     except Exception as e:
         logger.error(f"Error calculating confusion matrix: {str(e)}")
@@ -103,36 +275,35 @@ def calculate_confusion_matrix(predictions: np.ndarray, labels: np.ndarray) -> n
 
 def calculate_metrics(predictions: np.ndarray, labels: np.ndarray) -> dict:
     """
-    Calculate multiple metrics: accuracy, F1 score, and confusion matrix.
+    Calculate multiple metrics: accuracy, F1 score, and confusion matrix, plus
+    precision, recall, specificity and MCC, from a single pass over the data.
 
     Args:
         predictions (np.ndarray): Predicted labels (0 or 1)
         labels (np.ndarray): True labels (0 or 1)
 
     Returns:
-        dict: Dictionary containing accuracy, F1 score, and confusion matrix
+        dict: Dictionary containing accuracy, F1 score, confusion matrix, precision,
+            recall, specificity, MCC and support
 
     Raises:
         ValueError: If there's an error calculating any of the metrics
     """
     try:
-        accuracy = calculate_accuracy(predictions, labels)
-        f1_score = calculate_f1_score(predictions, labels)
-        confusion_matrix = calculate_confusion_matrix(predictions, labels)
+        if predictions.shape != labels.shape:
+            raise ValueError("Shapes of predictions and labels must match")
 
-        metrics = {
-            "accuracy": accuracy,
-            "f1_score": f1_score,
-            "confusion_matrix": confusion_matrix
-        }
+        # One pass for everything, derived from the confusion matrix
+        metrics = metrics_from_confusion_matrix(_confusion_counts(predictions, labels, 2))
 
-        logger.info("All metrics calculated successfully")
+        logger.debug("All metrics calculated successfully")
         return metrics
     except Exception as e:
         logger.error(f"Error calculating metrics: {str(e)}")
         raise
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     # Example usage
     try:
         # Generate some dummy data
@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+import pytest
+import yaml
+from PIL import Image
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+from src.models.artifact import publish_artifact
+from src.models.logistic_regression_nn import LogisticRegression
+
+N_FEATURES = 64 * 64 * 3
+
+
+def make_model(bias: float = 0.0, seed: int = 0) -> LogisticRegression:
+    model = LogisticRegression()
+    model.w = np.random.default_rng(seed).normal(scale=0.01, size=(N_FEATURES, 1)).astype(np.float32)
+    model.b = bias
+    return model
+
+
+def make_png(seed: int = 0) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 256, size=(64, 64, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def api_config(tmp_path, monkeypatch):
+    """Development configuration with logs, metrics and the model under tmp_path."""
+    with open("config/dev/config.yml") as f:
+        config = yaml.safe_load(f)
+    config["logs"]["dir"] = str(tmp_path / "logs")
+    config["logs"]["async"]["enabled"] = False
+    config["model"] = {"path": str(tmp_path / "model" / "latest"), "poll_interval_s": 0}
+    config["metrics"]["dir"] = str(tmp_path / "metrics")
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump(config))
+
+    publish_artifact(make_model(bias=10.0), tmp_path / "model", version="v1")
+    for name in ("MODEL_PATH", "METRICS_DIR", "CONFIG_OVERLAYS"):
+        monkeypatch.delenv(name, raising=False)
+    return path
+
+
+@pytest.fixture
+def api_client(api_config):
+    """Client for an application started with ``api_config``."""
+    with TestClient(create_app(str(api_config))) as client:
+        yield client
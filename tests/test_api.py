@@ -0,0 +1,101 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from api import runtime
+from api.app import create_app
+from api.utils.metrics_exporter import RETIRED_FILE
+from src.models.artifact import publish_artifact, set_threshold
+
+from tests.conftest import make_model, make_png
+
+
+def _predict(client, data, name="image.png"):
+    response = client.post("/api/v1/predict", files={"image": (name, data, "image/png")})
+    assert response.status_code == 200, response.text
+    return response.json()["prediction"]
+
+
+def test_readiness_reports_the_model(api_client):
+    response = api_client.get("/api/v1/readyz")
+    assert response.json() == {"status": "ready", "model_version": "v1", "threshold": 0.5}
+
+
+def test_repeated_upload_is_served_from_the_cache(api_client):
+    data = make_png()
+    assert _predict(api_client, data) == 1
+    assert _predict(api_client, data) == 1
+    assert runtime.prediction_cache.stats()["hits"] == 1
+
+
+def test_threshold_change_is_not_served_from_the_cache(api_client, api_config):
+    data = make_png()
+    assert _predict(api_client, data) == 1
+    batch = api_client.post("/api/v2/predict/batch", files=[("files", ("image.png", data, "image/png"))])
+    assert json.loads(batch.text)["prediction"] == 1
+
+    # Same version, new header: nothing above a threshold of 1 is positive
+    set_threshold(api_config.parent / "model" / "v1", 1.0)
+    assert runtime.registry.load()
+    assert runtime.registry.version == "v1"
+    assert _predict(api_client, data) == 0
+    batch = api_client.post("/api/v2/predict/batch", files=[("files", ("image.png", data, "image/png"))])
+    assert json.loads(batch.text)["prediction"] == 0
+
+
+def test_prediction_is_cached_under_the_model_that_made_it(api_client, api_config, monkeypatch):
+    data = make_png()
+    preprocess = runtime.preprocess_pool.run
+
+    async def preprocess_then_swap(*args, **kwargs):
+        # A new model version lands while the upload is being decoded
+        result = await preprocess(*args, **kwargs)
+        publish_artifact(make_model(bias=-10.0), api_config.parent / "model", version="v2")
+        assert runtime.registry.load()
+        return result
+
+    monkeypatch.setattr(runtime.preprocess_pool, "run", preprocess_then_swap)
+    assert _predict(api_client, data) == 1
+    monkeypatch.undo()
+
+    key = runtime.prediction_cache.make_key(data, ("v1", 0.5))
+    assert runtime.prediction_cache.get(key) == 1
+    assert _predict(api_client, data) == 0
+
+
+def test_shutdown_retires_the_worker_metrics(api_config):
+    metrics_dir = api_config.parent / "metrics"
+    with TestClient(create_app(str(api_config))) as client:
+        _predict(client, make_png())
+        assert client.get("/api/v1/metrics").status_code == 200
+        assert (metrics_dir / f"{os.getpid()}.json").exists()
+
+    # The snapshot is removed and its counters are kept in the retired totals
+    assert not (metrics_dir / f"{os.getpid()}.json").exists()
+    assert json.loads((metrics_dir / RETIRED_FILE).read_text())["workers"] == 1
+
+
+def test_batch_prediction_error_is_reported_for_each_image_of_the_chunk(api_client, monkeypatch):
+    model = runtime.registry.current
+    predict_uint8 = model.predict_uint8
+    calls = []
+
+    def fail_first_chunk(X, *args, **kwargs):
+        calls.append(X.shape[1])
+        if len(calls) == 1:
+            raise ValueError("shapes not aligned")
+        return predict_uint8(X, *args, **kwargs)
+
+    monkeypatch.setattr(model, "predict_uint8", fail_first_chunk)
+    files = [("files", (f"image{i}.png", make_png(seed=i), "image/png")) for i in range(3)]
+    response = api_client.post("/api/v2/predict/batch?chunk_size=2", files=files)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    # One line per image: the failed chunk is neither blamed on an upload nor predicted again
+    assert lines == [
+        {"filename": "image0.png", "error": "Internal server error"},
+        {"filename": "image1.png", "error": "Internal server error"},
+        {"filename": "image2.png", "prediction": 1},
+    ]
+    assert calls == [2, 1]
@@ -0,0 +1,78 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.models.artifact import (HEADER_FILE, WEIGHTS_FILE, link_artifact, load_artifact, publish_artifact,
+                                 save_artifact, set_threshold)
+from src.models.logistic_regression_nn import LogisticRegression
+
+
+def _model(seed=0, n=12):
+    model = LogisticRegression()
+    model.w = np.random.default_rng(seed).normal(size=(n, 1)).astype(np.float32)
+    model.b = 0.25
+    return model
+
+
+def test_save_and_load_round_trip(tmp_path):
+    header = save_artifact(_model(), tmp_path / "artifact", version="v1")
+    model = load_artifact(tmp_path / "artifact")
+    assert header["version"] == "v1"
+    assert model.b == 0.25
+    np.testing.assert_array_equal(model.w, _model().w)
+
+
+def test_load_rejects_weights_that_do_not_match_the_header(tmp_path):
+    save_artifact(_model(0), tmp_path / "artifact", version="v1")
+    header = (tmp_path / "artifact" / HEADER_FILE).read_text()
+    # The weights of a newer save land before its header
+    save_artifact(_model(1), tmp_path / "artifact", version="v2")
+    (tmp_path / "artifact" / HEADER_FILE).write_text(header)
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        load_artifact(tmp_path / "artifact")
+
+
+def test_publish_artifact_swaps_the_latest_link(tmp_path):
+    first = publish_artifact(_model(0), tmp_path, version="v1")
+    second = publish_artifact(_model(1), tmp_path, version="v2")
+
+    latest = tmp_path / "latest"
+    assert latest.is_symlink()
+    assert os.readlink(latest) == "v2"
+    assert load_artifact(latest).artifact["version"] == second["version"]
+    assert load_artifact(tmp_path / "v1").artifact["version"] == first["version"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["latest", "v1", "v2"]
+
+
+def test_publish_artifact_moves_a_plain_latest_directory(tmp_path):
+    save_artifact(_model(0), tmp_path / "latest", version="v1")
+    publish_artifact(_model(1), tmp_path, version="v2")
+    assert os.readlink(tmp_path / "latest") == "v2"
+    assert (tmp_path / "v1" / WEIGHTS_FILE).is_file()
+
+
+def test_publish_artifact_refuses_to_replace_a_different_version(tmp_path):
+    publish_artifact(_model(0), tmp_path, version="v1")
+    with pytest.raises(ValueError):
+        publish_artifact(_model(1), tmp_path, version="v1")
+    assert os.readlink(tmp_path / "latest") == "v1"
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(".")]
+
+
+def test_link_artifact_refuses_to_replace_a_directory(tmp_path):
+    save_artifact(_model(), tmp_path / "v1", version="v1")
+    (tmp_path / "latest").mkdir()
+    with pytest.raises(ValueError):
+        link_artifact(tmp_path / "latest", tmp_path / "v1")
+
+
+def test_set_threshold_keeps_the_weights(tmp_path):
+    save_artifact(_model(), tmp_path / "artifact", version="v1")
+    set_threshold(tmp_path / "artifact", 0.9)
+    header = json.loads((tmp_path / "artifact" / HEADER_FILE).read_text())
+    assert header["threshold"] == 0.9
+    assert load_artifact(tmp_path / "artifact").threshold == 0.9
+    with pytest.raises(ValueError):
+        set_threshold(tmp_path / "artifact", 1.5)
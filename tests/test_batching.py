@@ -0,0 +1,58 @@
+import asyncio
+
+import numpy as np
+from api.utils.batching import MicroBatcher, QueueFullError
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_requests_share_a_forward_pass():
+    calls = []
+
+    def predict(X, context):
+        calls.append((X.shape[1], context))
+        return X[:1] * context
+
+    async def scenario():
+        batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(np.full((3, 1), i), 2) for i in range(4)))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = _run(scenario())
+    assert [int(result[0, 0]) for result in results] == [0, 2, 4, 6]
+    assert calls == [(4, 2)]
+    assert stats["batches"] == 1 and stats["requests"] == 4
+
+
+def test_requests_with_different_contexts_are_predicted_separately():
+    calls = []
+
+    def predict(X, context):
+        calls.append((X.shape[1], context))
+        return X[:1] + context
+
+    async def scenario():
+        batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(np.zeros((3, 1)), i % 2) for i in range(4)))
+        await batcher.stop()
+        return results
+
+    results = _run(scenario())
+    assert [int(result[0, 0]) for result in results] == [0, 1, 0, 1]
+    assert sorted(calls) == [(2, 0), (2, 1)]
+
+
+def test_full_queue_rejects_requests():
+    async def scenario():
+        batcher = MicroBatcher(lambda X, context: X[:1], max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+        # All three are queued before the batching worker gets to run
+        results = await asyncio.gather(*(batcher.submit(np.zeros((3, 1))) for _ in range(3)), return_exceptions=True)
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = _run(scenario())
+    assert [type(result) for result in results] == [np.ndarray, QueueFullError, QueueFullError]
+    assert stats["rejected"] == 2
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+import yaml
+
+from api.utils import config as config_module
+from api.utils.config import OVERLAYS_ENV, ConfigLoader, clear_cache, merge_config
+
+LOGS = {"dir": "logs", "fname": "app"}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    monkeypatch.delenv(OVERLAYS_ENV, raising=False)
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def _write(path, data):
+    path.write_text(yaml.safe_dump(data))
+    return str(path)
+
+
+def test_unchanged_files_are_not_parsed_again(tmp_path, monkeypatch):
+    path = _write(tmp_path / "config.yml", {"logs": LOGS})
+    reads = []
+    read_yaml = config_module._read_yaml
+    monkeypatch.setattr(config_module, "_read_yaml", lambda p: reads.append(p) or read_yaml(p))
+
+    first = ConfigLoader(path).load()
+    assert ConfigLoader(path).load() is first
+    assert len(reads) == 1
+
+    # A rewrite changes the size (and usually the mtime), which invalidates the entry
+    _write(tmp_path / "config.yml", {"logs": {**LOGS, "fname": "rewritten"}})
+    reloaded = ConfigLoader(path).load()
+    assert len(reads) == 2
+    assert reloaded.logs.fname == "rewritten"
+
+
+def test_overlays_are_deep_merged_in_order(tmp_path, monkeypatch):
+    path = _write(tmp_path / "config.yml", {
+        "logs": {**LOGS, "level": "INFO", "elasticsearch": {"enabled": False, "hosts": ["a", "b"]}},
+        "model": {"path": "model/latest", "poll_interval_s": 5},
+        "batch_predict": {"chunk_size": 256},
+    })
+    first = _write(tmp_path / "first.yml", {"logs": {"level": "DEBUG", "elasticsearch": {"hosts": ["c"]}},
+                                            "model": {"poll_interval_s": 1}})
+    second = _write(tmp_path / "second.yml", {"logs": {"level": "WARNING"}, "batch_predict": None})
+    monkeypatch.setenv(OVERLAYS_ENV, os.pathsep.join([first, second]))
+
+    config = ConfigLoader(path).load()
+
+    assert config.logs.level == "WARNING"
+    # Mappings merge key by key; lists are replaced, not appended to
+    assert config.logs.elasticsearch == {"enabled": False, "hosts": ["c"]}
+    assert config.model.poll_interval_s == 1 and config.model.path == "model/latest"
+    # null replaces a whole section
+    assert config.raw["batch_predict"] is None
+
+
+def test_overlays_do_not_modify_the_base():
+    base = {"logs": {"level": "INFO"}}
+    assert merge_config(base, {"logs": {"level": "DEBUG"}}) == {"logs": {"level": "DEBUG"}}
+    assert base == {"logs": {"level": "INFO"}}
+
+
+def test_join_tag_on_the_safe_loader(tmp_path):
+    path = tmp_path / "config.yml"
+    path.write_text('logs:\n  dir: logs\n  fname: !join [app, "-", 2]\n')
+    assert ConfigLoader(str(path)).load().logs.fname == "app-2"
+
+
+def test_unsafe_tags_are_rejected(tmp_path):
+    path = tmp_path / "config.yml"
+    path.write_text("logs: !!python/object/apply:os.getcwd []\n")
+    with pytest.raises(yaml.YAMLError):
+        ConfigLoader(str(path)).load()
+
+
+@pytest.mark.parametrize("data,key", [
+    ({"logs": {**LOGS, "colour": "red"}}, "logs.colour"),
+    ({"logs": {**LOGS, "level": "LOUD"}}, "logs.level"),
+    ({"logs": {"dir": "logs"}}, "fname"),
+    ({"logs": LOGS, "model": {"poll_interval_s": -1}}, "model.poll_interval_s"),
+    ({"logs": LOGS, "pools": {"preprocess": {"max_workers": 0}}}, "max_workers"),
+    ({"model": {}}, "logs"),
+])
+def test_invalid_configuration_names_the_key(tmp_path, data, key):
+    path = _write(tmp_path / "config.yml", data)
+    with pytest.raises(ValueError, match=key):
+        ConfigLoader(path).load()
+
+
+@pytest.mark.parametrize("path", ["config/dev/config.yml", "config/prod/config.yml"])
+def test_shipped_configurations_are_valid(path):
+    assert ConfigLoader(path, overlays=[]).load().logs.fname
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.evaluation.curves import compute_curves
+
+
+def _brute_force_auc(scores, labels):
+    positives = scores[labels == 1]
+    negatives = scores[labels == 0]
+    wins = (positives[:, None] > negatives[None, :]).sum() + 0.5 * (positives[:, None] == negatives[None, :]).sum()
+    return wins / (positives.size * negatives.size)
+
+
+def _f1(predictions, labels):
+    true_positives = np.sum(predictions & (labels == 1))
+    return 2 * true_positives / (predictions.sum() + (labels == 1).sum())
+
+
+def _brute_force_curves(scores, labels):
+    average_precision, previous_recall, best_f1 = 0.0, 0.0, 0.0
+    for threshold in np.unique(scores)[::-1]:
+        predictions = scores >= threshold
+        true_positives = np.sum(predictions & (labels == 1))
+        recall = true_positives / (labels == 1).sum()
+        average_precision += (recall - previous_recall) * true_positives / predictions.sum()
+        previous_recall = recall
+        best_f1 = max(best_f1, _f1(predictions, labels))
+    return average_precision, best_f1
+
+
+@pytest.mark.parametrize("scores,labels", [
+    # Ties, including a tie across the classes
+    (np.array([0.9, 0.8, 0.8, 0.4, 0.3, 0.1]), np.array([1, 1, 0, 1, 0, 0])),
+    # Saturated sigmoid: 1.0 and 0.99999994 are adjacent float32 values
+    (np.array([1.0, 1.0, 0.99999994, 0.5], dtype=np.float32), np.array([1, 1, 0, 0])),
+    (np.random.default_rng(0).random(500).astype(np.float32), np.random.default_rng(1).integers(0, 2, 500)),
+    # Many ties; no score of 0, since "predict 1 for everything" needs a threshold below 0
+    (np.round(np.random.default_rng(2).random(500), 1) + 0.05, np.random.default_rng(3).integers(0, 2, 500)),
+])
+def test_curves_match_brute_force(scores, labels):
+    curves = compute_curves(scores, labels)
+    average_precision, best_f1 = _brute_force_curves(scores, labels)
+
+    assert curves["roc_auc"] == pytest.approx(_brute_force_auc(scores, labels))
+    assert curves["average_precision"] == pytest.approx(average_precision)
+    assert curves["best_f1_score"] == pytest.approx(best_f1)
+    # The stored threshold reproduces the best operating point with ``score > threshold``
+    assert _f1(scores > curves["best_threshold"], labels) == pytest.approx(best_f1)
+    assert 0.0 <= curves["best_threshold"] <= 1.0
+
+
+def test_saturated_scores_keep_the_best_threshold_between_them():
+    scores = np.array([1.0, 1.0, 0.99999994, 0.5], dtype=np.float32)
+    curves = compute_curves(scores, np.array([1, 1, 0, 0]))
+    np.testing.assert_array_equal(scores > curves["best_threshold"], [True, True, False, False])
+
+
+def test_single_class_is_rejected():
+    with pytest.raises(ValueError):
+        compute_curves(np.array([0.2, 0.7]), np.array([1, 1]))
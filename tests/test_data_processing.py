@@ -0,0 +1,36 @@
+import numpy as np
+from PIL import Image
+
+from src.data import data_processing
+from src.data.data_processing import _ingest_buffer_dir, ingest_images
+
+
+def _write_images(folder, count, size=(8, 8)):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        pixels = rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)
+        path = folder / f"image_{i}.png"
+        Image.fromarray(pixels).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_ingest_buffer_dir_falls_back_when_shm_is_too_small(monkeypatch, tmp_path):
+    monkeypatch.setattr(data_processing, "SHM_DIR", str(tmp_path))
+    free = data_processing.shutil.disk_usage(str(tmp_path)).free
+    assert _ingest_buffer_dir(1) == str(tmp_path)
+    assert _ingest_buffer_dir(free + 1) is None
+
+
+def test_ingest_images_matches_in_process_decoding(monkeypatch, tmp_path):
+    paths = _write_images(tmp_path, 5)
+    expected = ingest_images(paths, size=(8, 8), workers=1)
+
+    # Force the shared buffer out of /dev/shm
+    monkeypatch.setattr(data_processing, "_ingest_buffer_dir", lambda nbytes: None)
+    X = ingest_images(paths, size=(8, 8), workers=2, chunk_size=2)
+
+    assert X.shape == (8 * 8 * 3, 5)
+    assert X.dtype == np.float32
+    np.testing.assert_array_equal(X, expected)
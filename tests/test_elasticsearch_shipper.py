@@ -0,0 +1,153 @@
+import gzip
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from api.utils.logging import JsonFormatter
+from monitoring.elk.shipper import ElasticsearchHandler
+
+
+class StubElasticsearch:
+    """Minimal ``_bulk`` endpoint that records requests and answers from a script."""
+
+    def __init__(self):
+        self.requests = []
+        # Each entry answers one request: an HTTP status, or a list of per-item statuses
+        self.script = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers["Content-Length"]))
+                body = gzip.decompress(raw).decode() if self.headers.get("Content-Encoding") == "gzip" else raw.decode()
+                lines = body.splitlines()
+                actions = [json.loads(line) for line in lines[0::2]]
+                documents = [json.loads(line) for line in lines[1::2]]
+                with stub.lock:
+                    stub.requests.append({"path": self.path, "headers": dict(self.headers),
+                                          "actions": actions, "documents": documents})
+                    answer = stub.script.pop(0) if stub.script else None
+                if isinstance(answer, int):
+                    self.send_response(answer)
+                    self.end_headers()
+                    return
+                statuses = answer or [201] * len(documents)
+                result = {"errors": any(status >= 300 for status in statuses),
+                          "items": [{"index": {"status": status}} for status in statuses]}
+                payload = json.dumps(result).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def ids(self, request):
+        return [action["index"]["_id"] for action in request["actions"]]
+
+    def messages(self):
+        return [document["message"] for request in self.requests for document in request["documents"]]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubElasticsearch()
+    yield server
+    server.close()
+
+
+def _handler(stub, **kwargs):
+    options = {"batch_size": 3, "flush_interval_s": 60, "max_retries": 3, "backoff_s": 0.01, "timeout_s": 5}
+    options.update(kwargs)
+    handler = ElasticsearchHandler(url=stub.url, index="test-logs", **options)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def _emit(handler, *messages):
+    for message in messages:
+        handler.emit(logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None))
+
+
+def test_records_are_sent_in_gzipped_batches_with_unique_ids(stub):
+    handler = _handler(stub)
+    _emit(handler, *(f"record {i}" for i in range(7)))
+    handler.close()
+
+    assert sorted(stub.messages()) == sorted(f"record {i}" for i in range(7))
+    assert all(request["path"] == "/_bulk" for request in stub.requests)
+    assert all(request["headers"]["Content-Encoding"] == "gzip" for request in stub.requests)
+    assert all(len(request["documents"]) <= 3 for request in stub.requests)
+    ids = [document_id for request in stub.requests for document_id in stub.ids(request)]
+    assert len(set(ids)) == 7
+    assert all(action["index"]["_index"].startswith("test-logs-") for action in stub.requests[0]["actions"])
+    assert handler.shipped == 7
+
+
+def test_failed_requests_and_items_are_retried_with_the_same_ids(stub):
+    stub.script = [503, [201, 429, 201]]
+    handler = _handler(stub)
+    _emit(handler, "a", "b", "c")
+    handler.close()
+
+    first, second, third = stub.requests
+    assert stub.ids(first) == stub.ids(second)
+    assert [document["message"] for document in third["documents"]] == ["b"]
+    assert stub.ids(third) == [stub.ids(second)[1]]
+    assert handler.spilled == 0
+
+
+def test_batches_are_spilled_while_down_and_replayed(stub, tmp_path):
+    stub.script = [503, 503]
+    handler = _handler(stub, max_retries=1, spill_dir=str(tmp_path))
+    _emit(handler, "a", "b")
+    handler._flush_buffer()
+    assert handler.spilled == 2
+    assert len(list(tmp_path.glob("*.ndjson"))) == 1
+
+    # Elasticsearch is back: the next successful flush replays the spill file
+    _emit(handler, "c")
+    handler.close()
+    assert list(tmp_path.glob("*.ndjson")) == []
+    spilled_ids = stub.ids(stub.requests[0])
+    assert stub.ids(stub.requests[-1]) == spilled_ids
+    assert sorted(stub.messages()[-3:]) == ["a", "b", "c"]
+
+
+def test_partially_replayed_spill_keeps_only_rejected_items(stub, tmp_path):
+    stub.script = [503, 503]
+    handler = _handler(stub, max_retries=1, spill_dir=str(tmp_path))
+    _emit(handler, "a", "b", "c")
+    handler._flush_buffer()
+    spill_file, = tmp_path.glob("*.ndjson")
+    spilled_ids = stub.ids(stub.requests[0])
+
+    stub.script = [[201], [201, 429, 503]]
+    _emit(handler, "d")
+    handler._flush_buffer()
+    lines = spill_file.read_text().splitlines()
+    assert [json.loads(line)["index"]["_id"] for line in lines[0::2]] == spilled_ids[1:]
+    assert [json.loads(line)["message"] for line in lines[1::2]] == ["b", "c"]
+    sent = len(stub.requests)
+
+    _emit(handler, "e")
+    handler.close()
+    assert list(tmp_path.glob("*.ndjson")) == []
+    assert stub.ids(stub.requests[-1]) == spilled_ids[1:]
+    # "a" was accepted by the first replay and is not sent again
+    assert all(document["message"] != "a" for request in stub.requests[sent:] for document in request["documents"])
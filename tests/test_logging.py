@@ -0,0 +1,43 @@
+import logging
+import logging.handlers
+
+import yaml
+
+from api.utils.config import LogsConfig
+from api.utils.logging import JsonFormatter, setup_logger, stop_logging
+
+
+def _file_handler(name):
+    return next(handler for handler in logging.getLogger(name).handlers
+                if isinstance(handler, logging.handlers.TimedRotatingFileHandler))
+
+
+def test_setup_logger_reads_the_typed_section(tmp_path):
+    logs = LogsConfig(dir=str(tmp_path / "logs"), fname="typed", level="warning", when="H", interval=2,
+                      backup_count=3, format="json")
+    # The typed section is used as is: the config file is never read
+    setup_logger(str(tmp_path / "missing.yml"), "test_typed", logs=logs)
+    try:
+        handler = _file_handler("test_typed")
+        assert logging.getLogger("test_typed").level == logging.WARNING
+        assert handler.level == logging.WARNING
+        assert isinstance(handler.formatter, JsonFormatter)
+        assert handler.when == "H" and handler.interval == 2 * 60 * 60
+        assert handler.backupCount == 3
+        assert handler.baseFilename.startswith(str(tmp_path / "logs" / "typed-"))
+    finally:
+        stop_logging()
+
+
+def test_setup_logger_loads_the_section_from_the_config_file(tmp_path):
+    path = tmp_path / "config.yml"
+    path.write_text(yaml.safe_dump({"logs": {"dir": str(tmp_path / "logs"), "fname": "loaded"}}))
+    setup_logger(str(path), "test_loaded", log_level="debug")
+    try:
+        handler = _file_handler("test_loaded")
+        # logs.level is unset, so log_level applies; the other fields keep their defaults
+        assert handler.level == logging.DEBUG
+        assert handler.when == "MIDNIGHT" and handler.backupCount == 15
+        assert not isinstance(handler.formatter, JsonFormatter)
+    finally:
+        stop_logging()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.utils.metrics import MetricsAccumulator, confusion_matrix
+
+
+def test_confusion_matrix_counts():
+    predictions = np.array([0, 1, 1, 0, 1])
+    labels = np.array([0, 1, 0, 1, 1])
+    np.testing.assert_array_equal(confusion_matrix(predictions, labels), [[1, 1], [1, 2]])
+
+
+def test_confusion_matrix_accepts_booleans_and_integral_floats():
+    predictions = np.array([[True, False, True]])
+    labels = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+    np.testing.assert_array_equal(confusion_matrix(predictions, labels), [[1, 1], [0, 1]])
+
+
+@pytest.mark.parametrize("predictions", [
+    np.array([0.9, 0.1, 0.6]),
+    np.array([0.0, np.nan, 1.0]),
+    np.array([0.0, np.inf, 1.0]),
+    np.array(["0", "1", "1"]),
+])
+def test_confusion_matrix_rejects_non_integral_values(predictions):
+    with pytest.raises(ValueError):
+        confusion_matrix(predictions, np.array([1, 0, 1]))
+
+
+@pytest.mark.parametrize("labels", [np.array([0, 2, 1]), np.array([0, -1, 1]), np.array([0, 1, 2], dtype=np.uint64)])
+def test_confusion_matrix_rejects_out_of_range_classes(labels):
+    with pytest.raises(ValueError):
+        confusion_matrix(np.array([0, 1, 1]), labels)
+
+
+def test_confusion_matrix_empty():
+    np.testing.assert_array_equal(confusion_matrix(np.array([]), np.array([])), np.zeros((2, 2)))
+
+
+def test_accumulator_rejection_leaves_counts_unchanged():
+    accumulator = MetricsAccumulator().update(np.array([1, 0]), np.array([1, 1]))
+    with pytest.raises(ValueError):
+        accumulator.update(np.array([0.9, 0.2]), np.array([1, 0]))
+    assert accumulator.count == 2
+
+
+def test_accumulator_rejection_in_later_chunk_leaves_counts_unchanged(monkeypatch):
+    monkeypatch.setattr("src.utils.metrics.CHUNK_SIZE", 2)
+    accumulator = MetricsAccumulator()
+    with pytest.raises(ValueError):
+        accumulator.update(np.array([1, 0, 0.5]), np.array([1, 1, 0]))
+    assert accumulator.count == 0
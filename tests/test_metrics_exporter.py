@@ -0,0 +1,113 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from api.utils.metrics import NUM_SHARDS, Metrics
+from api.utils.metrics_exporter import RETIRED_FILE, MetricsExporter, render_prometheus
+
+
+def _exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _worker_snapshot(pid, predictions, queue_depth, host=None, age=0.0):
+    metrics = Metrics()
+    for _ in range(predictions):
+        metrics.record_prediction(1, 0.01)
+    return {
+        "pid": pid,
+        "host": host or socket.gethostname(),
+        "time": time.time() - age,
+        "metrics": metrics.snapshot(),
+        "batching": {"queue_depth": queue_depth, "batches": predictions, "requests": predictions, "rejected": 1,
+                     "average_batch_size": 1.0, "batch_size_distribution": {"1": predictions}},
+        "prediction_cache": {"hits": 2, "misses": predictions, "evictions": 0},
+        "model": {"active_version": f"old-{pid}"},
+    }
+
+
+def _write(directory, snapshot):
+    (directory / f"{snapshot['pid']}.json").write_text(json.dumps(snapshot))
+
+
+def _exporter(directory, predictions=0):
+    metrics = Metrics()
+    for _ in range(predictions):
+        metrics.record_prediction(0, 0.01)
+    batching = {"queue_depth": 0, "batches": 0, "requests": 0, "rejected": 0, "average_batch_size": 0,
+                "batch_size_distribution": {}}
+    return MetricsExporter(metrics, {"batching": lambda: batching, "model": lambda: {"active_version": "v2"}},
+                           directory=str(directory), interval=5.0)
+
+
+def test_exited_workers_are_retired(tmp_path):
+    dead_pid = _exited_pid()
+    _write(tmp_path, _worker_snapshot(dead_pid, predictions=3, queue_depth=7))
+    # A worker on another host that stopped writing snapshots
+    _write(tmp_path, _worker_snapshot(999999, predictions=4, queue_depth=9, host="elsewhere", age=60))
+    # A worker on another host that is still running
+    _write(tmp_path, _worker_snapshot(888888, predictions=5, queue_depth=2, host="elsewhere"))
+    exporter = _exporter(tmp_path, predictions=1)
+
+    text = exporter.render_prometheus()
+
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == sorted(
+        [f"{os.getpid()}.json", "888888.json", RETIRED_FILE])
+    assert "ml_classifier_predictions_total{endpoint=\"predict\",class=\"1\"} 12" in text
+    assert "ml_classifier_batch_requests_rejected_total 3" in text
+    assert f"old-{dead_pid}" not in text and "old-999999" not in text
+    assert "old-888888" in text
+    depths = [line for line in text.splitlines() if line.startswith("ml_classifier_batch_queue_depth{")]
+    assert sorted(depths) == sorted([f'ml_classifier_batch_queue_depth{{worker="{os.getpid()}"}} 0',
+                                     'ml_classifier_batch_queue_depth{worker="888888"} 2'])
+
+    # Counters survive in retired.json and are not folded in twice
+    result = exporter.get_metrics()
+    assert result["total_predictions"] == 13
+    assert result["workers"] == 2
+    assert json.loads((tmp_path / RETIRED_FILE).read_text())["workers"] == 2
+
+
+def test_retire_on_shutdown_keeps_counters(tmp_path):
+    exporter = _exporter(tmp_path, predictions=2)
+    exporter.write_snapshot()
+    exporter.retire()
+
+    assert not (tmp_path / f"{os.getpid()}.json").exists()
+    other = _exporter(tmp_path)
+    assert other.get_metrics()["total_predictions"] == 2
+
+
+def test_render_without_directory_reports_the_local_process():
+    exporter = MetricsExporter(Metrics(), {}, directory=None)
+    snapshots = exporter.collect()
+    assert len(snapshots) == 1
+    assert render_prometheus(snapshots).startswith("# HELP ml_classifier_predictions_total")
+
+
+def test_recording_threads_use_different_shards():
+    metrics = Metrics()
+    threads = 8
+    # All threads are alive at once, as in a thread pool
+    barrier = threading.Barrier(threads)
+
+    def record():
+        barrier.wait()
+        for _ in range(10):
+            metrics.record_prediction(1, 0.01)
+
+    workers = [threading.Thread(target=record) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    used = [shard for shard in metrics.shards if shard.series]
+    assert len(used) == min(threads, NUM_SHARDS)
+    assert metrics.get_metrics()["total_predictions"] == threads * 10
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import runtime
+from api.utils.model_registry import ModelRegistry
+from api.v1 import endpoints as v1
+from src.models.artifact import publish_artifact, save_artifact
+from src.models.logistic_regression_nn import LogisticRegression
+
+
+def _model(bias, n=12):
+    model = LogisticRegression()
+    model.w = np.zeros((n, 1), dtype=np.float32)
+    model.b = bias
+    return model
+
+
+def _registry(path):
+    registry = ModelRegistry(str(path), loader=LogisticRegression.load, poll_interval=0)
+    registry.start()
+    return registry
+
+
+def test_rollback_repoints_the_link_for_every_worker(tmp_path):
+    publish_artifact(_model(1.0), tmp_path, version="v1")
+    workers = [_registry(tmp_path / "latest") for _ in range(2)]
+    publish_artifact(_model(2.0), tmp_path, version="v2")
+    for registry in workers:
+        assert registry.load()
+        assert registry.version == "v2"
+
+    assert workers[0].rollback() == "v1"
+    assert workers[0].status()["rollbacks"] == 1
+    # The other worker follows on its next poll
+    assert workers[1].load()
+    assert workers[1].version == "v1"
+    assert workers[0].current.b == workers[1].current.b == 1.0
+
+
+def test_rollback_without_a_symlink_is_refused(tmp_path):
+    save_artifact(_model(1.0), tmp_path / "model", version="v1")
+    registry = _registry(tmp_path / "model")
+    save_artifact(_model(2.0), tmp_path / "other", version="v2")
+    with pytest.raises(RuntimeError):
+        registry.rollback()
+
+
+def test_failed_rollback_keeps_the_link_on_the_active_model(tmp_path):
+    publish_artifact(_model(1.0), tmp_path, version="v1")
+    registry = _registry(tmp_path / "latest")
+    publish_artifact(_model(2.0), tmp_path, version="v2")
+    registry.load()
+    (tmp_path / "v1" / "w.npy").write_bytes(b"corrupt")
+
+    with pytest.raises(RuntimeError):
+        registry.rollback()
+    assert registry.version == "v2"
+    assert (tmp_path / "latest").resolve() == (tmp_path / "v2").resolve()
+    assert not registry.load()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    publish_artifact(_model(1.0), tmp_path, version="v1")
+    registry = _registry(tmp_path / "latest")
+    publish_artifact(_model(2.0), tmp_path, version="v2")
+    registry.load()
+    monkeypatch.setattr(runtime, "registry", registry)
+    app = FastAPI()
+    app.include_router(v1.router, prefix="/api/v1")
+    return TestClient(app)
+
+
+def test_rollback_endpoint_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.post("/api/v1/model/rollback").status_code == 403
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.post("/api/v1/model/rollback").status_code == 401
+    assert client.post("/api/v1/model/rollback", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    response = client.post("/api/v1/model/rollback", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json() == {"model_version": "v1"}
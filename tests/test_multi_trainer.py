@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.models.logistic_regression_nn import LogisticRegression
+
+
+def _data(m=300, n=20, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, m)).astype(np.float32)
+    y = (rng.normal(size=(1, n)) @ X > 0).astype(np.float32)
+    return X, y
+
+
+def test_fit_many_matches_fitting_one_by_one():
+    X, y = _data()
+    learning_rates = [0.01, 0.1, 0.5]
+    models = LogisticRegression.fit_many(X, y, learning_rates, num_iterations=300, tol=3e-3)
+    # The models converge at different iterations
+    assert len({model.stop_iteration for model in models}) == len(models)
+
+    for learning_rate, model in zip(learning_rates, models):
+        single = LogisticRegression().fit(X, y, num_iterations=300, learning_rate=learning_rate, tol=3e-3)
+        assert model.stop_reason == single.stop_reason
+        assert model.stop_iteration == single.stop_iteration
+        assert len(model.costs) == len(single.costs)
+        np.testing.assert_allclose(model.costs, single.costs, rtol=1e-4)
+        np.testing.assert_allclose(model.w, single.w, rtol=1e-3, atol=1e-5)
+        assert abs(model.b - single.b) < 1e-4
+
+
+def test_fit_many_without_tolerance_runs_every_iteration():
+    X, y = _data()
+    models = LogisticRegression.fit_many(X, y, [0.01, 0.1], num_iterations=250)
+    for model in models:
+        assert model.stop_reason == "max_iterations"
+        assert model.stop_iteration == 249
+        assert len(model.costs) == 3
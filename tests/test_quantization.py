@@ -0,0 +1,62 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from src.models.artifact import read_header
+from src.models.logistic_regression_nn import LogisticRegression
+from src.models.quantization import REPORT_METRICS, accuracy_delta_report, export_quantized
+
+from tests.conftest import N_FEATURES, make_model
+
+
+def _batches(model, sizes=(16, 16, 5), seed=0):
+    rng = np.random.default_rng(seed)
+    batches = []
+    for size in sizes:
+        X = rng.integers(0, 256, size=(N_FEATURES, size), dtype=np.uint8)
+        # Labels agree with the reference model except for a few flipped ones
+        y = model.predict_uint8(X)
+        y[:, :2] = 1 - y[:, :2]
+        batches.append((X, y))
+    return batches
+
+
+def test_report_of_a_model_against_itself_has_no_delta():
+    model = make_model()
+    report = accuracy_delta_report(model, model, _batches(model))
+    assert report["examples"] == 37
+    assert report["changed_decisions"] == 0
+    assert report["max_probability_difference"] == 0.0
+    assert report["reference"] == report["quantized"]
+    assert all(report["delta"][name] == 0 for name in REPORT_METRICS)
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_report_of_a_quantized_model(dtype):
+    model = make_model()
+    report = accuracy_delta_report(model, model.quantize(dtype), _batches(model))
+    assert report["examples"] == 37
+    assert 0 < report["max_probability_difference"] < 0.05
+    for name in REPORT_METRICS:
+        assert report["delta"][name] == pytest.approx(report["quantized"][name] - report["reference"][name])
+
+
+def test_export_quantized_from_a_legacy_pickle(tmp_path):
+    model = make_model()
+    # A pickle from before early stopping, artifacts, thresholds and quantization
+    for name in ("stop_reason", "stop_iteration", "artifact", "threshold", "weight_scale"):
+        del model.__dict__[name]
+    source = tmp_path / "old.pkl"
+    with open(source, "wb") as f:
+        pickle.dump(model, f)
+
+    header = export_quantized(source, tmp_path / "int8", "int8", batches=_batches(make_model()), version="q1")
+
+    assert header == read_header(tmp_path / "int8")
+    assert header["version"] == "q1"
+    assert header["training"]["quantized_from"] == str(source)
+    assert header["training"]["quantization_report"]["examples"] == 37
+    quantized = LogisticRegression.load(tmp_path / "int8")
+    assert quantized.w.dtype == np.int8
+    assert quantized.threshold == 0.5
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+
+from src.experiments import sweep
+from src.experiments.sweep import expand_grid, run_sweep
+
+
+def test_expand_grid():
+    configs = expand_grid({"learning_rate": [0.1, 0.01], "optimizer": ["gd"]})
+    assert configs == [{"learning_rate": 0.1, "optimizer": "gd"}, {"learning_rate": 0.01, "optimizer": "gd"}]
+
+
+def test_limit_blas_threads_restores_environment(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "7")
+    monkeypatch.delenv("OPENBLAS_NUM_THREADS", raising=False)
+    with sweep._limit_blas_threads(2):
+        assert sweep.os.environ["OMP_NUM_THREADS"] == "2"
+        assert sweep.os.environ["OPENBLAS_NUM_THREADS"] == "2"
+    assert sweep.os.environ["OMP_NUM_THREADS"] == "7"
+    assert "OPENBLAS_NUM_THREADS" not in sweep.os.environ
+
+
+def test_run_sweep_in_spawned_workers(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(5, 60)).astype(np.float32)
+    y = (X[:1] > 0).astype(np.float32)
+    results_path = tmp_path / "results.jsonl"
+
+    results = run_sweep(X, y, {"learning_rate": [0.01, 0.5]}, results_path, num_iterations=20, workers=2)
+
+    assert [result["config"]["learning_rate"] for result in results] == [0.5, 0.01]
+    lines = results_path.read_text().splitlines()
+    assert len(lines) == 2
+    assert all(json.loads(line)["num_iterations"] == 20 for line in lines)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.models.logistic_regression_nn import LogisticRegression
+from src.models.trainer import Trainer
+
+
+def _data(m=200, n=10, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, m)).astype(np.float32)
+    y = (rng.normal(size=(1, n)) @ X > 0).astype(np.float32)
+    return X, y
+
+
+def test_patience_without_validation_data_raises():
+    X, y = _data()
+    with pytest.raises(ValueError):
+        Trainer(X.shape[0], patience=3).fit(X, y, num_iterations=10)
+    with pytest.raises(ValueError):
+        Trainer(X.shape[0], optimizer="sgd", patience=3).fit_batches([(X, y)], num_epochs=2)
+    with pytest.raises(ValueError):
+        LogisticRegression().fit(X, y, num_iterations=10, patience=3)
+
+
+def test_patience_with_nan_validation_cost_stops_without_restoring():
+    X, y = _data()
+    X_val = np.full((X.shape[0], 5), np.nan, dtype=np.float32)
+    y_val = np.ones((1, 5), dtype=np.float32)
+    trainer = Trainer(X.shape[0], learning_rate=0.1, patience=2, validation_every=1)
+    trainer.fit(X, y, num_iterations=50, X_val=X_val, y_val=y_val)
+    assert trainer.stop_reason == "patience"
+    assert trainer.stop_iteration == 1
+    assert np.all(np.isfinite(trainer.w))
+
+
+def test_fit_batches_early_stopping_restores_best_weights():
+    X, y = _data(m=400)
+    batches = [(X[:, i:i + 50], y[:, i:i + 50]) for i in range(0, 400, 50)]
+    # Validation labels are the opposite of the training labels, so the validation cost
+    # only ever gets worse after the first check
+    model = LogisticRegression().fit_batches(batches, X.shape[0], num_epochs=50, learning_rate=0.1,
+                                             optimizer="sgd", shuffle=False, patience=2, validation_every=1,
+                                             X_val=X, y_val=1 - y)
+    assert model.stop_reason == "patience"
+    assert model.stop_iteration == 2
+
+    first_epoch = LogisticRegression().fit_batches(batches, X.shape[0], num_epochs=1, learning_rate=0.1,
+                                                   optimizer="sgd", shuffle=False)
+    np.testing.assert_array_equal(model.w, first_epoch.w)
+    assert model.b == first_epoch.b
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from tests.conftest import N_FEATURES, make_model
+
+
+def _pixels(m, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=(N_FEATURES, m), dtype=np.uint8)
+
+
+def _assert_matches_float_path(model, X, block_size=None):
+    expected_proba = model.predict_proba(X.astype(np.float32) / 255)
+    proba = model.predict_proba_uint8(X, block_size)
+    assert proba.shape == (1, X.shape[1])
+    np.testing.assert_allclose(proba, expected_proba, rtol=1e-5, atol=1e-6)
+    np.testing.assert_array_equal(model.predict_uint8(X, block_size), model.predict(X.astype(np.float32) / 255))
+
+
+@pytest.mark.parametrize("block_size,m", [
+    (None, 20),   # default block, larger than the batch
+    (1, 20),      # one example per block
+    (7, 20),      # last block is partial
+    (7, 21),      # blocks divide the batch exactly
+    (64, 10),     # batch smaller than one block
+    (None, 0),
+    (7, 0),
+])
+def test_predict_uint8_matches_float_path(block_size, m):
+    _assert_matches_float_path(make_model(), _pixels(m), block_size)
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+@pytest.mark.parametrize("block_size,m", [(None, 20), (1, 5), (7, 20), (None, 0)])
+def test_quantized_predict_uint8_matches_float_path(dtype, block_size, m):
+    model = make_model().quantize(dtype)
+    assert model.w.dtype == np.dtype(dtype)
+    _assert_matches_float_path(model, _pixels(m, seed=1), block_size)
+
+
+def test_predict_uint8_rejects_float_input():
+    with pytest.raises(ValueError):
+        make_model().predict_uint8(_pixels(3).astype(np.float32))